@@ -0,0 +1,169 @@
+"""
+Checkpoint/resume for agent runs that outlive one function call.
+
+`run_agent_remotely` has a hard 900 s timeout. Instead of being killed mid-run, a run keeps
+a checkpoint in the session volume and stops at a turn boundary when its time budget runs
+out, then continues in a new function call (up to MAX_RESUMES times):
+
+    .checkpoint/state.json        attempt, completed pipeline steps, agent turn count
+    .checkpoint/transcript.json   the agent's tool calls so far with their (reduced) outputs
+
+The checkpoint is written through the volume API, so it survives the sandbox; the
+sandbox's own writes (partial dataset_hf, parse outputs, .tool_outputs) are committed by
+syncing its volume mount at the same time. A resumed run skips completed pipeline steps
+and gives the agent the transcript so it continues instead of starting over. The checkpoint
+is removed once the run has finished, so a later run of the session starts from scratch.
+"""
+
+import io
+import json
+import logging
+import re
+import time
+
+from modal.exception import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = ".checkpoint"
+STATE_FILE = f"{CHECKPOINT_DIR}/state.json"
+TRANSCRIPT_FILE = f"{CHECKPOINT_DIR}/transcript.json"
+# Wall-clock budget of one invocation, leaving headroom under the sandbox (850 s) and
+# function (900 s) timeouts for the last command and the checkpoint itself
+RUN_BUDGET_SECONDS = 720
+# Minimum time between checkpoints at turn boundaries
+CHECKPOINT_INTERVAL_SECONDS = 30
+MAX_RESUMES = 3
+# Tool calls of the previous attempts shown to a resumed agent
+RESUME_TRANSCRIPT_TAIL = 40
+# Characters of a tool call's output kept in the transcript, and shown per call when resuming
+TRANSCRIPT_OUTPUT_CHARS = 2000
+RESUME_OUTPUT_CHARS = 300
+# "(ref <hash>)" added by tool_output_reducer when it stored the full output
+OUTPUT_REF = re.compile(r"\(ref ([0-9a-f]{12})\)")
+
+
+class CheckpointDeadline(Exception):
+    """Raised at a turn boundary once the invocation's time budget is used up."""
+
+
+class AgentCheckpoint:
+    """Progress of one session's agent run, persisted in its volume."""
+
+    def __init__(self, volume, session_id: str, sandbox=None, workspace: str = "/workspace",
+                 budget_seconds: float = RUN_BUDGET_SECONDS):
+        self.volume = volume
+        self.session_id = session_id
+        self.sandbox = sandbox
+        self.workspace = workspace
+        self.deadline = time.time() + budget_seconds
+        self.state = {"session_id": session_id, "attempt": 0, "completed_steps": [], "turns": 0}
+        self.transcript = []
+        self.interrupted = False
+        self._saved_at = 0.0
+        # Whether a recorded tool call may have written to the workspace since the last sync
+        self._workspace_dirty = False
+
+    def load(self) -> "AgentCheckpoint":
+        """Read an earlier attempt's checkpoint (if any) and start the next attempt."""
+        try:
+            self.state = self._read_json(STATE_FILE)
+            self.transcript = self._read_json(TRANSCRIPT_FILE)
+        except (FileNotFoundError, NotFoundError):
+            pass
+        self.state["attempt"] += 1
+        return self
+
+    def _read_json(self, path: str):
+        return json.loads(b"".join(self.volume.read_file(path)))
+
+    @property
+    def resumed(self) -> bool:
+        return self.state["attempt"] > 1
+
+    def is_done(self, step: str) -> bool:
+        return step in self.state["completed_steps"]
+
+    def complete(self, step: str):
+        if not self.is_done(step):
+            self.state["completed_steps"].append(step)
+        self.save()
+
+    def check_deadline(self):
+        if self.interrupted or time.time() >= self.deadline:
+            if not self.interrupted:
+                self.interrupted = True
+                self.save()
+            raise CheckpointDeadline(f"Time budget used up after {self.state['turns']} agent turns")
+
+    def record_turn(self, command, writes: bool = True):
+        """
+        Called before each agent tool call: a turn boundary. `writes=False` marks a call
+        that only reads the workspace, so it needs no workspace sync at the next checkpoint.
+        """
+        self.check_deadline()
+        self.state["turns"] += 1
+        entry = {"attempt": self.state["attempt"], "command": list(command)}
+        self.transcript.append(entry)
+        if time.time() - self._saved_at >= CHECKPOINT_INTERVAL_SECONDS:
+            # Syncs the writes of the earlier calls; this one has not run yet
+            self.save(sync=self._workspace_dirty)
+        self._workspace_dirty |= writes
+        return entry
+
+    def record_output(self, entry: dict, stream: str, text: str):
+        """Keep the end of a tool call's output (and its tool_output_reducer ref) next to its command."""
+        entry[stream] = text[-TRANSCRIPT_OUTPUT_CHARS:]
+        ref = OUTPUT_REF.search(text)
+        if ref:
+            entry["ref"] = ref.group(1)
+
+    def save(self, sync: bool = True):
+        """Commit the sandbox's workspace (unless `sync` is False) and write the checkpoint to the volume."""
+        if sync and self.sandbox is not None:
+            try:
+                # Volume writes from a sandbox are committed on sync (or when it terminates)
+                self.sandbox.exec("sync", self.workspace).wait()
+            except Exception as e:
+                logger.warning(f"    Could not sync the workspace: {e}")
+            self._workspace_dirty = False
+        self.state["updated_at"] = time.time()
+        with self.volume.batch_upload(force=True) as batch:
+            batch.put_file(io.BytesIO(json.dumps(self.state).encode()), STATE_FILE)
+            batch.put_file(io.BytesIO(json.dumps(self.transcript).encode()), TRANSCRIPT_FILE)
+        self._saved_at = time.time()
+
+    def clear(self):
+        """Remove the checkpoint of a finished run."""
+        try:
+            self.volume.remove_file(CHECKPOINT_DIR, recursive=True)
+        except (FileNotFoundError, NotFoundError):
+            pass
+
+    def resume_notes(self) -> str:
+        """What a resumed agent needs to know about the earlier attempts."""
+        if not self.transcript:
+            return ""
+        tail = self.transcript[-RESUME_TRANSCRIPT_TAIL:]
+        commands = "\n".join(_describe_turn(entry) for entry in tail)
+        skipped = len(self.transcript) - len(tail)
+        return (
+            f"This session was interrupted by a time limit and is being resumed (attempt {self.state['attempt']}). "
+            f"Earlier attempts already ran {len(self.transcript)} commands and their files are still in the "
+            "workspace (including any partial dataset_hf and parse outputs; full command outputs are in "
+            ".tool_outputs/). Check what is already done and continue from there instead of starting over. "
+            f"The last commands and the end of their outputs were"
+            f"{f' (after {skipped} earlier ones)' if skipped else ''}:\n{commands}\n"
+        )
+
+
+def _describe_turn(entry: dict) -> str:
+    lines = ["$ " + " ".join(entry["command"])]
+    for stream in ("stdout", "stderr"):
+        output = entry.get(stream, "").strip()
+        if output:
+            shown = output if len(output) <= RESUME_OUTPUT_CHARS else "..." + output[-RESUME_OUTPUT_CHARS:]
+            lines += ["  " + line for line in shown.splitlines()]
+    if entry.get("ref"):
+        lines.append(f"  (full output: .tool_outputs/{entry['ref']}.*)")
+    return "\n".join(lines)
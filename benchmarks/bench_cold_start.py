@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile of the web endpoint.
+
+Each run starts a fresh interpreter and times what a web container does after scaling from
+zero: importing modal_webendpoint, building the app (create_web_app on the local backend)
+and serving the first GET /. With --preload, modal_webendpoint.preload() runs first and is
+reported separately, as it is paid before the memory snapshot rather than per container.
+The slowest imports are listed from `python -X importtime`.
+
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --preload --runs 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs in the child interpreter; prints one JSON line of timings in milliseconds
+CHILD = """
+import json, tempfile, time
+start = time.perf_counter()
+import modal_webendpoint
+timings = {{"import_ms": (time.perf_counter() - start) * 1000}}
+if {preload}:
+    mark = time.perf_counter()
+    modal_webendpoint.preload({templates_dir!r})
+    timings["preload_ms"] = (time.perf_counter() - mark) * 1000
+    # Paid once before the snapshot, not by each container
+    start += timings["preload_ms"] / 1000
+
+import asyncio
+import httpx
+from execution_backend import LocalBackend
+
+mark = time.perf_counter()
+backend = LocalBackend(tempfile.mkdtemp())
+app = modal_webendpoint.create_web_app(backend.queue(), backend=backend, templates_dir={templates_dir!r},
+                                       my_files_dir={my_files_dir!r})
+timings["create_app_ms"] = (time.perf_counter() - mark) * 1000
+
+async def first_byte():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        mark = time.perf_counter()
+        response = await client.get("/", headers={{"Accept-Encoding": "gzip"}})
+        assert response.status_code == 200
+        return (time.perf_counter() - mark) * 1000
+
+timings["first_request_ms"] = asyncio.run(first_byte())
+timings["time_to_first_byte_ms"] = (time.perf_counter() - start) * 1000
+print(json.dumps(timings))
+"""
+
+
+def child_env() -> dict:
+    paths = [str(ROOT), str(ROOT / "modal_webendpoint"), str(ROOT / "my_files")]
+    return os.environ | {"PYTHONPATH": os.pathsep.join(paths + [os.environ.get("PYTHONPATH", "")])}
+
+
+def run_once(preload: bool) -> dict:
+    code = CHILD.format(preload=preload, templates_dir=str(ROOT / "modal_webendpoint" / "templates"),
+                        my_files_dir=str(ROOT / "my_files"))
+    output = subprocess.run([sys.executable, "-c", code], env=child_env(), cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> list[tuple[str, float]]:
+    """Top-level imports of modal_webendpoint by cumulative import time (ms)."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import modal_webendpoint"],
+                            env=child_env(), cwd=ROOT, check=True, capture_output=True, text=True).stderr
+    imports = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)$", line)
+        # Direct imports of modal_webendpoint are indented by three spaces
+        if match and len(match.group(2)) == 3:
+            imports.append((match.group(3), int(match.group(1)) / 1000))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time (median is reported)")
+    parser.add_argument("--preload", action="store_true", help="Run preload() first, as before a memory snapshot")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    args = parser.parse_args()
+
+    runs = [run_once(args.preload) for _ in range(args.runs)]
+    results = {key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]}
+    results["slowest_imports_ms"] = dict(slowest_imports(args.top))
+
+    for key, value in results.items():
+        if key != "slowest_imports_ms":
+            print(f"{key:>24}: {value:8.1f}")
+    print("\nSlowest imports (cumulative ms):")
+    for name, ms in results["slowest_imports_ms"].items():
+        print(f"{name:>24}: {ms:8.1f}")
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the dataset pipeline.
+
+Times parse_chi_txt, filename metadata extraction, huggingface dataset build/save,
+zip creation (as done by /download) and the processing stages (baseline correction, peak
+features) over synthetic sessions, and compares throughput and peak RSS against a stored
+baseline JSON.
+
+    python benchmarks/bench_pipeline.py --preset small
+    python benchmarks/bench_pipeline.py --preset small --update-baseline
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+os.environ.setdefault("HF_DATASETS_DISABLE_PROGRESS_BARS", "1")
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / "my_files"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from synthetic_chi import generate_session, write_chi_file  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# n_files: files per session, n_points: points per trace, long_trace: points in the single long-trace file
+PRESETS = {
+    "small": {"n_files": 1_000, "n_points": 250, "long_trace": 100_000},
+    "medium": {"n_files": 10_000, "n_points": 250, "long_trace": 1_000_000},
+    "large": {"n_files": 100_000, "n_points": 250, "long_trace": 1_000_000},
+}
+
+
+def bench_parse(workdir: Path) -> dict:
+    from chi_txt_parser import parse_chi_txt
+
+    files = sorted((workdir / "session").glob("*.txt"))
+    points = 0
+    for path in files:
+        points += len(parse_chi_txt(str(path))["Potential/V"])
+    return {"items": len(files), "points": points}
+
+
+def bench_parse_long_trace(workdir: Path) -> dict:
+    from chi_txt_parser import parse_chi_txt
+
+    parsed = parse_chi_txt(str(workdir / "long_trace.txt"))
+    return {"items": 1, "points": len(parsed["Potential/V"])}
+
+
+def bench_metadata(workdir: Path) -> dict:
+    from dataset_builder import extract_filename_metadata
+
+    names = [path.name for path in (workdir / "session").glob("*.txt")]
+    for name in names:
+        extract_filename_metadata(name)
+    return {"items": len(names)}
+
+
+def bench_dataset_build_save(workdir: Path) -> dict:
+    from dataset_builder import build_dataset, build_records, find_chi_files
+
+    output_dir = workdir / "dataset_hf"
+    shutil.rmtree(output_dir, ignore_errors=True)
+    dataset = build_dataset(build_records(find_chi_files(workdir / "session")))
+    dataset.save_to_disk(str(output_dir))
+    return {"items": len(dataset)}
+
+
+def bench_processing(workdir: Path) -> dict:
+    from dataset_builder import build_records, find_chi_files
+    from processing import process_records
+
+    records = build_records(find_chi_files(workdir / "session"))
+    start = time.perf_counter()
+    process_records(records)
+    # Only the processing stages are timed, not the parse that feeds them
+    return {"items": len(records), "points": sum(len(r["potential"]) for r in records),
+            "elapsed_s": time.perf_counter() - start}
+
+
+def bench_zip(workdir: Path) -> dict:
+    dataset_dir = workdir / "dataset_hf"
+    total_bytes = 0
+    with tempfile.TemporaryFile() as buffer:
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for path in sorted(dataset_dir.rglob("*")):
+                if path.is_file():
+                    total_bytes += path.stat().st_size
+                    zip_file.write(path, path.relative_to(dataset_dir))
+    return {"items": 1, "bytes": total_bytes}
+
+
+# Order matters: zip reads the dataset written by dataset_build_save.
+CASES = {
+    "parse": bench_parse,
+    "parse_long_trace": bench_parse_long_trace,
+    "metadata": bench_metadata,
+    "dataset_build_save": bench_dataset_build_save,
+    "zip": bench_zip,
+    "processing": bench_processing,
+}
+
+
+def _run_case(name: str, workdir: str, repeat: int, results: multiprocessing.Queue):
+    # Import outside the timed region so module load time doesn't count against a case
+    import chi_txt_parser  # noqa: F401
+    import dataset_builder  # noqa: F401
+    if name == "dataset_build_save":
+        import datasets  # noqa: F401
+
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts = CASES[name](Path(workdir))
+        # A case may report its own elapsed_s to exclude setup from the timing
+        elapsed = min(elapsed, counts.pop("elapsed_s", time.perf_counter() - start))
+    # ru_maxrss is in KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put({"elapsed_s": elapsed, "peak_rss_mb": peak_rss_mb, **counts})
+
+
+def run_case(name: str, workdir: Path, repeat: int = 3) -> dict:
+    """
+    Run one case in a fresh process so peak RSS is attributable to that case alone.
+    The best of `repeat` timings is reported to keep the comparison stable.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(name, str(workdir), repeat, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+
+    elapsed = max(result["elapsed_s"], 1e-9)
+    result["items_per_s"] = result["items"] / elapsed
+    if "points" in result:
+        result["points_per_s"] = result["points"] / elapsed
+    if "bytes" in result:
+        result["mb_per_s"] = result["bytes"] / 1e6 / elapsed
+    return result
+
+
+def throughput_metric(result: dict) -> str:
+    """Most meaningful throughput for a case: points for parsing, bytes for zip, items otherwise."""
+    for metric in ["points_per_s", "mb_per_s"]:
+        if metric in result:
+            return metric
+    return "items_per_s"
+
+
+def prepare_workdir(workdir: Path, preset: dict):
+    generate_session(workdir / "session", preset["n_files"], preset["n_points"])
+    write_chi_file(workdir / "long_trace.txt", preset["long_trace"])
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions: throughput below (1 - tolerance) or peak RSS above (1 + tolerance) of baseline."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        metric = throughput_metric(result)
+        if metric in reference and result[metric] < reference[metric] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {metric} {result[metric]:.1f} vs baseline {reference[metric]:.1f}"
+            )
+        if result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak RSS {result['peak_rss_mb']:.1f} MB vs baseline {reference['peak_rss_mb']:.1f} MB"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=PRESETS, default="small")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per case (best is kept)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown / RSS growth")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--workdir", type=Path, help="Reuse/keep generated data in this directory")
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="chi_bench_"))
+    try:
+        if not (workdir / "session").exists():
+            print(f"Generating {preset['n_files']} synthetic files in {workdir}...")
+            prepare_workdir(workdir, preset)
+
+        results = {}
+        for name in args.cases:
+            results[name] = run_case(name, workdir, args.repeat)
+            r = results[name]
+            metric = throughput_metric(r)
+            print(f"{name:<20} {r['elapsed_s']:8.3f}s  {r[metric]:14.1f} {metric:<12}  "
+                  f"peak RSS {r['peak_rss_mb']:8.1f} MB")
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"preset": args.preset, "python": sys.version.split()[0], "cpu_count": os.cpu_count(),
+              "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update_baseline:
+        baselines[args.preset] = report
+        args.baseline.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"Baseline for preset '{args.preset}' written to {args.baseline}")
+        return
+
+    baseline = baselines.get(args.preset, {}).get("results", {})
+    if not baseline:
+        print(f"No baseline for preset '{args.preset}'; run with --update-baseline to record one.")
+        return
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
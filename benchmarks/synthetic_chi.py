@@ -0,0 +1,89 @@
+"""
+Synthetic CHI .txt generators that scale up the samples in test_files/.
+Files use the same header layout and naming convention as the real DPV exports,
+so they go through exactly the same parsing and metadata code paths.
+"""
+
+import math
+import random
+from pathlib import Path
+
+HEADER_TEMPLATE = """June 16, 2025   15:30:00
+Differential Pulse Voltammetry
+File: {file_id}
+Data Source:  Experiment
+Instrument Model:  CHI1040C
+Header: 
+Note: 
+
+Init E (V) = {init_e}
+Final E (V) = {final_e}
+Incr E (V) = {incr_e}
+Amplitude (V) = 0.05
+Pulse Width (sec) = 0.075
+Sample Width (sec) = 0.0167
+Pulse Period (sec) = 0.5
+Quiet Time (sec) = 2
+Sensitivity (A/V) = 1e-5
+
+Results:
+
+Channel 1:
+
+Potential/V, Current/A
+
+"""
+
+CONCENTRATIONS = ["0uM", "1uM", "2uM", "5uM", "10uM"]
+
+
+def synthetic_file_name(index: int) -> str:
+    """
+    File name following the real naming convention; every 50th file is a blank. Blank names
+    have no sample field, so later blanks are told apart by a numbered electrode (GCE2, ...).
+    """
+    if index % 50 == 0:
+        electrode = f"GCE{index // 50 + 1}" if index else "GCE"
+        return f"250616_BLANK_EricMM_{electrode}_DPV.txt"
+    concentration = CONCENTRATIONS[index % len(CONCENTRATIONS)]
+    return f"250616_Pprot382int_2007B_{concentration}_AI1_S{index}_EricMM_GCE_DPV.txt"
+
+
+def synthetic_trace(n_points: int, init_e: float = -0.5, incr_e: float = 0.002, seed: int = 0) -> str:
+    """Data table for a DPV sweep: sloped baseline plus one gaussian peak and a little noise."""
+    rng = random.Random(seed)
+    peak_e = init_e + incr_e * n_points * rng.uniform(0.4, 0.6)
+    peak_height = rng.uniform(0.2e-6, 2e-6)
+    peak_width = max(incr_e * n_points * 0.05, incr_e)
+    rows = []
+    for i in range(1, n_points + 1):
+        potential = init_e + i * incr_e
+        current = (-2.6e-6 + 1e-6 * (potential - init_e)
+                   - peak_height * math.exp(-((potential - peak_e) / peak_width) ** 2)
+                   + rng.gauss(0, 2e-9))
+        rows.append(f"{potential:.3f}, {current:.3e}")
+    return "\n".join(rows) + "\n"
+
+
+def write_chi_file(path: Path, n_points: int = 250, seed: int = 0, trace: str = None) -> Path:
+    init_e, incr_e = -0.5, 0.002
+    header = HEADER_TEMPLATE.format(
+        file_id=path.stem.lower(), init_e=init_e, final_e=round(init_e + n_points * incr_e, 6), incr_e=incr_e
+    )
+    path.write_text(header + (trace or synthetic_trace(n_points, init_e, incr_e, seed)))
+    return path
+
+
+def generate_session(output_dir: str, n_files: int, n_points: int = 250, distinct_traces: int = 64) -> list[Path]:
+    """
+    Write n_files synthetic CHI files of n_points each into output_dir.
+    Only `distinct_traces` waveforms are generated and reused round-robin, which keeps
+    generating 10^5-file sessions fast without changing what the parser has to do.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    traces = [synthetic_trace(n_points, seed=seed) for seed in range(min(n_files, distinct_traces))]
+    return [
+        write_chi_file(output_dir / synthetic_file_name(i), n_points, trace=traces[i % len(traces)])
+        for i in range(n_files)
+    ]
@@ -0,0 +1,159 @@
+"""
+Cross-session dataset catalog.
+
+When a session finishes, the metadata columns of its dataset_hf are written as one JSON
+shard per session to a shared catalog location (a persistent Modal volume, or a local
+directory). Each shard is written by exactly one session, so concurrent sessions never
+conflict. Readers ingest new shards into an embedded SQLite index and answer queries
+like "all AI1 DPV runs at 1uM by EricMM" without opening any session volume.
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+CATALOG_COLUMNS = ["source_file", "date", "construct", "concentration", "concentration_um", "molecule",
+                   "sample", "experimenter", "electrode", "technique", "is_blank"]
+COLUMN_TYPES = {"concentration_um": "REAL", "is_blank": "INTEGER"}
+# Columns usable as equality filters in queries
+FILTER_COLUMNS = [c for c in CATALOG_COLUMNS if c != "concentration_um"]
+# Most rows a query returns; limits outside 1..MAX_QUERY_ROWS are clamped
+MAX_QUERY_ROWS = 1000
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    volume_name TEXT NOT NULL,
+    context TEXT,
+    indexed_at REAL NOT NULL,
+    n_rows INTEGER NOT NULL,
+    shard_mtime REAL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    session_id TEXT NOT NULL REFERENCES sessions(session_id),
+    row_idx INTEGER NOT NULL,
+    {", ".join(f"{column} {COLUMN_TYPES.get(column, 'TEXT')}" for column in CATALOG_COLUMNS)},
+    PRIMARY KEY (session_id, row_idx)
+);
+CREATE INDEX IF NOT EXISTS rows_molecule_concentration ON rows (molecule, concentration_um);
+CREATE INDEX IF NOT EXISTS rows_experimenter ON rows (experimenter);
+CREATE INDEX IF NOT EXISTS rows_technique ON rows (technique);
+CREATE INDEX IF NOT EXISTS rows_date ON rows (date);
+"""
+
+
+def write_session_shard(shard_dir: str, session_id: str, volume_name: str, rows: list[dict],
+                        context: str = "") -> Path:
+    """Record a finished session's metadata rows in the catalog location."""
+    shard = {
+        "session_id": session_id,
+        "volume_name": volume_name,
+        "context": context,
+        "indexed_at": time.time(),
+        "rows": [{column: row.get(column) for column in CATALOG_COLUMNS} for row in rows],
+    }
+    path = Path(shard_dir) / f"{session_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(shard))
+    tmp_path.replace(path)
+    return path
+
+
+class DatasetCatalog:
+    """SQLite index over session shards."""
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """One short-lived connection per operation, committed on success."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def index_session(self, shard: dict, shard_mtime: float = None):
+        rows = shard["rows"]
+        with self._connect() as conn:
+            conn.execute("DELETE FROM rows WHERE session_id = ?", (shard["session_id"],))
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                (shard["session_id"], shard["volume_name"], shard.get("context"), shard["indexed_at"], len(rows),
+                 shard_mtime),
+            )
+            conn.executemany(
+                f"INSERT INTO rows VALUES ({', '.join('?' * (len(CATALOG_COLUMNS) + 2))})",
+                [
+                    (shard["session_id"], i, *(row.get(column) for column in CATALOG_COLUMNS))
+                    for i, row in enumerate(rows)
+                ],
+            )
+
+    def ingest_shards(self, shard_dir: str) -> int:
+        """Index shards that are new or newer than what is already indexed. Returns how many were ingested."""
+        shard_dir = Path(shard_dir)
+        if not shard_dir.exists():
+            return 0
+        with self._connect() as conn:
+            indexed = dict(conn.execute("SELECT session_id, shard_mtime FROM sessions").fetchall())
+        ingested = 0
+        for path in shard_dir.glob("*.json"):
+            mtime = path.stat().st_mtime
+            if indexed.get(path.stem) == mtime:
+                continue
+            self.index_session(json.loads(path.read_text()), shard_mtime=mtime)
+            ingested += 1
+        return ingested
+
+    def query(self, filters: dict = None, concentration_um_min: float = None, concentration_um_max: float = None,
+              date_from: str = None, date_to: str = None, limit: int = MAX_QUERY_ROWS) -> dict:
+        """
+        Rows matching all equality `filters` (on FILTER_COLUMNS) and ranges, plus the
+        sessions they belong to.
+        """
+        clauses, params = [], []
+        for column, value in (filters or {}).items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown catalog column: {column}")
+            clauses.append(f"{column} = ?")
+            params.append(value)
+        for clause, value in [("concentration_um >= ?", concentration_um_min), ("concentration_um <= ?", concentration_um_max),
+                              ("date >= ?", date_from), ("date <= ?", date_to)]:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # SQLite treats a negative LIMIT as no limit
+        limit = min(max(int(limit), 1), MAX_QUERY_ROWS)
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM rows {where} ORDER BY session_id, row_idx LIMIT ?", (*params, limit)
+            ).fetchall()
+            sessions = conn.execute(
+                f"""SELECT s.session_id, s.volume_name, s.context, s.indexed_at, s.n_rows, m.n_matching_rows
+                    FROM sessions s JOIN (SELECT session_id, COUNT(*) AS n_matching_rows FROM rows {where}
+                                          GROUP BY session_id) m USING (session_id)
+                    ORDER BY s.session_id""",
+                params,
+            ).fetchall()
+        return {
+            "sessions": [dict(session) for session in sessions],
+            "rows": [_from_sql_row(dict(row)) for row in rows],
+        }
+
+
+def _from_sql_row(row: dict) -> dict:
+    if row.get("is_blank") is not None:
+        row["is_blank"] = bool(row["is_blank"])
+    return row
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Merged, partitioned export of many sessions' dataset_hf into one Parquet dataset.
+
+Session schemas are reconciled first (union of columns, numeric types widened, conflicting
+types falling back to string), then each session is cast to the common schema and written
+into a Hive-partitioned layout, e.g.
+
+    <export>/technique=DPV/molecule=AI1/date=2025-06-16/<session>-0.parquet
+
+Readers get partition pruning and predicate pushdown instead of concatenating HF datasets:
+
+    import pyarrow.dataset as ds
+    table = ds.dataset("<export>", format="parquet", partitioning="hive").to_table(
+        filter=(ds.field("molecule") == "AI1") & (ds.field("concentration_um") >= 1))
+
+    python dataset_export.py --backend local --output exports/ai1 VOLUME_NAME [VOLUME_NAME ...]
+
+select_subset/write_subset serve partial downloads of one session (GET /export/{volume_name}):
+rows filtered on metadata columns, projected to the requested columns, as Parquet or CSV.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pyarrow as pa
+
+# waveform_encoding lives in my_files (mounted at /my_files in the Modal images)
+sys.path.append("/my_files")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "my_files"))
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION_BY = ["technique", "molecule", "date"]
+EXPORT_FORMATS = {"parquet": "application/vnd.apache.parquet", "csv": "text/csv"}
+
+
+def download_dataset(volume, local_dir: Path, dataset_path: str = "dataset_hf") -> Path:
+    """Copy a volume's dataset_hf to local_dir using the volume API (Modal or local)."""
+    from modal.volume import FileEntryType
+
+    for entry in volume.iterdir(dataset_path, recursive=True):
+        if entry.type == FileEntryType.FILE:
+            target = local_dir / os.path.relpath(entry.path, dataset_path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, "wb") as f:
+                for chunk in volume.read_file(entry.path):
+                    f.write(chunk)
+    return local_dir
+
+
+def load_session_table(dataset_dir: Path, session_id: str) -> pa.Table:
+    from datasets import load_from_disk
+
+    table = decode_table(load_from_disk(str(dataset_dir)).data.table)
+    return table.append_column("session_id", pa.array([session_id] * len(table), pa.string()))
+
+
+def read_arrow_files(contents: list[bytes]) -> pa.Table:
+    """One table from the Arrow files of a dataset_hf (IPC streams written by save_to_disk)."""
+    tables = []
+    for content in contents:
+        try:
+            tables.append(pa.ipc.open_stream(content).read_all())
+        except pa.ArrowInvalid:
+            tables.append(pa.ipc.open_file(content).read_all())
+    return pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+
+
+def _equals(table: pa.Table, column: str, value: str):
+    import pyarrow.compute as pc
+
+    if column not in table.column_names:
+        raise ValueError(f"Unknown column: {column}")
+    column_type = table.schema.field(column).type
+    if pa.types.is_boolean(column_type):
+        return pc.field(column) == (value.lower() in ("1", "true", "yes"))
+    return pc.field(column) == pa.scalar(value).cast(column_type)
+
+
+def _decoded_column(table: pa.Table, name: str) -> pa.Array:
+    """A trace column of a compactly encoded dataset (see waveform_encoding) as plain float64 lists."""
+    from waveform_encoding import AXIS_COLUMN, axis_columns, decode_record, stored_name
+
+    candidates = [name, stored_name(name, "lossless"), *(axis_columns() if name == AXIS_COLUMN else ())]
+    stored = [column for column in candidates if column in table.column_names]
+    if not stored:
+        raise ValueError(f"Unknown column: {name}")
+    rows = table.select(stored).to_pylist()
+    return pa.array([decode_record(row).get(name) for row in rows], pa.list_(pa.float64()))
+
+
+def decode_table(table: pa.Table) -> pa.Table:
+    """
+    A dataset_hf table of any encoding (see waveform_encoding) with its potential and trace
+    columns as plain float64 lists, in place of the encoded columns.
+    """
+    from waveform_encoding import AXIS_COLUMN, PACKED_SUFFIX, TRACE_COLUMNS, axis_columns, dataset_encoding
+
+    if dataset_encoding(table.column_names) == "full":
+        return table
+    # Stored column -> decoded column it is part of
+    decoded_from = {column: AXIS_COLUMN for column in axis_columns()} | {AXIS_COLUMN: AXIS_COLUMN}
+    decoded_from |= {name: name for name in TRACE_COLUMNS} | {name + PACKED_SUFFIX: name for name in TRACE_COLUMNS}
+    columns = {}
+    for name in table.column_names:
+        target = decoded_from.get(name)
+        if target is None:
+            columns[name] = table[name]
+        elif target not in columns:
+            columns[target] = _decoded_column(table, target)
+    return pa.table(columns)
+
+
+def select_subset(table: pa.Table, columns: list[str] = None, filters: dict = None,
+                  concentration_um_min: float = None, concentration_um_max: float = None,
+                  date_from: str = None, date_to: str = None) -> pa.Table:
+    """
+    Rows matching all equality `filters` ({column: value}, values as strings) and ranges,
+    projected to `columns` (all columns if None). Trace columns of compactly encoded
+    datasets are decoded, so an export never depends on how the session was stored.
+    """
+    import operator
+
+    import pyarrow.compute as pc
+
+    conditions = [_equals(table, column, value) for column, value in (filters or {}).items()]
+    for column, compare, value in [("concentration_um", operator.ge, concentration_um_min),
+                                   ("concentration_um", operator.le, concentration_um_max),
+                                   ("date", operator.ge, date_from), ("date", operator.le, date_to)]:
+        if value is not None:
+            if column not in table.column_names:
+                raise ValueError(f"Unknown column: {column}")
+            conditions.append(compare(pc.field(column), value))
+    if conditions:
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression = expression & condition
+        table = table.filter(expression)
+    if columns is None:
+        return decode_table(table)
+    return pa.table({
+        name: table[name] if name in table.column_names else _decoded_column(table, name) for name in columns
+    })
+
+
+def write_subset(table: pa.Table, fmt: str = "parquet") -> bytes:
+    """Serialize a subset as Parquet or CSV (list columns become JSON arrays in CSV)."""
+    import io
+    import json
+
+    buffer = io.BytesIO()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, buffer)
+    elif fmt == "csv":
+        import pyarrow.csv as csv
+
+        for i, field in enumerate(table.schema):
+            if pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+                values = [None if v is None else json.dumps(v) for v in table[field.name].to_pylist()]
+                table = table.set_column(i, field.name, pa.array(values, pa.string()))
+        csv.write_csv(table, buffer)
+    else:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(EXPORT_FORMATS)}")
+    return buffer.getvalue()
+
+
+def _widen(types: list[pa.DataType]) -> pa.DataType:
+    """Common type for one column across sessions."""
+    types = [t for t in types if not pa.types.is_null(t)]
+    if not types:
+        return pa.null()
+    if all(t == types[0] for t in types):
+        return types[0]
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) or pa.types.is_boolean(t) for t in types):
+        return pa.float64()
+    if all(pa.types.is_list(t) or pa.types.is_large_list(t) for t in types):
+        return pa.list_(_widen([t.value_type for t in types]))
+    return pa.string()
+
+
+def reconcile_schemas(schemas: list[pa.Schema]) -> pa.Schema:
+    """Union of all columns (in first-seen order) with widened types."""
+    columns = {}
+    for schema in schemas:
+        for field in schema:
+            columns.setdefault(field.name, []).append(field.type)
+    return pa.schema([pa.field(name, _widen(types)) for name, types in columns.items()])
+
+
+def conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Cast a session table to the common schema, adding missing columns as nulls."""
+    arrays = []
+    for field in schema:
+        if field.name in table.column_names:
+            column = table[field.name]
+            arrays.append(column if column.type == field.type else column.cast(field.type))
+        else:
+            arrays.append(pa.nulls(len(table), field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def export_tables(tables: dict, output_dir: str, partition_by: list[str] = DEFAULT_PARTITION_BY) -> pa.Schema:
+    """
+    Write {session_id: table} as one Hive-partitioned Parquet dataset. Partition
+    columns missing from every session are dropped from the partitioning.
+    """
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    schema = reconcile_schemas([table.schema for table in tables.values()])
+    partition_by = [column for column in partition_by if column in schema.names]
+    # Partition values become directory names, so partition columns are stored as strings
+    schema = pa.schema([
+        pa.field(f.name, pa.string()) if f.name in partition_by else f for f in schema
+    ])
+    partitioning = ds.partitioning(pa.schema([schema.field(c) for c in partition_by]), flavor="hive")
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    for session_id, table in tables.items():
+        ds.write_dataset(
+            conform(table, schema),
+            output_dir,
+            format="parquet",
+            partitioning=partitioning,
+            basename_template=f"{session_id}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+    pq.write_metadata(schema, str(Path(output_dir) / "_common_metadata"))
+    return schema
+
+
+def export_sessions(backend, volume_names: list[str], output_dir: str,
+                    partition_by: list[str] = DEFAULT_PARTITION_BY) -> pa.Schema:
+    """Fetch each session's dataset_hf from its volume and export them all to output_dir."""
+    prefix = "temp-dataset-processor-agent-volume-"
+    with tempfile.TemporaryDirectory() as tmp:
+        tables = {}
+        for volume_name in volume_names:
+            session_id = volume_name.removeprefix(prefix)
+            logger.info(f"Loading dataset_hf from '{volume_name}'...")
+            dataset_dir = download_dataset(backend.volume(volume_name), Path(tmp) / session_id)
+            tables[session_id] = load_session_table(dataset_dir, session_id)
+        schema = export_tables(tables, output_dir, partition_by)
+    logger.info(f"Exported {len(volume_names)} sessions to {output_dir}")
+    return schema
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from execution_backend import LocalBackend, get_backend
+
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("volume_names", nargs="+")
+    parser.add_argument("--output", required=True, help="Export directory")
+    parser.add_argument("--partition-by", nargs="+", default=DEFAULT_PARTITION_BY)
+    parser.add_argument("--backend", default=None, help="modal or local (default: $DATASET_PROCESSOR_BACKEND)")
+    parser.add_argument("--root", help="Volume directory for the local backend")
+    args = parser.parse_args()
+
+    backend = LocalBackend(args.root) if args.root else get_backend(args.backend)
+    export_sessions(backend, args.volume_names, args.output, args.partition_by)
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Deploy entrypoint for the whole app: the web endpoint plus the agent, parse, export and cleanup
+functions of modal_agent, all registered on modal_shared_app.app.
+
+    modal deploy deploy.py
+
+modal_webendpoint does not import modal_agent itself, so web containers only load it when a route
+needs it.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "modal_webendpoint"))
+
+import modal_agent  # noqa: E402,F401
+import modal_webendpoint  # noqa: E402,F401
+from modal_shared_app import app  # noqa: E402,F401
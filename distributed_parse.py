@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Distributed parse stage for very large sessions (tens of thousands of CHI files).
+
+The session's file list is split into shards. Each shard is parsed in its own worker,
+either a Modal container (`parse_shard_remotely.starmap`) or a local process. The worker
+reads its files through the volume API and writes one columnar shard back to the
+session volume:
+
+    parsed/shards/shard-00000.parquet, shard-00001.parquet, ...
+
+A final merge step concatenates the shards in order and saves dataset_hf (with the
+processing stages and the preview pyramid) to the volume, exactly as dataset_builder
+would from a single machine.
+
+    python distributed_parse.py --backend local --root outputs/local_volumes VOLUME_NAME
+"""
+
+import io
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append("/my_files")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "my_files"))
+
+logger = logging.getLogger(__name__)
+
+SHARD_SIZE = 500
+SHARD_DIR = "parsed/shards"
+# Sessions with at least this many CHI files are parsed by the distributed stage
+DISTRIBUTED_PARSE_MIN_FILES = 2000
+
+
+def list_chi_files(volume) -> list[str]:
+    """Paths (relative to the volume root) of every CHI .txt file in a session volume, sorted (as find_chi_files)."""
+    from dataset_builder import SKIP_DIRS
+    from modal.volume import FileEntryType
+
+    return sorted(
+        entry.path for entry in volume.iterdir("/", recursive=True)
+        if entry.type == FileEntryType.FILE and entry.path.lower().endswith(".txt")
+        and not SKIP_DIRS.intersection(Path(entry.path).parts[:-1])
+    )
+
+
+def shard_files(paths: list[str], shard_size: int = SHARD_SIZE) -> list[list[str]]:
+    return [paths[i:i + shard_size] for i in range(0, len(paths), shard_size)]
+
+
+def shard_path(shard_index: int) -> str:
+    return f"{SHARD_DIR}/shard-{shard_index:05d}.parquet"
+
+
+def parse_shard(backend, volume_name: str, file_paths: list[str], shard_index: int) -> int:
+    """Parse one shard of a session's files and write it to the volume. Returns the row count."""
+    from dataset_builder import build_record_from_text, write_parsed_records
+
+    volume = backend.volume(volume_name)
+    records = [
+        build_record_from_text(path, b"".join(volume.read_file(path)).decode("utf-8", errors="replace"))
+        for path in file_paths
+    ]
+    buffer = io.BytesIO()
+    write_parsed_records(records, buffer)
+    buffer.seek(0)
+    with volume.batch_upload(force=True) as batch:
+        batch.put_file(buffer, shard_path(shard_index))
+    return len(records)
+
+
+def parse_shard_local(root: str, volume_name: str, file_paths: list[str], shard_index: int) -> int:
+    """Process-pool entry point for the local backend."""
+    from execution_backend import LocalBackend
+
+    return parse_shard(LocalBackend(root), volume_name, file_paths, shard_index)
+
+
+def merge_shards(backend, volume_name: str, n_shards: int, preview: bool = True, process: bool = True) -> int:
+    """Concatenate the shards in order and save dataset_hf (and dataset_preview) to the volume."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from dataset_builder import save_dataset
+
+    volume = backend.volume(volume_name)
+    tables = [pq.read_table(io.BytesIO(b"".join(volume.read_file(shard_path(i))))) for i in range(n_shards)]
+    records = pa.concat_tables(tables, promote_options="default").to_pylist()
+    with tempfile.TemporaryDirectory() as tmp:
+        save_dataset(records, os.path.join(tmp, "dataset_hf"), preview=preview, process=process)
+        with volume.batch_upload(force=True) as batch:
+            for directory in os.listdir(tmp):
+                batch.put_directory(os.path.join(tmp, directory), directory)
+    return len(records)
+
+
+def distributed_parse(backend, volume_name: str, shard_size: int = SHARD_SIZE, preview: bool = True,
+                      process: bool = True) -> int:
+    """Fan the session's files out over parse workers, then merge the shards into dataset_hf."""
+    paths = list_chi_files(backend.volume(volume_name))
+    if not paths:
+        raise FileNotFoundError(f"No CHI files in volume '{volume_name}'")
+    shards = shard_files(paths, shard_size)
+    logger.info(f"Parsing {len(paths)} files of '{volume_name}' in {len(shards)} shards...")
+    rows = backend.map_parse_shards(volume_name, shards)
+    logger.info(f"Parsed {sum(rows)} rows; merging shards into dataset_hf...")
+    return backend.merge_parse_shards(volume_name, len(shards), preview=preview, process=process)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from execution_backend import LocalBackend, get_backend
+
+    logging.basicConfig(format="%(message)s", level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("volume_name")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--backend", default=None, help="modal or local (default: $DATASET_PROCESSOR_BACKEND)")
+    parser.add_argument("--root", help="Volume directory for the local backend")
+    args = parser.parse_args()
+
+    backend = LocalBackend(args.root) if args.root else get_backend(args.backend)
+    distributed_parse(backend, args.volume_name, args.shard_size)
@@ -0,0 +1,147 @@
+"""
+Pluggable execution backends for the upload -> agent -> download pipeline.
+
+`ModalBackend` is the production path (modal.Volume / modal.Queue / modal.Sandbox).
+`LocalBackend` runs the same pipeline on one machine using local_backend stand-ins,
+for profiling, load testing and on-prem deployments.
+
+Select with DATASET_PROCESSOR_BACKEND=modal|local (default: modal).
+"""
+
+import os
+import threading
+
+import modal
+
+from local_backend import DEFAULT_LOCAL_ROOT, LocalQueue, LocalSandbox, LocalVolume, _aio_method
+
+LOG_QUEUE_NAME = "dataset-processor-log-queue"
+
+# Persistent volume holding one catalog shard per finished session (see catalog.py)
+# and the result cache entries of finished sessions (see result_cache.py), plus recorded
+# model responses (see llm_cache.py)
+CATALOG_MOUNT = "/catalog"
+catalog_volume = modal.Volume.from_name("dataset-processor-catalog", create_if_missing=True)
+
+
+class ModalBackend:
+    name = "modal"
+    # Functions using the catalog mount `catalog_volume` at CATALOG_MOUNT
+    catalog_shard_dir = f"{CATALOG_MOUNT}/sessions"
+    catalog_db_path = "/tmp/dataset-catalog.sqlite"
+    result_cache_dir = f"{CATALOG_MOUNT}/results"
+    llm_cache_dir = f"{CATALOG_MOUNT}/llm_cache"
+
+    def volume(self, name: str, create_if_missing: bool = False):
+        return modal.Volume.from_name(name, create_if_missing=create_if_missing)
+
+    def queue(self, name: str = LOG_QUEUE_NAME):
+        return modal.Queue.from_name(name, create_if_missing=True)
+
+    def create_sandbox(self, volume, workdir: str = "/workspace", timeout: int = 850):
+        sandbox_image = (
+            modal.Image.debian_slim()
+            .apt_install("ripgrep", "ed")  # Install ripgrep and ed
+            .pip_install_from_requirements("/root/requirements.txt")
+            .add_local_file("/root/apply_patch", "/usr/local/bin/apply_patch", copy=True)
+            .run_commands("chmod +x /usr/local/bin/apply_patch")
+        )
+        return modal.Sandbox.create(
+            image=sandbox_image,
+            volumes={workdir: volume},
+            workdir=workdir,
+            timeout=timeout
+        )
+
+    async def _spawn_agent_async(self, **kwargs):
+        from modal_agent import run_agent_remotely
+
+        return await run_agent_remotely.spawn.aio(**kwargs)
+
+    @_aio_method(_spawn_agent_async)
+    def spawn_agent(self, **kwargs):
+        from modal_agent import run_agent_remotely
+
+        return run_agent_remotely.spawn(**kwargs)
+
+    def map_parse_shards(self, volume_name: str, shards: list[list[str]]) -> list[int]:
+        """Parse each shard of a session in its own container (see distributed_parse.py)."""
+        from modal_agent import parse_shard_remotely
+
+        return list(parse_shard_remotely.starmap([(volume_name, paths, i) for i, paths in enumerate(shards)]))
+
+    def merge_parse_shards(self, volume_name: str, n_shards: int, **kwargs) -> int:
+        from modal_agent import merge_shards_remotely
+
+        return merge_shards_remotely.remote(volume_name, n_shards, **kwargs)
+
+    def commit_catalog(self):
+        catalog_volume.commit()
+
+    def reload_catalog(self):
+        catalog_volume.reload()
+
+
+class LocalBackend:
+    name = "local"
+
+    def __init__(self, root: str = DEFAULT_LOCAL_ROOT):
+        self.root = root
+        self._queues = {}
+        self.catalog_shard_dir = os.path.join(root, "_catalog", "sessions")
+        self.catalog_db_path = os.path.join(root, "_catalog", "catalog.sqlite")
+        self.result_cache_dir = os.path.join(root, "_catalog", "results")
+        self.llm_cache_dir = os.path.join(root, "_catalog", "llm_cache")
+
+    def volume(self, name: str, create_if_missing: bool = False):
+        return LocalVolume.from_name(name, create_if_missing=create_if_missing, root=self.root)
+
+    def queue(self, name: str = LOG_QUEUE_NAME):
+        return self._queues.setdefault(name, LocalQueue())
+
+    def create_sandbox(self, volume, workdir: str = "/workspace", timeout: int = 850):
+        return LocalSandbox.create(volumes={workdir: volume}, workdir=workdir, timeout=timeout)
+
+    async def _spawn_agent_async(self, **kwargs):
+        return self.spawn_agent(**kwargs)
+
+    @_aio_method(_spawn_agent_async)
+    def spawn_agent(self, **kwargs):
+        """Run the agent in a background thread, mirroring `.spawn()` on the Modal function."""
+        from modal_agent import run_agent
+
+        thread = threading.Thread(target=run_agent, kwargs=dict(kwargs, backend=self), daemon=True)
+        thread.start()
+        return thread
+
+    def map_parse_shards(self, volume_name: str, shards: list[list[str]]) -> list[int]:
+        """Offline stand-in for the Modal fan-out: one local process per shard, up to the CPU count."""
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        from distributed_parse import parse_shard_local
+
+        workers = max(1, min(len(shards), os.cpu_count() or 1))
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return list(pool.map(parse_shard_local, [self.root] * len(shards), [volume_name] * len(shards),
+                                 shards, range(len(shards))))
+
+    def merge_parse_shards(self, volume_name: str, n_shards: int, **kwargs) -> int:
+        from distributed_parse import merge_shards
+
+        return merge_shards(self, volume_name, n_shards, **kwargs)
+
+    def commit_catalog(self):
+        pass
+
+    def reload_catalog(self):
+        pass
+
+
+def get_backend(name: str = None):
+    name = name or os.environ.get("DATASET_PROCESSOR_BACKEND", "modal")
+    if name == "modal":
+        return ModalBackend()
+    if name == "local":
+        return LocalBackend()
+    raise ValueError(f"Unknown execution backend: {name}")
@@ -0,0 +1,205 @@
+"""
+Record/replay cache for the agent's model calls.
+
+The cache sits in the OpenAI client's HTTP transport, so the agent code is unchanged: every
+request is keyed by a hash of its method, path and canonical JSON body, and the response is
+stored as one JSON file per key. Modes (LLM_CACHE_MODE):
+
+    passthrough   no cache (default)
+    record        call the API and store every successful response (refreshing old entries)
+    replay        answer from the cache only; a miss raises LLMCacheMiss without calling the API
+
+Record a run once, then replay it to rerun the end-to-end pipeline offline and
+deterministically, as long as the sandbox produces the same tool outputs:
+
+    LLM_CACHE_MODE=record python run_summarizer.py
+    LLM_CACHE_MODE=replay python run_summarizer.py
+
+The clients are only routed through the cache inside `with install_llm_cache(...)`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_MODES = ("passthrough", "record", "replay")
+DEFAULT_LLM_CACHE_DIR = "outputs/llm_cache"
+# Request fields that don't change the response
+VOLATILE_FIELDS = {"user", "metadata"}
+# Response headers that no longer apply once the body is stored decoded
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    """Cache key of a model request: method, path and body with keys sorted and volatile fields removed."""
+    try:
+        payload = json.loads(body) if body else None
+    except ValueError:
+        canonical = body
+    else:
+        if isinstance(payload, dict):
+            payload = {key: value for key, value in payload.items() if key not in VOLATILE_FIELDS}
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    digest = hashlib.sha256(f"{method.upper()} {path}\n".encode())
+    digest.update(canonical)
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """Request key -> recorded response, one JSON file per entry."""
+
+    def __init__(self, cache_dir: str = DEFAULT_LLM_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def get(self, key: str) -> dict:
+        try:
+            return json.loads((self.cache_dir / f"{key}.json").read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, response: httpx.Response) -> Path:
+        entry = {
+            "status_code": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+            "body": response.content.decode("utf-8"),
+            "recorded_at": time.time(),
+        }
+        path = self.cache_dir / f"{key}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(entry))
+        tmp_path.replace(path)
+        return path
+
+
+def _cached_response(entry: dict, request: httpx.Request) -> httpx.Response:
+    return httpx.Response(entry["status_code"], headers=entry["headers"], content=entry["body"].encode("utf-8"),
+                          request=request)
+
+
+class LLMCacheMiss(openai.OpenAIError):
+    """A replayed request that was never recorded. The client raises it as is, without retrying."""
+
+    def __init__(self, key: str, request: httpx.Request):
+        super().__init__(f"No recorded response for {request.method} {request.url.path} (key {key}); "
+                         f"record the run again with LLM_CACHE_MODE=record")
+        self.key = key
+
+
+class _CachingMixin:
+    def _setup(self, transport, cache: LLMCache, mode: str):
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {', '.join(LLM_CACHE_MODES)}")
+        self.transport = transport
+        self.cache = cache
+        self.mode = mode
+
+    def _lookup(self, request: httpx.Request):
+        """(key, response to return without calling the API, or None)."""
+        if self.mode == "passthrough":
+            return None, None
+        key = request_key(request.method, request.url.path, request.content)
+        if self.mode == "replay":
+            entry = self.cache.get(key)
+            if entry is None:
+                raise LLMCacheMiss(key, request)
+            return key, _cached_response(entry, request)
+        return key, None
+
+    def _store(self, key: str, request: httpx.Request, response: httpx.Response):
+        if response.is_success:
+            self.cache.put(key, response)
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+        return httpx.Response(response.status_code, headers=headers, content=response.content, request=request)
+
+
+class CachingTransport(_CachingMixin, httpx.BaseTransport):
+    """httpx transport recording or replaying the responses of `transport`."""
+
+    def __init__(self, transport: httpx.BaseTransport = None, cache: LLMCache = None, mode: str = "record"):
+        self._setup(transport or httpx.HTTPTransport(), cache or LLMCache(), mode)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key, cached = self._lookup(request)
+        if cached is not None:
+            return cached
+        response = self.transport.handle_request(request)
+        if key is None:
+            return response
+        response.read()
+        return self._store(key, request, response)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncCachingTransport(_CachingMixin, httpx.AsyncBaseTransport):
+    """Async counterpart of CachingTransport, for AsyncOpenAI."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport = None, cache: LLMCache = None, mode: str = "record"):
+        self._setup(transport or httpx.AsyncHTTPTransport(), cache or LLMCache(), mode)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key, cached = self._lookup(request)
+        if cached is not None:
+            return cached
+        response = await self.transport.handle_async_request(request)
+        if key is None:
+            return response
+        await response.aread()
+        return self._store(key, request, response)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+@contextmanager
+def install_llm_cache(mode: str = None, cache_dir: str = None):
+    """
+    Route every OpenAI / AsyncOpenAI client created inside the block through the cache
+    (clients given their own http_client are left alone); the clients' constructors are
+    restored when it exits. Mode and directory default to LLM_CACHE_MODE and LLM_CACHE_DIR.
+    Yields the mode in effect.
+    """
+    mode = mode or os.environ.get("LLM_CACHE_MODE", "passthrough")
+    cache = LLMCache(cache_dir or os.environ.get("LLM_CACHE_DIR", DEFAULT_LLM_CACHE_DIR))
+    if mode == "passthrough":
+        yield mode
+        return
+    if mode not in LLM_CACHE_MODES:
+        raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {', '.join(LLM_CACHE_MODES)}")
+
+    def patch(client_class, make_http_client):
+        original = client_class.__init__
+
+        def __init__(self, *args, **kwargs):
+            if kwargs.get("http_client") is None:
+                kwargs["http_client"] = make_http_client()
+            if mode == "replay":
+                # Replays never reach the API, so they don't need a real key, and retrying a miss can't help
+                if kwargs.get("api_key") is None and not os.environ.get("OPENAI_API_KEY"):
+                    kwargs["api_key"] = "llm-cache-replay"
+                kwargs.setdefault("max_retries", 0)
+            original(self, *args, **kwargs)
+
+        client_class.__init__ = __init__
+
+    originals = {client_class: client_class.__init__ for client_class in (openai.OpenAI, openai.AsyncOpenAI)}
+    patch(openai.OpenAI, lambda: openai.DefaultHttpxClient(transport=CachingTransport(cache=cache, mode=mode)))
+    patch(openai.AsyncOpenAI,
+          lambda: openai.DefaultAsyncHttpxClient(transport=AsyncCachingTransport(cache=cache, mode=mode)))
+    logger.info(f"LLM cache: {mode} ({cache.cache_dir})")
+    try:
+        yield mode
+    finally:
+        for client_class, original in originals.items():
+            client_class.__init__ = original
@@ -0,0 +1,383 @@
+"""
+Local, in-process stand-ins for the Modal primitives used by the web endpoint and agent.
+Lets the hot paths run (and be load-tested) on one machine without the cloud.
+
+- LocalVolume: a directory on disk with the modal.Volume methods the app uses (sync and `.aio`)
+- LocalQueue: a queue usable from threads and asyncio, with modal-style `.aio` methods
+- LocalSandbox: runs `exec` calls as local subprocesses with the volume "mounted" at its path
+"""
+
+import asyncio
+import collections
+import functools
+import io
+import os
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from queue import Empty
+
+from modal.volume import FileEntryType
+
+DEFAULT_LOCAL_ROOT = os.environ.get("DATASET_PROCESSOR_LOCAL_ROOT", "outputs/local_volumes")
+
+
+class _aio_method:
+    """Expose a blocking method with an async twin as `.aio`, like Modal's object methods."""
+
+    def __init__(self, async_fn):
+        self.async_fn = async_fn
+        self.sync_fn = None
+
+    def __call__(self, sync_fn):
+        self.sync_fn = sync_fn
+        functools.update_wrapper(self, sync_fn)
+        return self
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        bound = functools.partial(self.sync_fn, obj)
+        bound.aio = functools.partial(self.async_fn, obj)
+        return bound
+
+
+class LocalQueue:
+    """
+    Stand-in for modal.Queue. Blocking `get`/`put` are safe from any thread and `.aio`
+    variants wait on the event loop without occupying a worker thread.
+    """
+
+    def __init__(self):
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._waiters = []  # asyncio futures of pending `get.aio` calls
+
+    def _append(self, vs: list):
+        with self._cond:
+            self._items.extend(vs)
+            self._cond.notify(len(vs))
+            waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+
+    def _pop(self, n_values: int) -> list:
+        values = []
+        while self._items and len(values) < n_values:
+            values.append(self._items.popleft())
+        return values
+
+    def _get_many_blocking(self, n_values: int, block: bool, timeout: float) -> list:
+        with self._cond:
+            if block and not self._cond.wait_for(lambda: self._items, timeout=timeout):
+                raise Empty
+            if not self._items:
+                raise Empty
+            return self._pop(n_values)
+
+    async def _get_many_async(self, n_values: int, block: bool = True, timeout: float = None) -> list:
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._cond:
+                if self._items:
+                    return self._pop(n_values)
+                if not block:
+                    raise Empty
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+            remaining = None if deadline is None else deadline - loop.time()
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                with self._cond:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                raise Empty
+
+    async def _put_async(self, v, block: bool = True, timeout: float = None):
+        self._append([v])
+
+    async def _put_many_async(self, vs: list, block: bool = True, timeout: float = None):
+        self._append(list(vs))
+
+    async def _get_async(self, block: bool = True, timeout: float = None):
+        return (await self._get_many_async(1, block, timeout))[0]
+
+    @_aio_method(_put_async)
+    def put(self, v, block: bool = True, timeout: float = None):
+        self._append([v])
+
+    @_aio_method(_put_many_async)
+    def put_many(self, vs: list, block: bool = True, timeout: float = None):
+        self._append(list(vs))
+
+    @_aio_method(_get_async)
+    def get(self, block: bool = True, timeout: float = None):
+        """Raises queue.Empty on timeout, which is what /stream expects."""
+        return self._get_many_blocking(1, block, timeout)[0]
+
+    @_aio_method(_get_many_async)
+    def get_many(self, n_values: int, block: bool = True, timeout: float = None) -> list:
+        return self._get_many_blocking(n_values, block, timeout)
+
+    def len(self) -> int:
+        return len(self._items)
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+@dataclass
+class LocalFileEntry:
+    path: str
+    type: FileEntryType
+    mtime: float
+    size: int
+
+
+class _LocalBatchUpload:
+    """Collects puts and writes them when the block exits, like Modal's batch commit."""
+
+    def __init__(self, volume: "LocalVolume"):
+        self.volume = volume
+        self._operations = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self._apply()
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, *exc):
+        if exc_type is None:
+            await asyncio.to_thread(self._apply)
+        return False
+
+    def put_file(self, local_file, remote_path: str, mode: int = None):
+        self._operations.append((self._write_file, local_file, self.volume.local_path(remote_path)))
+
+    def put_directory(self, local_path: str, remote_path: str, recursive: bool = True):
+        self._operations.append((self._copy_directory, local_path, self.volume.local_path(remote_path)))
+
+    def _apply(self):
+        for operation, source, target in self._operations:
+            operation(source, target)
+        self._operations.clear()
+
+    @staticmethod
+    def _write_file(local_file, target: Path):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(local_file, (str, os.PathLike)):
+            shutil.copyfile(local_file, target)
+        else:
+            with open(target, "wb") as f:
+                shutil.copyfileobj(local_file, f)
+
+    @staticmethod
+    def _copy_directory(local_path: str, target: Path):
+        shutil.copytree(local_path, target, dirs_exist_ok=True, ignore=shutil.ignore_patterns("__pycache__"))
+
+
+class LocalVolume:
+    """Filesystem-backed stand-in for modal.Volume; each volume is a directory under `root`."""
+
+    def __init__(self, name: str, root: str = DEFAULT_LOCAL_ROOT):
+        self.name = name
+        self.path = Path(root).resolve() / name
+
+    @classmethod
+    def from_name(cls, name: str, create_if_missing: bool = False, root: str = DEFAULT_LOCAL_ROOT) -> "LocalVolume":
+        volume = cls(name, root)
+        if not volume.path.exists():
+            if not create_if_missing:
+                raise FileNotFoundError(f"Volume '{name}' not found in {root}")
+            volume.path.mkdir(parents=True)
+        return volume
+
+    def local_path(self, remote_path: str) -> Path:
+        """Resolve a volume path, refusing paths that escape the volume directory."""
+        target = (self.path / str(remote_path).lstrip("/")).resolve()
+        if target != self.path and self.path not in target.parents:
+            raise ValueError(f"Path '{remote_path}' is outside volume '{self.name}'")
+        return target
+
+    async def _hydrate_async(self) -> "LocalVolume":
+        return self
+
+    def _batch_upload_aio(self, force: bool = False) -> _LocalBatchUpload:
+        return _LocalBatchUpload(self)
+
+    async def _iterdir_async(self, path: str, recursive: bool = True):
+        for entry in await asyncio.to_thread(lambda: list(self.iterdir(path, recursive))):
+            yield entry
+
+    async def _read_file_async(self, path: str, chunk_size: int = 1 << 20):
+        target = self.local_path(path)
+        if not target.is_file():
+            raise FileNotFoundError(f"No such file in volume '{self.name}': {path}")
+        with open(target, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+
+    @_aio_method(_hydrate_async)
+    def hydrate(self) -> "LocalVolume":
+        return self
+
+    @_aio_method(_batch_upload_aio)
+    def batch_upload(self, force: bool = False) -> _LocalBatchUpload:
+        """`with volume.batch_upload()` or `async with volume.batch_upload.aio()`."""
+        return _LocalBatchUpload(self)
+
+    @_aio_method(_iterdir_async)
+    def iterdir(self, path: str, recursive: bool = True):
+        base = self.local_path(path)
+        if not base.exists():
+            raise FileNotFoundError(f"No such directory in volume '{self.name}': {path}")
+        for entry in sorted(base.rglob("*") if recursive else base.iterdir()):
+            stat = entry.stat()
+            yield LocalFileEntry(
+                path=str(entry.relative_to(self.path)),
+                type=FileEntryType.DIRECTORY if entry.is_dir() else FileEntryType.FILE,
+                mtime=stat.st_mtime,
+                size=stat.st_size,
+            )
+
+    @_aio_method(_read_file_async)
+    def read_file(self, path: str, chunk_size: int = 1 << 20):
+        target = self.local_path(path)
+        if not target.is_file():
+            raise FileNotFoundError(f"No such file in volume '{self.name}': {path}")
+        with open(target, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def remove_file(self, path: str, recursive: bool = False):
+        target = self.local_path(path)
+        if not target.exists():
+            raise FileNotFoundError(f"No such file in volume '{self.name}': {path}")
+        if target.is_dir():
+            if not recursive:
+                raise IsADirectoryError(f"'{path}' is a directory; pass recursive=True")
+            shutil.rmtree(target)
+        else:
+            target.unlink()
+
+    def commit(self):
+        pass
+
+    def reload(self):
+        pass
+
+
+class _LocalStream:
+    def __init__(self, data: str):
+        self._buffer = io.StringIO(data)
+
+    def read(self) -> str:
+        return self._buffer.read()
+
+    def __iter__(self):
+        return iter(self._buffer)
+
+
+class LocalProcess:
+    """Result of LocalSandbox.exec, shaped like modal's ContainerProcess."""
+
+    def __init__(self, popen: subprocess.Popen, timeout: float = None):
+        self._popen = popen
+        self._timeout = timeout
+        self._stdout = None
+        self._stderr = None
+
+    def _communicate(self):
+        if self._stdout is None:
+            try:
+                stdout, stderr = self._popen.communicate(timeout=self._timeout)
+            except subprocess.TimeoutExpired:
+                self._popen.kill()
+                stdout, stderr = self._popen.communicate()
+            self._stdout, self._stderr = _LocalStream(stdout), _LocalStream(stderr)
+
+    @property
+    def stdout(self) -> _LocalStream:
+        self._communicate()
+        return self._stdout
+
+    @property
+    def stderr(self) -> _LocalStream:
+        self._communicate()
+        return self._stderr
+
+    def wait(self) -> int:
+        self._communicate()
+        return self._popen.returncode
+
+    def poll(self):
+        return self._popen.poll()
+
+    @property
+    def returncode(self):
+        return self._popen.returncode
+
+
+class LocalSandbox:
+    """
+    Stand-in for modal.Sandbox that runs commands as subprocesses on the host.
+    Mount points (e.g. /workspace) are rewritten to the backing volume directories in the
+    command arguments and working directory, so agent commands written for the Modal
+    sandbox run unchanged. The host environment must provide the sandbox's tools.
+    """
+
+    def __init__(self, volumes: dict, workdir: str = None, timeout: float = None):
+        self.mounts = {mount: str(volume.path) for mount, volume in (volumes or {}).items()}
+        self.workdir = workdir
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self._processes = []
+
+    @classmethod
+    def create(cls, *args, volumes: dict = None, workdir: str = None, timeout: float = None, **kwargs):
+        return cls(volumes, workdir, timeout)
+
+    def _translate(self, value: str) -> str:
+        for mount, local in self.mounts.items():
+            value = value.replace(mount, local)
+        return value
+
+    def exec(self, *cmd: str, workdir: str = None, timeout: float = None, env: dict = None, **kwargs) -> LocalProcess:
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TimeoutError("Sandbox timed out")
+        cwd = workdir or self.workdir
+        popen = subprocess.Popen(
+            [self._translate(arg) for arg in cmd],
+            cwd=self._translate(cwd) if cwd else None,
+            env={**os.environ, **(env or {})},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        self._processes = [p for p in self._processes if p.poll() is None] + [popen]
+        return LocalProcess(popen, timeout)
+
+    def reload_volumes(self):
+        """Local volumes are plain directories, so writes are visible immediately."""
+
+    def terminate(self):
+        for popen in self._processes:
+            if popen.poll() is None:
+                popen.kill()
+        self._processes.clear()
@@ -0,0 +1,171 @@
+"""
+Durable per-session log archive in the session volume.
+
+Log entries posted by the agent are streamed to live viewers through the log queue, where
+they are consumed once. The web app also buffers them per session and writes them in
+batches as immutable zstd-compressed NDJSON segments, each batch listed in a small offset
+index next to it:
+
+    logs/<stream>-000000.ndjson.zst     one JSON entry per line
+    logs/index-<stream>.json            [{file, first_time, last_time, count, bytes}, ...], complete
+
+A stream is one writer's view of a session (one web container), so containers never
+overwrite each other's files. Readers merge every index, order the segments by time and
+only fetch and decompress the segments covering the requested range, so a finished session
+is replayed from a handful of small files instead of the queue.
+"""
+
+import asyncio
+import io
+import json
+import time
+import uuid
+
+import zstandard
+
+LOG_DIR = "logs"
+FLUSH_ENTRIES = 200
+FLUSH_SECONDS = 2.0
+COMPRESSION_LEVEL = 3
+# Entries after which the agent sends nothing more for the session
+TERMINAL_TYPES = {"final_response"}
+
+
+def encode_segment(entries: list[dict]) -> bytes:
+    lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    return zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(lines.encode("utf-8"))
+
+
+def decode_segment(data: bytes) -> list[dict]:
+    text = zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return [json.loads(line) for line in text.splitlines() if line]
+
+
+class _SessionStream:
+    """Buffered entries and the segment index of one session on this writer."""
+
+    def __init__(self, volume_name: str):
+        self.volume_name = volume_name
+        self.stream_id = uuid.uuid4().hex[:12]
+        self.buffer = []
+        self.buffer_since = None
+        self.segments = []
+        self.complete = False
+        self.lock = asyncio.Lock()
+
+
+class LogArchiveWriter:
+    """Buffers log entries per session and flushes them to the session volume in batches."""
+
+    def __init__(self, backend, flush_entries: int = FLUSH_ENTRIES, flush_seconds: float = FLUSH_SECONDS):
+        self.backend = backend
+        self.flush_entries = flush_entries
+        self.flush_seconds = flush_seconds
+        self.streams = {}
+
+    def pending(self, session_id: str) -> list[dict]:
+        """Entries received for a session that are not in the volume yet."""
+        stream = self.streams.get(session_id)
+        return list(stream.buffer) if stream else []
+
+    async def append(self, session_id: str, volume_name: str, entry: dict):
+        stream = self.streams.get(session_id)
+        if stream is None:
+            stream = self.streams[session_id] = _SessionStream(volume_name)
+        if not stream.buffer:
+            stream.buffer_since = time.time()
+        stream.buffer.append(entry)
+        if entry.get("type") in TERMINAL_TYPES:
+            stream.complete = True
+        if stream.complete or len(stream.buffer) >= self.flush_entries or self._is_stale(stream):
+            await self.flush(session_id)
+
+    def _is_stale(self, stream: _SessionStream) -> bool:
+        return bool(stream.buffer) and time.time() - stream.buffer_since >= self.flush_seconds
+
+    async def flush(self, session_id: str):
+        """Write the session's buffered entries as one segment and update its index."""
+        stream = self.streams.get(session_id)
+        if stream is None:
+            return
+        async with stream.lock:
+            entries, first_time, stream.buffer = stream.buffer, stream.buffer_since, []
+            if entries:
+                data = encode_segment(entries)
+                segment = {
+                    "file": f"{LOG_DIR}/{stream.stream_id}-{len(stream.segments):06d}.ndjson.zst",
+                    "first_time": first_time,
+                    "last_time": time.time(),
+                    "count": len(entries),
+                    "bytes": len(data),
+                }
+                index = {"segments": stream.segments + [segment], "complete": stream.complete}
+                try:
+                    volume = self.backend.volume(stream.volume_name)
+                    async with volume.batch_upload.aio(force=True) as batch:
+                        batch.put_file(io.BytesIO(data), segment["file"])
+                        batch.put_file(io.BytesIO(json.dumps(index).encode()), f"{LOG_DIR}/index-{stream.stream_id}.json")
+                except Exception:
+                    # Keep the entries for the next flush rather than losing them
+                    stream.buffer, stream.buffer_since = entries + stream.buffer, first_time
+                    raise
+                stream.segments.append(segment)
+        if stream.complete and not stream.buffer:
+            self.streams.pop(session_id, None)
+
+    async def flush_stale(self):
+        """Flush every session whose oldest buffered entry is older than flush_seconds."""
+        for session_id, stream in list(self.streams.items()):
+            if self._is_stale(stream):
+                await self.flush(session_id)
+
+    async def flush_all(self):
+        for session_id in list(self.streams):
+            await self.flush(session_id)
+
+
+async def read_index(volume) -> dict:
+    """Merged index of every stream: segments in time order with their global entry offsets."""
+    index_files = [entry.path async for entry in volume.iterdir.aio(LOG_DIR, recursive=False)
+                   if entry.path.rsplit("/", 1)[-1].startswith("index-")]
+    indexes = await asyncio.gather(*(_read_json(volume, path) for path in index_files))
+    segments = sorted((segment for index in indexes for segment in index["segments"]),
+                      key=lambda segment: (segment["first_time"], segment["file"]))
+    offset = 0
+    for segment in segments:
+        segment["offset"] = offset
+        offset += segment["count"]
+    return {"segments": segments, "total": offset, "complete": any(index["complete"] for index in indexes)}
+
+
+async def _read_file(volume, path: str) -> bytes:
+    return b"".join([chunk async for chunk in volume.read_file.aio(path)])
+
+
+async def _read_json(volume, path: str) -> dict:
+    return json.loads(await _read_file(volume, path))
+
+
+async def read_logs(volume, offset: int = 0, limit: int = None, tail: int = None, pending: list = ()) -> dict:
+    """
+    Entries [offset, offset + limit) of a session, or its last `tail` entries. `pending`
+    are entries not flushed yet, which follow the archived ones. Only the segments
+    overlapping the range are read.
+    """
+    try:
+        index = await read_index(volume)
+    except FileNotFoundError:
+        index = {"segments": [], "total": 0, "complete": False}
+    archived = index["total"]
+    total = archived + len(pending)
+    start = max(total - tail, 0) if tail is not None else min(max(offset, 0), total)
+    end = total if limit is None else min(start + max(limit, 0), total)
+
+    needed = [s for s in index["segments"] if s["offset"] < end and s["offset"] + s["count"] > start]
+    contents = await asyncio.gather(*(_read_file(volume, segment["file"]) for segment in needed))
+    entries = []
+    for segment, data in zip(needed, contents):
+        lines = decode_segment(data)
+        entries.extend(lines[max(start - segment["offset"], 0):end - segment["offset"]])
+    entries.extend(pending[max(start - archived, 0):max(end - archived, 0)])
+    return {"offset": start, "total": total, "complete": index["complete"], "entries": entries}
@@ -12,6 +12,11 @@ import os
 import time
 import sys
 import shutil
+import json
+
+# Every function's container imports this module, so only modules shipped in all of the
+# images below (IMAGE_SOURCES) are imported at module level; the rest inside the functions
+from execution_backend import CATALOG_MOUNT, ModalBackend, catalog_volume, get_backend
 
 # Configure logging
 logging.basicConfig(
@@ -23,61 +28,100 @@ logger = logging.getLogger(__name__)
 # Modal App
 app = modal_shared_app.app
 
+# Local modules shipped in each function's image
+BASE_SOURCES = ("modal_shared_app", "execution_backend", "local_backend")
+IMAGE_SOURCES = {
+    "function": BASE_SOURCES + ("agent_sandbox", "sandbox_wrappers", "catalog", "result_cache", "distributed_parse",
+                                "llm_cache", "agent_checkpoint"),
+    "parse": BASE_SOURCES + ("distributed_parse",),
+    "export": BASE_SOURCES + ("dataset_export",),
+    "delete": BASE_SOURCES,
+}
+
 # Base image for the remote environment
 function_image = (
     modal.Image.debian_slim()
     .pip_install_from_requirements("agent_sandbox/user_files/requirements.txt")
-    .add_local_python_source("agent_sandbox")
-    .add_local_python_source("modal_shared_app")
+    .add_local_dir("my_files", "/my_files")
+    .add_local_python_source(*IMAGE_SOURCES["function"])
     .add_local_file("agent_sandbox/tools/apply_patch", "/root/apply_patch")
     .add_local_file("agent_sandbox/user_files/requirements.txt", "/root/requirements.txt")
 )
 
-def get_agent_command(workspace: str):
+def get_agent_command(workspace: str, prebuilt: bool = False):
     """Generates the agent command with the dynamic output directory."""
+    if prebuilt:
+        return (
+            f"I've provided you with the raw data files for an experiment in the '{workspace}' directory. "
+            f"The session is large, so '{workspace}/dataset_hf' has already been built from every CHI file "
+            "(one row per file with filename metadata, potential and current). Please load it, check and "
+            "complete its metadata columns using the file names and AGENTS.md, and save it back to "
+            f"'{workspace}/dataset_hf' instead of parsing the files again. "
+            f"All files you generate should be saved in the '{workspace}' directory."
+        )
     return (
         f"I've provided you with the raw data files for an experiment in the '{workspace}' directory. "
         "Please take the dataset and organize it into a huggingface dataset, complete "
         "with metadata columns inferred from the file names. Refer to AGENTS.md for more details. "
         f"All files you generate should be saved in the '{workspace}' directory."
-        f"Save the dataset to disk as '{workspace}/dataset_hf'."
+        f"Save the dataset to disk as '{workspace}/dataset_hf'. "
+        f"If '{workspace}/parsed/records.parquet' exists, the CHI files were already parsed during upload "
+        "(one row per file: source_file, filename metadata, potential, current); use it instead of re-parsing "
+        "(dataset_builder.py does this automatically)."
     )
     
 
-@app.function(image=function_image, timeout=900, secrets=[modal.Secret.from_name("openai-secret")])
-def run_agent_remotely(session_id: str, context: str = "", logger_str: str = "stdout", endpoint_url: str = None):
+@app.function(image=function_image, timeout=900, secrets=[modal.Secret.from_name("openai-secret")],
+              volumes={CATALOG_MOUNT: catalog_volume})
+def run_agent_remotely(session_id: str, context: str = "", logger_str: str = "stdout", endpoint_url: str = None,
+                       manifest_key: str = None, llm_cache_mode: str = None, resume: bool = False):
     """
     Runs the coding agent inside a Modal environment.
     This function creates a session-specific volume, waits for data, and then executes the agent.
+    With `resume`, it continues a session checkpointed by an earlier call that ran out of time.
+    """
+    return run_agent(session_id, context, logger_str, endpoint_url, backend=ModalBackend(),
+                     manifest_key=manifest_key, llm_cache_mode=llm_cache_mode, resume=resume)
+
+
+def run_agent(session_id: str, context: str = "", logger_str: str = "stdout", endpoint_url: str = None,
+              backend=None, reduce_tool_output: bool = True, manifest_key: str = None, llm_cache_mode: str = None,
+              resume: bool = False):
     """
+    Backend-agnostic body of `run_agent_remotely`: waits for the session data in the
+    volume, adds the user context to AGENTS.md and runs the coding agent in a sandbox.
+    With `reduce_tool_output`, agent command outputs go through tool_output_reducer.py.
+    With `manifest_key`, a successful run is recorded in the result cache (see result_cache.py).
+    `llm_cache_mode` (record/replay/passthrough, default $LLM_CACHE_MODE) puts the agent's model
+    calls behind the shared LLM response cache (see llm_cache.py).
+    Progress is checkpointed in the volume (see agent_checkpoint.py). When the time budget runs
+    out, the run stops at a turn boundary and spawns a resumed run; `resume` continues a
+    checkpointed session, skipping the pipeline steps it already completed.
+    """
+    from agent_checkpoint import MAX_RESUMES, AgentCheckpoint, CheckpointDeadline
+    from llm_cache import install_llm_cache
+    from sandbox_wrappers import CheckpointingSandbox, ConcurrentReadSandbox, ReducingSandbox
+
     logger_module = logging.getLogger(__name__)
+    backend = backend or get_backend()
     
     volume_name = f"temp-dataset-processor-agent-volume-{session_id}"
     logger_module.info(f"Using persistent volume: '{volume_name}'")
-    volume = modal.Volume.from_name(volume_name, create_if_missing=False)
+    volume = backend.volume(volume_name, create_if_missing=False)
     
     logger_module.info("Creating sandbox with persistent volume...")
     sb = None
-
-    sandbox_image = (
-        modal.Image.debian_slim()
-        .apt_install("ripgrep", "ed")  # Install ripgrep and ed
-        .pip_install_from_requirements("/root/requirements.txt")
-        .add_local_file("/root/apply_patch", "/usr/local/bin/apply_patch", copy=True)
-        .run_commands("chmod +x /usr/local/bin/apply_patch")
-    )
+    checkpoint = AgentCheckpoint(volume, session_id)
 
     try:
-        sb = modal.Sandbox.create(
-            image=sandbox_image,
-            volumes={"/workspace": volume},
-            workdir="/workspace",
-            timeout=850
-        )
+        sb = backend.create_sandbox(volume, workdir="/workspace", timeout=850)
         logger_module.info("Sandbox created successfully!")
 
+        # /upload may spawn this run before its upload is committed (pipelined mode), so the
+        # sandbox starts while files are still arriving and reloads the volume until they land
         logger_module.info(f"Waiting for session data in volume '{volume_name}'...")
         timeout_seconds = 300
+        poll_seconds = 1
         start_time = time.time()
         is_ready = False
         while not is_ready:
@@ -86,21 +130,31 @@ def run_agent_remotely(session_id: str, context: str = "", logger_str: str = "st
                 logger_module.error(error_msg)
                 raise TimeoutError(error_msg)
             
-            
-            proc = sb.exec("test", "-f", "/workspace/AGENTS.md")
             try:
+                sb.reload_volumes()
+                proc = sb.exec("test", "-f", "/workspace/AGENTS.md")
                 proc.wait()
                 if proc.returncode == 0:
                     is_ready = True
                     logger_module.info(f"Session data found in volume '{volume_name}'.")
                 else:
-                    logger_module.info("Session data not found. Retrying in 5s...")
-                    time.sleep(5)
+                    logger_module.info(f"Session data not found. Retrying in {poll_seconds}s...")
+                    time.sleep(poll_seconds)
             except Exception as e:
                 logger_module.warning(f"Error checking volume, will retry: {e}")
-                time.sleep(5)
+                time.sleep(poll_seconds)
 
-        if context:
+        checkpoint.sandbox = sb
+        checkpoint.load()
+        if resume and not checkpoint.resumed:
+            raise FileNotFoundError(f"No checkpoint to resume in volume '{volume_name}'")
+        if checkpoint.resumed:
+            logger_module.info(f"Resuming session (attempt {checkpoint.state['attempt']}); completed steps: "
+                               f"{', '.join(checkpoint.state['completed_steps']) or 'none'}")
+
+        if checkpoint.is_done("context"):
+            logger_module.info(">>> [1] User context already added")
+        elif context:
             logger_module.info(">>> [1] Adding user context to AGENTS.md...")
             
             script_to_run = f"""
@@ -128,24 +182,82 @@ agents_md_path.write_text(updated_content)
                 logger_module.info("    Continuing without user context...")
         else:
             logger_module.info("No user context provided. Continuing without user context...")
+        checkpoint.complete("context")
+
+        if not checkpoint.is_done("prebuild"):
+            logger_module.info(">>> [2] Checking session size...")
+            checkpoint.state["prebuilt"] = prebuild_large_session(sb, backend, volume_name)
+            checkpoint.complete("prebuild")
+        prebuilt = checkpoint.state.get("prebuilt", False)
 
-        logger_module.info(">>> [2] Running coding agent with sandbox...")
         try:
-            sys.path.append(str(Path("agent_sandbox")))
-            from agent_sandbox.coding_agent import run_coding_agent
-            
-            agent_command = get_agent_command("/workspace")
-            
-            result = run_coding_agent(
-                request=agent_command,
-                container_or_sandbox=sb,
-                logger=logger_str,
-                use_modal=True,
-                endpoint_url=endpoint_url
-            )
-
-            logger_module.info("Agent execution completed successfully.")
+            if checkpoint.is_done("agent"):
+                logger_module.info(">>> [3] Coding agent already finished in an earlier attempt")
+                result = checkpoint.state.get("result")
+            else:
+                logger_module.info(">>> [3] Running coding agent with sandbox...")
+                sys.path.append(str(Path("agent_sandbox")))
+                from agent_sandbox.coding_agent import run_coding_agent
+
+                agent_command = checkpoint.resume_notes() + get_agent_command("/workspace", prebuilt=prebuilt)
+
+                agent_sandbox = ReducingSandbox(sb, workspace="/workspace") if reduce_tool_output else sb
+                with install_llm_cache(llm_cache_mode, backend.llm_cache_dir) as llm_cache_mode:
+                    result = run_coding_agent(
+                        request=agent_command,
+                        container_or_sandbox=CheckpointingSandbox(ConcurrentReadSandbox(agent_sandbox), checkpoint),
+                        logger=logger_str,
+                        use_modal=True,
+                        endpoint_url=endpoint_url
+                    )
+
+                # The agent may have swallowed CheckpointDeadline and stopped early; don't count that as done
+                if checkpoint.interrupted:
+                    raise CheckpointDeadline("Agent stopped at the time budget")
+                logger_module.info("Agent execution completed successfully.")
+                if llm_cache_mode == "record":
+                    backend.commit_catalog()
+                checkpoint.state["result"] = result
+                checkpoint.complete("agent")
+
+            checkpoint.check_deadline()
+            logger_module.info(">>> [4] Running processing stages on dataset_hf...")
+            proc = sb.exec("python", "/workspace/processing.py", "/workspace/dataset_hf")
+            proc.wait()
+            if proc.returncode == 0:
+                logger_module.info("    Added blank-subtracted and baseline-corrected columns")
+            else:
+                logger_module.warning(f"    Processing stages failed: {proc.stderr.read()}")
+            checkpoint.complete("processing")
+
+            checkpoint.check_deadline()
+            logger_module.info(">>> [5] Building waveform preview pyramid...")
+            proc = sb.exec("python", "/workspace/waveform_preview.py", "/workspace/dataset_hf",
+                           "/workspace/dataset_preview")
+            proc.wait()
+            if proc.returncode == 0:
+                logger_module.info("    Preview pyramid written to dataset_preview/")
+            else:
+                logger_module.warning(f"    Could not build preview pyramid: {proc.stderr.read()}")
+            checkpoint.complete("preview")
+
+            checkpoint.check_deadline()
+            logger_module.info(">>> [6] Indexing session in the dataset catalog...")
+            index_session_in_catalog(sb, backend, session_id, volume_name, context)
+            if manifest_key:
+                record_cached_result(sb, backend, manifest_key, session_id, volume_name)
+            # Finished: a later run of this session (without --resume) starts over
+            checkpoint.clear()
             return result
+        except CheckpointDeadline as e:
+            logger_module.info(f"    {e}; checkpoint saved")
+            if checkpoint.state["attempt"] > MAX_RESUMES:
+                raise TimeoutError(f"Session did not finish in {checkpoint.state['attempt']} attempts") from e
+            logger_module.info("    Continuing the session in a new function call...")
+            backend.spawn_agent(session_id=session_id, context=context, logger_str=logger_str,
+                                endpoint_url=endpoint_url, manifest_key=manifest_key,
+                                llm_cache_mode=llm_cache_mode, resume=True)
+            return None
         except ImportError as e:
             logger_module.error(f"Failed to import coding_agent: {e}")
             raise
@@ -164,10 +276,110 @@ agents_md_path.write_text(updated_content)
             except Exception as cleanup_error:
                 logger_module.warning(f"Error during sandbox cleanup: {cleanup_error}")
 
+def prebuild_large_session(sb, backend, volume_name: str) -> bool:
+    """
+    Sessions with thousands of CHI files are parsed across many containers and merged into
+    dataset_hf before the agent starts (see distributed_parse.py). Returns whether it ran.
+    """
+    from distributed_parse import DISTRIBUTED_PARSE_MIN_FILES, distributed_parse, list_chi_files
+
+    logger_module = logging.getLogger(__name__)
+    try:
+        n_files = len(list_chi_files(backend.volume(volume_name)))
+        if n_files < DISTRIBUTED_PARSE_MIN_FILES:
+            logger_module.info(f"    {n_files} CHI files; the agent parses them in the sandbox")
+            return False
+        logger_module.info(f"    {n_files} CHI files; parsing them in parallel into dataset_hf...")
+        rows = distributed_parse(backend, volume_name)
+        sb.reload_volumes()
+        logger_module.info(f"    dataset_hf built with {rows} rows")
+        return True
+    except Exception as e:
+        logger_module.warning(f"    Distributed parse failed, leaving parsing to the agent: {e}")
+        return False
+
+def index_session_in_catalog(sb, backend, session_id: str, volume_name: str, context: str = ""):
+    """Write the session's metadata rows to the catalog. Failures are logged, not raised."""
+    from catalog import write_session_shard
+
+    logger_module = logging.getLogger(__name__)
+    try:
+        proc = sb.exec("python", "/workspace/dataset_builder.py", "--catalog-rows", "/workspace/dataset_hf")
+        rows_json = proc.stdout.read()
+        proc.wait()
+        if proc.returncode != 0:
+            logger_module.warning(f"    Could not read catalog rows: {proc.stderr.read()}")
+            return
+        rows = json.loads(rows_json)
+        write_session_shard(backend.catalog_shard_dir, session_id, volume_name, rows, context)
+        backend.commit_catalog()
+        logger_module.info(f"    Indexed {len(rows)} rows in the dataset catalog")
+    except Exception as e:
+        logger_module.warning(f"    Catalog indexing failed: {e}")
+
+def record_cached_result(sb, backend, manifest_key: str, session_id: str, volume_name: str):
+    """Let identical future uploads reuse this session, if it produced a dataset_hf."""
+    from result_cache import ResultCache
+
+    logger_module = logging.getLogger(__name__)
+    try:
+        proc = sb.exec("test", "-f", "/workspace/dataset_hf/state.json")
+        proc.wait()
+        if proc.returncode != 0:
+            logger_module.info("    No dataset_hf produced; result not cached")
+            return
+        ResultCache(backend.result_cache_dir).put(manifest_key, session_id, volume_name)
+        backend.commit_catalog()
+        logger_module.info("    Result cached for identical uploads")
+    except Exception as e:
+        logger_module.warning(f"    Result caching failed: {e}")
+
+parse_image = (
+    modal.Image.debian_slim()
+    .pip_install("modal", "datasets", "pyarrow", "numpy")
+    .add_local_dir("my_files", "/my_files")
+    .add_local_python_source(*IMAGE_SOURCES["parse"])
+)
+
+@app.function(image=parse_image, timeout=900)
+def parse_shard_remotely(volume_name: str, file_paths: list[str], shard_index: int) -> int:
+    """One shard of the distributed parse stage (fanned out with `.starmap`)."""
+    from distributed_parse import parse_shard
+
+    return parse_shard(ModalBackend(), volume_name, file_paths, shard_index)
+
+@app.function(image=parse_image, timeout=1800, memory=8192)
+def merge_shards_remotely(volume_name: str, n_shards: int, preview: bool = True, process: bool = True) -> int:
+    """Merge the parsed shards of a session into dataset_hf."""
+    from distributed_parse import merge_shards
+
+    return merge_shards(ModalBackend(), volume_name, n_shards, preview=preview, process=process)
+
+export_image = (
+    modal.Image.debian_slim()
+    .pip_install("modal", "datasets", "pyarrow", "numpy")
+    .add_local_dir("my_files", "/my_files")
+    .add_local_python_source(*IMAGE_SOURCES["export"])
+)
+exports_volume = modal.Volume.from_name("dataset-processor-exports", create_if_missing=True)
+
+@app.function(image=export_image, timeout=3600, volumes={"/exports": exports_volume})
+def export_merged_dataset(volume_names: list[str], export_name: str, partition_by: list[str] = None):
+    """
+    Unions many sessions' dataset_hf into one Hive-partitioned Parquet dataset at
+    /exports/<export_name> in the `dataset-processor-exports` volume.
+    """
+    from dataset_export import DEFAULT_PARTITION_BY, export_sessions
+
+    schema = export_sessions(ModalBackend(), volume_names, f"/exports/{export_name}",
+                             partition_by or DEFAULT_PARTITION_BY)
+    exports_volume.commit()
+    return schema.names
+
 delete_image = (
     modal.Image.debian_slim()
     .pip_install("modal")
-    .add_local_python_source("modal_shared_app")
+    .add_local_python_source(*IMAGE_SOURCES["delete"])
 )
 
 @app.function(
@@ -199,16 +411,20 @@ def daily_volume_delete():
             print(f"Skipping volume `{volume['Name']}`")
 
 @app.local_entrypoint()
-def main(session_id: str, context: str = "", logger: str = "stdout", endpoint_url: str = None):
+def main(session_id: str, context: str = "", logger: str = "stdout", endpoint_url: str = None,
+         llm_cache: str = None, resume: bool = False):
     """
     Local entrypoint to run the agent.
     - Triggers the remote Modal function with a session_id.
+    - `--llm-cache record|replay` records or replays the agent's model calls (see llm_cache.py).
+    - `--resume` continues a checkpointed session (see agent_checkpoint.py).
     """
     logger_module = logging.getLogger(__name__)
     logger_module.info(f"Starting Modal agent execution for session_id: {session_id}")
 
     logger_module.info("Calling remote function `run_agent_remotely`...")
-    run_agent_remotely.remote(session_id=session_id, context=context, logger_str=logger, endpoint_url=endpoint_url)
+    run_agent_remotely.remote(session_id=session_id, context=context, logger_str=logger, endpoint_url=endpoint_url,
+                              llm_cache_mode=llm_cache, resume=resume)
 
 if __name__ == "__main__":
     logger.info("Modal agent runner - use `modal run modal_agent.py --session-id <ID>` to execute.") 
\ No newline at end of file
@@ -4,21 +4,41 @@ from datetime import datetime
 import io
 import json
 import asyncio
+import gzip
+import hashlib
+import importlib
 import os
+import sys
 import zipfile
-from sse_starlette.sse import EventSourceResponse
-from starlette.concurrency import run_in_threadpool
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from queue import Empty
 import modal_shared_app
-from modal_agent import run_agent_remotely
+from execution_backend import CATALOG_MOUNT, ModalBackend, catalog_volume
+from result_cache import ResultCache, manifest_hash, pipeline_version
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it the page is served gzip-compressed
+    brotli = None
+
+sys.path.append("/my_files")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "my_files"))
 
 # Create Modal app with FastAPI image
 image = (
     modal.Image.debian_slim()
-    .pip_install("fastapi[standard]", "python-multipart", "openai", "sse-starlette")
+    .pip_install("fastapi[standard]", "python-multipart", "openai", "sse-starlette", "numpy", "pyarrow",
+                 "zstandard", "brotli")
     .add_local_dir("modal_webendpoint/templates", "/templates")
     .add_local_dir("my_files", "/my_files")
-    .add_local_python_source("modal_shared_app", "modal_agent")
+    .add_local_python_source("modal_shared_app", "modal_agent", "execution_backend", "local_backend", "sandbox_wrappers", "catalog",
+                             "result_cache", "log_archive", "dataset_export", "distributed_parse", "llm_cache",
+                             "agent_checkpoint")
 )
 
 app = modal_shared_app.app
@@ -26,52 +46,262 @@ app = modal_shared_app.app
 # Use a Modal Queue for logs, accessible across functions.
 log_queue = modal.Queue.from_name("dataset-processor-log-queue", create_if_missing=True)
 
-@app.function(image=image)
+MODAL_BASE_URL = "https://mariotu4--dataset-processor-agent-fastapi-app.modal.run/"
+PARSE_WORKERS = 4
+DOWNLOAD_CONCURRENCY = 16
+# How often buffered log entries are checked for flushing to the session archive
+LOG_FLUSH_POLL_SECONDS = 1.0
+# Query parameters of /export besides the FILTER_COLUMNS equality filters
+EXPORT_PARAMETERS = ("columns", "format", "concentration_um_min", "concentration_um_max", "date_from", "date_to")
+
+# Imported by the handlers that need them rather than at module import, so `modal deploy`
+# and containers started without a snapshot don't pay for them up front
+LAZY_MODULES = ("fastapi", "sse_starlette.sse", "starlette.concurrency", "numpy", "pyarrow", "pyarrow.parquet",
+                "pyarrow.compute", "dataset_builder", "chi_validator", "waveform_preview", "dataset_export",
+                "catalog", "log_archive", "modal_agent")
+TEMPLATES_DIR = "/templates"
+# Web containers are restored from a memory snapshot taken after preload()
+WEB_MEMORY_SNAPSHOT = os.environ.get("WEB_MEMORY_SNAPSHOT", "1") == "1"
+# Warm containers kept running (0 scales to zero between requests)
+WEB_MIN_CONTAINERS = int(os.environ.get("WEB_MIN_CONTAINERS", "0"))
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    """A page held in memory with its ETag and precompressed variants."""
+    body: bytes
+    etag: str
+    media_type: str
+    encoded: dict
+
+
+@functools.lru_cache(maxsize=None)
+def load_static_asset(path: str, media_type: str = "text/html; charset=utf-8") -> StaticAsset:
+    with open(path, "rb") as f:
+        body = f.read()
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=11)
+    return StaticAsset(body, hashlib.sha256(body).hexdigest()[:16], media_type, encoded)
+
+
+def static_response(asset: StaticAsset, request):
+    """The asset in the best encoding the client accepts, or 304 if its copy is current."""
+    from fastapi import Response
+
+    accepted = {token.split(";")[0].strip() for token in request.headers.get("accept-encoding", "").split(",")}
+    encoding = next((e for e in ("br", "gzip") if e in accepted and e in asset.encoded), None)
+    # Each representation gets its own ETag, as the bytes differ
+    etag = f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(asset.body, media_type=asset.media_type, headers=headers)
+    return Response(asset.encoded[encoding], media_type=asset.media_type,
+                    headers=headers | {"Content-Encoding": encoding})
+
+
+def preload(templates_dir: str = TEMPLATES_DIR):
+    """Import LAZY_MODULES and load the page into memory."""
+    for name in LAZY_MODULES:
+        importlib.import_module(name)
+    load_static_asset(os.path.join(templates_dir, "index.html"))
+
+
+if WEB_MEMORY_SNAPSHOT and not modal.is_local():
+    # Runs before the snapshot is taken, so restored containers start with all of it loaded
+    preload()
+
+
+@app.function(image=image, volumes={CATALOG_MOUNT: catalog_volume}, enable_memory_snapshot=WEB_MEMORY_SNAPSHOT,
+              min_containers=WEB_MIN_CONTAINERS)
 @modal.asgi_app()
 def fastapi_app():
-    from fastapi import FastAPI, File, UploadFile, Form, Request, HTTPException
-    from fastapi.responses import HTMLResponse, StreamingResponse
+    return create_web_app(log_queue)
+
+
+def speculative_parse(filename: str, content: bytes):
+    """Dataset row for an uploaded CHI file, or None for anything that doesn't parse."""
+    if not filename.lower().endswith(".txt"):
+        return None
+    from dataset_builder import build_record_from_text
+
+    try:
+        record = build_record_from_text(filename, content.decode("utf-8", errors="replace"))
+    except Exception as e:
+        print(f"Speculative parse of {filename} failed, leaving it to the agent: {e}")
+        return None
+    return record if record["potential"] else None
+
+
+def create_web_app(log_queue, backend=None, base_url: str = MODAL_BASE_URL,
+                   templates_dir: str = "/templates", my_files_dir: str = "/my_files", pipelined: bool = True):
+    """
+    Build the FastAPI app. `log_queue` is the modal.Queue shared with the agent, or any
+    object with the same put/get interface (e.g. local_backend.LocalQueue for load testing).
+    `backend` provides volumes and agent runs (see execution_backend); defaults to Modal.
+    /upload validates CHI files first and quarantines malformed ones (see chi_validator).
+    With `pipelined`, /upload spawns the agent before uploading and parses CHI files while
+    they are uploaded, storing the rows in parsed/records.parquet for the agent and builder.
+    Logs posted to /log/{session_id} are also archived in the session volume (see log_archive).
+    """
+    backend = backend or ModalBackend()
+    from fastapi import FastAPI, File, UploadFile, Form, Query, Request, HTTPException
+    from fastapi.responses import StreamingResponse
+    from sse_starlette.sse import EventSourceResponse
+    from starlette.concurrency import run_in_threadpool
 
-    web_app = FastAPI()
+    @functools.lru_cache(maxsize=1)
+    def get_log_archive():
+        """The log archive writer, created by the first request that archives or reads logs."""
+        from log_archive import LogArchiveWriter
+
+        return LogArchiveWriter(backend)
+
+    def log_archive_created() -> bool:
+        return get_log_archive.cache_info().currsize > 0
+
+    async def flush_logs_periodically():
+        while True:
+            await asyncio.sleep(LOG_FLUSH_POLL_SECONDS)
+            if not log_archive_created():
+                continue
+            try:
+                await get_log_archive().flush_stale()
+            except Exception as e:
+                print(f"Error archiving logs: {e}")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        flusher = asyncio.create_task(flush_logs_periodically())
+        yield
+        flusher.cancel()
+        if log_archive_created():
+            await get_log_archive().flush_all()
+
+    web_app = FastAPI(lifespan=lifespan)
+    parse_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+
+    index_page = load_static_asset(os.path.join(templates_dir, "index.html"))
 
     @web_app.get("/")
-    async def index():
-        with open("/templates/index.html", "r") as f:
-            html_content = f.read()
-        return HTMLResponse(content=html_content)
+    async def index(request: Request):
+        return static_response(index_page, request)
+
+    result_cache = ResultCache(backend.result_cache_dir)
+
+    @functools.lru_cache(maxsize=1)
+    def current_pipeline_version():
+        return pipeline_version(my_files_dir)
+
+    def find_cached_session(key: str):
+        """The finished session for this manifest, if its dataset_hf still exists."""
+        backend.reload_catalog()
+        cached = result_cache.get(key)
+        if cached is None:
+            return None
+        try:
+            volume = backend.volume(cached["volume_name"])
+            if any(entry.path.endswith("state.json") for entry in volume.iterdir("dataset_hf", recursive=False)):
+                return cached
+        except Exception as e:
+            print(f"Cached session {cached['session_id']} is no longer available: {e}")
+        result_cache.invalidate(key)
+        backend.commit_catalog()
+        return None
 
     @web_app.post("/upload")
     async def upload(
         files: list[UploadFile] = File(...),
-        experiment_context: str = Form("")
+        experiment_context: str = Form(""),
+        force_refresh: bool = Form(False)
     ):
+        contents = [(file.filename, await file.read()) for file in files]
+        key = await run_in_threadpool(
+            lambda: manifest_hash(contents, experiment_context, current_pipeline_version())
+        )
+        if not force_refresh:
+            cached = await run_in_threadpool(find_cached_session, key)
+            if cached:
+                print(f"Identical upload; reusing session {cached['session_id']}")
+                return {
+                    "status": "cached",
+                    "session_id": cached["session_id"],
+                    "volume_name": cached["volume_name"],
+                    "file_count": len(files)
+                }
+
+        from chi_validator import QUARANTINE_DIR, QUARANTINE_REPORT, validate_uploads
+
+        # Malformed or non-CHI files are set aside before any sandbox is spawned
+        reports = await run_in_threadpool(validate_uploads, contents)
+        quarantined = [report.as_dict() for report in reports if not report.ok]
+        if reports and len(quarantined) == len(reports):
+            raise HTTPException(status_code=422, detail={
+                "message": "None of the uploaded .txt files is a valid CHI export", "quarantined": quarantined})
+        quarantined_names = {report["file"] for report in quarantined}
+        rejected = [(filename, content) for filename, content in contents if filename in quarantined_names]
+        contents = [(filename, content) for filename, content in contents if filename not in quarantined_names]
+
         session_id = datetime.now().strftime('%Y%m%d_%H%M%S_') + str(uuid.uuid4())[:8]
         volume_name = f"temp-dataset-processor-agent-volume-{session_id}"
         
         print(f"Uploading {len(files)} files for session {session_id}")
+        if quarantined:
+            print(f"Quarantined {len(quarantined)} files: {', '.join(sorted(quarantined_names))}")
         print(f"Creating volume: {volume_name}")
         
-        volume = modal.Volume.from_name(volume_name, create_if_missing=True)
-        
-        with volume.batch_upload() as batch:
-            for file in files:
-                batch.put_file(io.BytesIO(file.file.read()), file.filename)
-            batch.put_directory("/my_files", "/")
-        
+        volume = backend.volume(volume_name, create_if_missing=True)
+        await volume.hydrate.aio()
+        endpoint_url = f"{base_url.rstrip('/')}/log/{session_id}"
         print(f"Experiment context: {experiment_context}")
 
-        base_url = "https://mariotu4--dataset-processor-agent-fastapi-app.modal.run/"
-        endpoint_url = f"{base_url}/log"
-        print(f"Starting coding agent with endpoint_url: {endpoint_url}")
-
-        # Run the agent in the background
-        run_agent_func = run_agent_remotely
-        run_agent_func.spawn(
-            session_id=session_id,
-            context=experiment_context,
-            logger_str="http",
-            endpoint_url=endpoint_url
-        )
+        async def start_agent():
+            print(f"Starting coding agent with endpoint_url: {endpoint_url}")
+            await backend.spawn_agent.aio(
+                session_id=session_id,
+                context=experiment_context,
+                logger_str="http",
+                endpoint_url=endpoint_url,
+                manifest_key=key
+            )
+
+        async def upload_files():
+            async with volume.batch_upload.aio() as batch:
+                for filename, content in contents:
+                    batch.put_file(io.BytesIO(content), filename)
+                for filename, content in rejected:
+                    batch.put_file(io.BytesIO(content), f"{QUARANTINE_DIR}/{filename}")
+                if quarantined:
+                    batch.put_file(io.BytesIO(json.dumps(quarantined, indent=2).encode()), QUARANTINE_REPORT)
+                # AGENTS.md lands in the same commit as the data, so the agent never sees a partial upload
+                batch.put_directory(my_files_dir, "/")
+
+        if pipelined:
+            # Sandbox startup overlaps the upload; the agent waits until AGENTS.md is committed
+            await start_agent()
+            loop = asyncio.get_running_loop()
+            parses = [loop.run_in_executor(parse_executor, speculative_parse, filename, content)
+                      for filename, content in contents]
+            # The batch is transferred when it closes, so it is committed while the files are
+            # parsed. The parsed rows follow in a second, small commit; files they don't cover
+            # (e.g. if the agent gets there first) are parsed again by the builder.
+            _, parsed = await asyncio.gather(upload_files(), asyncio.gather(*parses))
+            records = [record for record in parsed if record]
+            if records:
+                from dataset_builder import PARSED_RECORDS, write_parsed_records
+
+                buffer = io.BytesIO()
+                await run_in_threadpool(write_parsed_records, records, buffer)
+                buffer.seek(0)
+                async with volume.batch_upload.aio() as batch:
+                    batch.put_file(buffer, PARSED_RECORDS)
+                print(f"Pre-parsed {len(records)}/{len(contents)} files")
+        else:
+            await upload_files()
+            await start_agent()
 
         # The agent now runs in the background. The logs will be sent to /log
         # and streamed to the client via /stream. The upload endpoint can return immediately.
@@ -79,20 +309,44 @@ def fastapi_app():
             "status": "processing_started",
             "session_id": session_id,
             "volume_name": volume_name,
-            "file_count": len(files)
+            "file_count": len(files),
+            "quarantined": quarantined
         }
     
     @web_app.post("/log")
     async def log(log_entry: dict):
         # The agent sends logs here
-        log_queue.put(log_entry)
+        await log_queue.put.aio(log_entry)
         return {"message": "Log received"}
 
+    @web_app.post("/log/{session_id}")
+    async def session_log(session_id: str, log_entry: dict):
+        """Like /log, and the entry is archived in the session volume for later replay."""
+        await log_queue.put.aio(log_entry)
+        try:
+            await get_log_archive().append(session_id, f"temp-dataset-processor-agent-volume-{session_id}", log_entry)
+        except Exception as e:
+            print(f"Error archiving log for session {session_id}: {e}")
+        return {"message": "Log received"}
+
+    @web_app.get("/logs/{session_id}")
+    async def session_logs(session_id: str, offset: int = 0, limit: int = None, tail: int = None):
+        """Archived log entries of a session, e.g. ?tail=50 or ?offset=200&limit=100"""
+        from log_archive import read_logs
+
+        try:
+            volume = backend.volume(f"temp-dataset-processor-agent-volume-{session_id}")
+            logs = await read_logs(volume, offset, limit, tail, pending=get_log_archive().pending(session_id))
+        except (FileNotFoundError, modal.exception.NotFoundError):
+            raise HTTPException(status_code=404, detail=f"No session '{session_id}'")
+        return {"session_id": session_id} | logs
+
     @web_app.get("/stream")
     async def stream(request: Request):
-        def get_log():
+        async def get_log():
+            # Awaiting the queue holds no worker thread, so idle subscribers cost only a coroutine
             try:
-                return log_queue.get(timeout=10)
+                return await log_queue.get.aio(timeout=10)
             except Empty:
                 return {"type": "keepalive"}
             except Exception as e:
@@ -104,46 +358,179 @@ def fastapi_app():
             while True:
                 if await request.is_disconnected():
                     break
-                entry = await run_in_threadpool(get_log)
+                entry = await get_log()
                 yield {"data": json.dumps(entry)}
         return EventSourceResponse(generator())
 
+    @functools.lru_cache(maxsize=64)
+    def load_preview(volume_name: str, level: int = None):
+        """Preview index (level=None) or one pyramid level; cached once the preview exists."""
+        from waveform_preview import PREVIEW_DIR, load_level
+
+        volume = backend.volume(volume_name)
+        if level is None:
+            return json.loads(b"".join(volume.read_file(f"{PREVIEW_DIR}/index.json")))
+        return load_level(b"".join(volume.read_file(f"{PREVIEW_DIR}/level_{level}.npz")))
+
+    @web_app.get("/preview/{volume_name}")
+    async def preview(volume_name: str, points: int = 256, rows: str = None):
+        """Downsampled potential/current traces for a session, e.g. ?points=256&rows=0,1,2"""
+        from waveform_preview import choose_level, level_rows
+
+        try:
+            index = await run_in_threadpool(load_preview, volume_name)
+            level = choose_level(index["levels"], points)
+            data = await run_in_threadpool(load_preview, volume_name, level)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="No preview available for this session yet")
+
+        n_rows = len(index["rows"])
+        try:
+            selected = [int(r) for r in rows.split(",")] if rows else list(range(n_rows))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="rows must be comma-separated integers")
+        if any(not 0 <= r < n_rows for r in selected):
+            raise HTTPException(status_code=400, detail=f"rows must be in [0, {n_rows})")
+
+        traces = level_rows(data, selected)
+        for trace in traces:
+            trace["source_file"] = index["rows"][trace["row"]]["source_file"]
+        return {"level": level, "rows": traces}
+
+    @functools.lru_cache(maxsize=1)
+    def get_catalog():
+        from catalog import DatasetCatalog
+
+        return DatasetCatalog(backend.catalog_db_path)
+
+    catalog_state = {"refreshed_at": 0.0}
+    CATALOG_REFRESH_SECONDS = 5
+
+    def refresh_catalog():
+        """Pick up shards written by sessions that finished since the last refresh."""
+        if time.monotonic() - catalog_state["refreshed_at"] < CATALOG_REFRESH_SECONDS:
+            return
+        backend.reload_catalog()
+        get_catalog().ingest_shards(backend.catalog_shard_dir)
+        catalog_state["refreshed_at"] = time.monotonic()
+
+    @web_app.get("/catalog/query")
+    async def catalog_query(
+        request: Request,
+        concentration_um_min: float = None,
+        concentration_um_max: float = None,
+        date_from: str = None,
+        date_to: str = None,
+        limit: int = Query(100, ge=1, le=1000),
+    ):
+        """
+        Sessions and rows matching metadata filters across all finished sessions, e.g.
+        /catalog/query?molecule=AI1&concentration=1uM&experimenter=EricMM&technique=DPV
+        """
+        from catalog import FILTER_COLUMNS
+
+        filters = {k: v for k, v in request.query_params.items() if k in FILTER_COLUMNS}
+        if "is_blank" in filters:
+            filters["is_blank"] = int(filters["is_blank"].lower() in ("1", "true", "yes"))
+        await run_in_threadpool(refresh_catalog)
+        return await run_in_threadpool(
+            get_catalog().query, filters, concentration_um_min, concentration_um_max, date_from, date_to, limit
+        )
+
+    async def read_files(volume, paths: list[str]) -> list[bytes]:
+        """Fetch files from a volume concurrently without blocking the event loop."""
+        semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+
+        async def read(path: str) -> bytes:
+            async with semaphore:
+                return b"".join([chunk async for chunk in volume.read_file.aio(path)])
+
+        return await asyncio.gather(*(read(path) for path in paths))
+
     @web_app.get("/download/{volume_name}")
     async def download(volume_name: str):
         """Download the dataset_hf directory from a specific volume as a zip file"""
         try:
-            zip_buffer = io.BytesIO()
-            volume = modal.Volume.from_name(volume_name)
-
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-                try:
-                    # Iterate recursively through the dataset_hf directory
-                    for entry in volume.iterdir("dataset_hf", recursive=True):
-                        # Add only files to the zip archive
-                        if entry.type == modal.volume.FileEntryType.FILE:
-                            # entry.path is the full path from the volume root, e.g., "dataset_hf/data/file.txt"
-                            # We want the path inside the zip to be relative to "dataset_hf", e.g., "data/file.txt"
-                            relative_path = os.path.relpath(entry.path, "dataset_hf")
-                            
-                            # Read the file content and write it to the zip file
-                            content = b"".join(volume.read_file(entry.path))
-                            zip_file.writestr(relative_path, content)
-
-                except FileNotFoundError:
-                    raise HTTPException(
-                        status_code=404, detail="dataset_hf directory not found in volume"
-                    )
-
-            zip_buffer.seek(0)
+            try:
+                volume = backend.volume(volume_name)
+                # entry.path is the full path from the volume root, e.g., "dataset_hf/data/file.txt"
+                paths = [entry.path async for entry in volume.iterdir.aio("dataset_hf", recursive=True)
+                         if entry.type == modal.volume.FileEntryType.FILE]
+            except (FileNotFoundError, modal.exception.NotFoundError):
+                raise HTTPException(
+                    status_code=404, detail="dataset_hf directory not found in volume"
+                )
+
+            contents = await read_files(volume, paths)
+
+            def build_zip() -> bytes:
+                zip_buffer = io.BytesIO()
+                with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                    for path, content in zip(paths, contents):
+                        # Paths inside the zip are relative to "dataset_hf", e.g., "data/file.txt"
+                        zip_file.writestr(os.path.relpath(path, "dataset_hf"), content)
+                return zip_buffer.getvalue()
+
+            # Compression is CPU-bound; keep it off the event loop
+            zip_bytes = await run_in_threadpool(build_zip)
             return StreamingResponse(
-                io.BytesIO(zip_buffer.getvalue()),
+                io.BytesIO(zip_bytes),
                 media_type="application/zip",
                 headers={
                     "Content-Disposition": f"attachment; filename=dataset_hf.zip"
                 },
             )
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
 
+    @web_app.get("/export/{volume_name}")
+    async def export(
+        volume_name: str,
+        request: Request,
+        columns: str = None,
+        format: str = "parquet",
+        concentration_um_min: float = None,
+        concentration_um_max: float = None,
+        date_from: str = None,
+        date_to: str = None,
+    ):
+        """
+        A filtered, column-projected subset of a session's dataset_hf as Parquet or CSV, e.g.
+        /export/{volume_name}?concentration=1uM&columns=source_file,concentration,peak_area&format=csv
+        """
+        from catalog import FILTER_COLUMNS
+        from dataset_export import EXPORT_FORMATS, read_arrow_files, select_subset, write_subset
+
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        unknown = sorted(set(request.query_params) - set(FILTER_COLUMNS) - set(EXPORT_PARAMETERS))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown query parameters: {', '.join(unknown)}")
+        filters = {k: v for k, v in request.query_params.items() if k in FILTER_COLUMNS}
+        projection = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+        try:
+            volume = backend.volume(volume_name)
+            state = json.loads((await read_files(volume, ["dataset_hf/state.json"]))[0])
+            contents = await read_files(volume, [f"dataset_hf/{f['filename']}" for f in state["_data_files"]])
+        except (FileNotFoundError, modal.exception.NotFoundError):
+            raise HTTPException(status_code=404, detail="dataset_hf directory not found in volume")
+
+        def build_export() -> bytes:
+            subset = select_subset(read_arrow_files(contents), projection, filters, concentration_um_min,
+                                   concentration_um_max, date_from, date_to)
+            return write_subset(subset, format)
+
+        try:
+            data = await run_in_threadpool(build_export)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return StreamingResponse(
+            io.BytesIO(data),
+            media_type=EXPORT_FORMATS[format],
+            headers={"Content-Disposition": f"attachment; filename=dataset_hf.{format}"},
+        )
+
     return web_app
\ No newline at end of file
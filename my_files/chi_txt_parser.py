@@ -1,65 +1,102 @@
 """
 Parser that takes in CHI .txt files and parses the data into a dict
+
+A CHI export starts with a header: a date line, the technique line (e.g. 'Differential
+Pulse Voltammetry'), 'Key: value' file information and 'Key = value' experiment
+parameters, followed by the data table ('Potential/V, Current/A'). The header is read in
+a single pass that records which lines hold which parameters and where the table starts.
+CHI's own peak results ('Ep = -0.268V') are read with their unit suffix stripped.
 """
 
+import re
+from dataclasses import dataclass
+
 # EVOLVE-BLOCK START
-def parse_chi_txt(file_path: str) -> dict[str, float]:
-    # read the file
-    with open(file_path, "r") as f:
-        lines = f.read().splitlines()
-        
-    # Parse metadata headers
-    metadata_keys = ["Init E (V)", "High E (V)", "Low E (V)", "Init P/N", "Scan Rate (V/s)", 
-                     "Segment", "Sample Interval (V)", "Quiet Time (sec)", "Sensitivity (A/V)"]
-    metadata = {}
+# Technique line -> (abbreviation, expected experiment parameters)
+TECHNIQUE_SCHEMAS = {
+    "Cyclic Voltammetry": ("CV", ["Init E (V)", "High E (V)", "Low E (V)", "Init P/N", "Scan Rate (V/s)",
+                                  "Segment", "Sample Interval (V)", "Quiet Time (sec)", "Sensitivity (A/V)"]),
+    "Linear Sweep Voltammetry": ("LSV", ["Init E (V)", "Final E (V)", "Scan Rate (V/s)", "Sample Interval (V)",
+                                         "Quiet Time (sec)", "Sensitivity (A/V)"]),
+    "Differential Pulse Voltammetry": ("DPV", ["Init E (V)", "Final E (V)", "Incr E (V)", "Amplitude (V)",
+                                              "Pulse Width (sec)", "Sample Width (sec)", "Pulse Period (sec)",
+                                              "Quiet Time (sec)", "Sensitivity (A/V)"]),
+    "Square Wave Voltammetry": ("SWV", ["Init E (V)", "Final E (V)", "Incr E (V)", "Amplitude (V)",
+                                        "Frequency (Hz)", "Quiet Time (sec)", "Sensitivity (A/V)"]),
+    "Amperometric i-t Curve": ("IT", ["Init E (V)", "Sample Interval (s)", "Run Time (sec)", "Quiet Time (sec)",
+                                      "Sensitivity (A/V)"]),
+}
+DATA_HEADER_PREFIXES = ("Potential/V", "Time/sec")
+TECHNIQUE_LINE = 1
+UNIT_SUFFIX = re.compile(r"^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)[A-Za-z]+$")
+
+
+@dataclass(frozen=True)
+class HeaderSchema:
+    """Where a technique's header keeps its parameters and where its data table starts."""
+    technique: str
+    parameter_lines: tuple[tuple[int, str], ...]
+    data_start_idx: int
+
+    @property
+    def abbreviation(self) -> str:
+        return TECHNIQUE_SCHEMAS.get(self.technique, (None, []))[0]
+
+    @property
+    def missing_parameters(self) -> list[str]:
+        """Parameters the technique is expected to have but this header lacks."""
+        found = {key for _, key in self.parameter_lines}
+        return [key for key in TECHNIQUE_SCHEMAS.get(self.technique, (None, []))[1] if key not in found]
+
+
+def _convert(value: str):
+    """Float (unit suffix stripped), int for integral values, or the string itself."""
+    match = UNIT_SUFFIX.match(value)
+    try:
+        converted = float(match.group(1) if match else value)
+    except ValueError:
+        return value
+    return int(converted) if converted.is_integer() else converted
+
+
+def discover_header_schema(lines: list[str]) -> HeaderSchema:
+    """Single pass over the header, recording every 'Key = value' line up to the data table."""
+    technique = lines[TECHNIQUE_LINE].strip() if len(lines) > TECHNIQUE_LINE else ""
+    parameter_lines = []
     data_start_idx = 0
     for i, line in enumerate(lines):
-        # Check for header lines with '=' or ':'
-        if '=' in line:
-            for key in metadata_keys:
-                if line.startswith(key):
-                    # Parse key-value
-                    parts = line.split('=')
-                    if len(parts) == 2:
-                        key_name = parts[0].strip()
-                        val = parts[1].strip()
-                        # Convert to float or int where possible
-                        try:
-                            val_converted = float(val)
-                            if val_converted.is_integer():
-                                val_converted = int(val_converted)
-                            metadata[key_name] = val_converted
-                        except:
-                            metadata[key_name] = val
-        elif line.strip().startswith("Potential/V") or line.strip().startswith("Potential/V,"):
-            # Found the header of data table
+        if line.lstrip().startswith(DATA_HEADER_PREFIXES):
             data_start_idx = i
             break
+        key, sep, _ = line.partition("=")
+        if sep:
+            parameter_lines.append((i, key.strip()))
+    return HeaderSchema(technique, tuple(parameter_lines), data_start_idx)
+
+
+def parse_chi_txt(file_path: str) -> dict[str, float]:
+    # read the file
+    with open(file_path, "r") as f:
+        return parse_chi_lines(f.read().splitlines())
+
+
+def parse_chi_lines(lines: list[str]) -> dict[str, float]:
+    """Parse the lines of a CHI export (e.g. an upload still in memory)."""
+    # Parse the experiment parameters at the positions given by the technique's header schema
+    schema = discover_header_schema(lines)
+    metadata = {}
+    for i, key in schema.parameter_lines:
+        metadata[key] = _convert(lines[i].partition("=")[2].strip())
+
     # Determine delimiter based on header line
+    data_start_idx = schema.data_start_idx
     header_line = lines[data_start_idx]
     delimiter = "," if "," in header_line else "\t"
     column_names = [name.strip() for name in header_line.split(delimiter)]
-    
-    # Check for multi-channel data by presence of multiple potential columns
-    # and handle accordingly.
+
     # Collect data rows
     data_rows = lines[data_start_idx+1:]
-    
-    # Initialize dictionary for data
-    data_dict = {}
-    
-    # Identify all potential columns (assumed to end with /V or /A or similar)
-    channel_columns = []
-    for col in column_names:
-        # Handle potential multiple channels: e.g., i1/A, i2/A, etc.
-        if col.startswith("Potential") or col.startswith("Potential/V"):
-            data_dict[col] = []
-            potential_col = col
-        elif col.startswith("i") or col.startswith("C") or col.startswith("Time"):
-            data_dict[col] = []
-            channel_columns.append(col)
-        else:
-            data_dict[col] = []
+    data_dict = {col: [] for col in column_names}
     # Parse each data row
     for row in data_rows:
         if not row.strip():
@@ -70,8 +107,8 @@ def parse_chi_txt(file_path: str) -> dict[str, float]:
         for col, val in zip(column_names, parts):
             try:
                 value = float(val)
-            except:
+            except ValueError:
                 value = val
             data_dict[col].append(value)
     return metadata | data_dict
-# EVOLVE-BLOCK END
\ No newline at end of file
+# EVOLVE-BLOCK END
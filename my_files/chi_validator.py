@@ -0,0 +1,177 @@
+"""
+Pre-flight validation of uploaded CHI .txt exports.
+
+parse_chi_lines is lenient: it skips rows with the wrong number of fields, and without a
+data table header it reads the file from the top. Truncated or non-CHI uploads therefore
+only show up once the agent has worked on them. validate_chi_lines checks a file in one
+streaming pass instead, stopping early when the header is wrong:
+
+    header signature   a date line followed by the technique line
+    technique          one of chi_txt_parser.TECHNIQUE_SCHEMAS (otherwise only a warning)
+    data table         a 'Potential/V, ...' or 'Time/sec, ...' header with at least two columns
+    rows               every row has the header's column count and numeric values, there are
+                       at least MIN_DATA_ROWS, and a sweep has as many points as its
+                       parameters give (a truncated export falls short)
+
+/upload stores files with errors under quarantine/ with a report.json, away from the
+session's data, before any sandbox is spawned.
+
+    python chi_validator.py DIR
+"""
+
+import io
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Iterable
+
+from chi_txt_parser import DATA_HEADER_PREFIXES, TECHNIQUE_LINE, TECHNIQUE_SCHEMAS, _convert
+
+QUARANTINE_DIR = "quarantine"
+QUARANTINE_REPORT = f"{QUARANTINE_DIR}/report.json"
+MIN_DATA_ROWS = 2
+# CHI headers are a few dozen lines; give up on files without a data table well before their end
+MAX_HEADER_LINES = 200
+# Offending line numbers listed per problem in a report
+MAX_REPORTED_LINES = 5
+DATE_LINE = re.compile(r"^[A-Za-z]{3,}\.? +\d{1,2}, +\d{4} +\d{1,2}:\d{2}:\d{2}$")
+# (start, end, step) parameters giving a sweep's number of points, first match wins
+SWEEP_PARAMETERS = [("Init E (V)", "Final E (V)", "Incr E (V)"),
+                    ("Init E (V)", "Final E (V)", "Sample Interval (V)")]
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of validating one file; errors quarantine it, warnings don't."""
+    file: str
+    technique: str = None
+    rows: int = 0
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def as_dict(self) -> dict:
+        return asdict(self) | {"ok": self.ok}
+
+
+def is_chi_candidate(file_name: str) -> bool:
+    """Uploads that are validated (CHI exports are .txt; anything else is passed through)."""
+    return file_name.lower().endswith(".txt")
+
+
+def expected_rows(parameters: dict):
+    """Number of points of a sweep from its experiment parameters, or None if they don't say."""
+    for keys in SWEEP_PARAMETERS:
+        start, end, step = (parameters.get(key) for key in keys)
+        if all(isinstance(value, (int, float)) for value in (start, end, step)) and step:
+            return round(abs(end - start) / abs(step))
+    return None
+
+
+def _lines_summary(line_numbers: list[int]) -> str:
+    shown = ", ".join(map(str, line_numbers[:MAX_REPORTED_LINES]))
+    return shown + (", ..." if len(line_numbers) > MAX_REPORTED_LINES else "")
+
+
+def _has_signature(header: list[str]) -> bool:
+    return (len(header) > TECHNIQUE_LINE and bool(DATE_LINE.match(header[0].strip()))
+            and bool(header[TECHNIQUE_LINE].strip()))
+
+
+def validate_chi_lines(file_name: str, lines: Iterable[str]) -> ValidationReport:
+    """Validate a CHI export line by line (see module docstring)."""
+    report = ValidationReport(file_name)
+    lines = iter(lines)
+    header, table_header = [], None
+    for line in lines:
+        if line.lstrip().startswith(DATA_HEADER_PREFIXES):
+            table_header = line
+            break
+        header.append(line)
+        # Stop reading as soon as the first lines rule out a CHI export
+        if (len(header) == TECHNIQUE_LINE + 1 and not _has_signature(header)) or len(header) > MAX_HEADER_LINES:
+            break
+    if not _has_signature(header):
+        report.errors.append("Not a CHI export: expected a date line followed by the technique line")
+        return report
+    if table_header is None:
+        report.errors.append(f"No data table header ({' or '.join(DATA_HEADER_PREFIXES)}) after the CHI header")
+        return report
+
+    report.technique = header[TECHNIQUE_LINE].strip()
+    parameters = {}
+    for header_line in header:
+        key, sep, value = header_line.partition("=")
+        if sep:
+            parameters[key.strip()] = _convert(value.strip())
+    if report.technique not in TECHNIQUE_SCHEMAS:
+        report.warnings.append(f"Unknown technique '{report.technique}'")
+    else:
+        missing = [key for key in TECHNIQUE_SCHEMAS[report.technique][1] if key not in parameters]
+        if missing:
+            report.warnings.append(f"Missing parameters: {', '.join(missing)}")
+
+    # Same delimiter rule as parse_chi_lines
+    delimiter = "," if "," in table_header else "\t"
+    n_columns = len(table_header.split(delimiter))
+    if n_columns < 2:
+        report.errors.append(f"Data table header '{table_header.strip()}' has fewer than two columns")
+        return report
+
+    malformed, non_numeric = [], []
+    for line_number, row in enumerate(lines, start=len(header) + 2):
+        if not row.strip():
+            continue
+        parts = row.split(delimiter)
+        if len(parts) != n_columns:
+            malformed.append(line_number)
+            continue
+        try:
+            for part in parts:
+                float(part)
+        except ValueError:
+            non_numeric.append(line_number)
+            continue
+        report.rows += 1
+
+    if malformed:
+        report.errors.append(f"{len(malformed)} rows without {n_columns} fields (lines {_lines_summary(malformed)})")
+    if non_numeric:
+        report.errors.append(f"{len(non_numeric)} rows with non-numeric values (lines {_lines_summary(non_numeric)})")
+    if report.rows < MIN_DATA_ROWS:
+        report.errors.append(f"{report.rows} data rows, expected at least {MIN_DATA_ROWS}")
+    expected = expected_rows(parameters)
+    if expected is not None and report.rows >= MIN_DATA_ROWS and abs(report.rows - expected) > 1:
+        report.errors.append(f"{report.rows} data rows, but the sweep parameters give {expected} (truncated export?)")
+    return report
+
+
+def validate_chi_bytes(file_name: str, content: bytes) -> ValidationReport:
+    """Validate an upload still in memory."""
+    if b"\x00" in content:
+        report = ValidationReport(file_name)
+        report.errors.append("Binary content, not a text export")
+        return report
+    text = io.StringIO(content.decode("utf-8", errors="replace"))
+    return validate_chi_lines(file_name, (line.rstrip("\r\n") for line in text))
+
+
+def validate_uploads(contents: list[tuple[str, bytes]]) -> list[ValidationReport]:
+    """Reports for the CHI candidates among (file name, content) uploads."""
+    return [validate_chi_bytes(name, content) for name, content in contents if is_chi_candidate(name)]
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Validate the CHI .txt files below a directory")
+    parser.add_argument("input_dir")
+    args = parser.parse_args()
+
+    reports = [validate_chi_bytes(str(path), path.read_bytes()) for path in sorted(Path(args.input_dir).rglob("*.txt"))]
+    print(json.dumps([report.as_dict() for report in reports if not report.ok or report.warnings], indent=2))
+    print(f"{sum(not report.ok for report in reports)} of {len(reports)} files would be quarantined")
@@ -0,0 +1,193 @@
+"""
+Deterministic builder that turns a directory of CHI .txt files into a huggingface dataset.
+Metadata columns are inferred from the file names, following the naming convention
+described in the README, e.g. 250616_Pprot382int_2007B_1uM_AI1_S10_EricMM_GCE_DPV.txt
+"""
+
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+from chi_txt_parser import parse_chi_lines, parse_chi_txt
+from chi_validator import QUARANTINE_DIR
+from waveform_encoding import ENCODINGS, encode_records
+
+FILENAME_PATTERN = re.compile(
+    r"^(?P<date>\d{6})_"
+    r"(?:(?P<blank>BLANK)|(?P<construct>.+?)_(?P<concentration>\d+(?:\.\d+)?[pnum]?M)_(?P<molecule>[^_]+)_(?P<sample>S\d+))_"
+    r"(?P<experimenter>[^_]+)_(?P<electrode>[^_]+)_(?P<technique>[^_]+)$"
+)
+
+METADATA_COLUMNS = ["date", "construct", "concentration", "concentration_um", "molecule",
+                    "sample", "experimenter", "electrode", "technique", "is_blank"]
+
+UNIT_TO_UM = {"pM": 1e-6, "nM": 1e-3, "uM": 1.0, "mM": 1e3, "M": 1e6}
+
+# Rows parsed by /upload while the files were being uploaded, relative to the session root
+PARSED_RECORDS = "parsed/records.parquet"
+# Session directories holding no CHI exports to parse: our own outputs, earlier parse results,
+# stored tool outputs and files quarantined at upload
+SKIP_DIRS = frozenset({"dataset_hf", "dataset_preview", "parsed", ".tool_outputs", QUARANTINE_DIR})
+# Storage encoding of the waveform columns in dataset_hf (see waveform_encoding)
+DEFAULT_ENCODING = os.environ.get("DATASET_ENCODING", "full")
+
+
+def extract_filename_metadata(file_name: str) -> dict:
+    """Infer metadata columns from a CHI file name. Unknown layouts yield all-None columns."""
+    stem = Path(file_name).stem
+    metadata = {column: None for column in METADATA_COLUMNS}
+    metadata["is_blank"] = False
+    match = FILENAME_PATTERN.match(stem)
+    if not match:
+        return metadata
+
+    fields = match.groupdict()
+    metadata["date"] = datetime.strptime(fields["date"], "%y%m%d").date().isoformat()
+    for key in ["construct", "molecule", "sample", "experimenter", "electrode", "technique"]:
+        metadata[key] = fields[key]
+    if fields["blank"]:
+        metadata["is_blank"] = True
+    else:
+        concentration = fields["concentration"]
+        unit = re.search(r"[pnum]?M$", concentration).group(0)
+        metadata["concentration"] = concentration
+        metadata["concentration_um"] = float(concentration[:-len(unit)]) * UNIT_TO_UM[unit]
+    return metadata
+
+
+def find_chi_files(input_dir: str) -> list[Path]:
+    """All CHI .txt files below input_dir, in a stable order (files under SKIP_DIRS excluded)."""
+    return sorted(path for path in Path(input_dir).rglob("*.txt")
+                  if not SKIP_DIRS.intersection(path.relative_to(input_dir).parts[:-1]))
+
+
+def record_from_parsed(file_name: str, parsed: dict) -> dict:
+    """Dataset row (filename metadata + waveform columns) from parse_chi_txt output."""
+    record = {"source_file": file_name}
+    record |= extract_filename_metadata(file_name)
+    record["potential"] = parsed.get("Potential/V", [])
+    record["current"] = parsed.get("Current/A", [])
+    return record
+
+
+def build_record(file_path: Path) -> dict:
+    """Parse one CHI file into a dataset row."""
+    return record_from_parsed(file_path.name, parse_chi_txt(str(file_path)))
+
+
+def build_record_from_text(file_name: str, text: str) -> dict:
+    """Parse CHI file contents that are not on disk yet (e.g. during upload)."""
+    return record_from_parsed(Path(file_name).name, parse_chi_lines(text.splitlines()))
+
+
+def build_records(file_paths: list[Path], parsed_records: dict = None) -> list[dict]:
+    """Rows for every file, reusing `parsed_records` ({source_file: row}) where available."""
+    parsed_records = parsed_records or {}
+    return [parsed_records.get(Path(file_path).name) or build_record(Path(file_path)) for file_path in file_paths]
+
+
+def write_parsed_records(records: list[dict], destination):
+    """Store pre-parsed rows as one columnar Parquet file (path or binary file object)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pq.write_table(pa.Table.from_pylist(records), destination)
+
+
+def load_parsed_records(path) -> dict:
+    """{source_file: row} from a file written by write_parsed_records, or {} if there is none."""
+    if not Path(path).exists():
+        return {}
+    import pyarrow.parquet as pq
+
+    return {record["source_file"]: record for record in pq.read_table(path).to_pylist()}
+
+
+def build_dataset(records: list[dict]):
+    """Create a huggingface Dataset from parsed records."""
+    from datasets import Dataset
+
+    return Dataset.from_list(records)
+
+
+def save_dataset(records: list[dict], output_dir: str, preview: bool = True, process: bool = True,
+                 encoding: str = DEFAULT_ENCODING):
+    """
+    Save parsed records to output_dir (e.g. 'dataset_hf'). With `process`, the processing
+    stages (blank subtraction, baseline correction, peak features) add their columns; with
+    `preview`, the downsampled preview pyramid is written next to it. `encoding` selects how
+    the waveform columns are stored ('full', 'compact' or 'lossless', see waveform_encoding).
+    """
+    if process:
+        from processing import process_records
+
+        process_records(records)
+    dataset = build_dataset(encode_records(records, encoding))
+    dataset.save_to_disk(output_dir)
+    if preview:
+        from waveform_preview import PREVIEW_DIR, write_preview_pyramid
+
+        write_preview_pyramid(records, str(Path(output_dir).parent / PREVIEW_DIR))
+    return dataset
+
+
+def build_dataset_from_dir(input_dir: str, output_dir: str, preview: bool = True, process: bool = True,
+                           encoding: str = DEFAULT_ENCODING):
+    """
+    Parse every CHI file in input_dir and save the result to output_dir (see save_dataset).
+    Files already parsed during upload (input_dir/parsed/records.parquet) are not parsed again.
+    """
+    parsed_records = load_parsed_records(Path(input_dir) / PARSED_RECORDS)
+    records = build_records(find_chi_files(input_dir), parsed_records)
+    return save_dataset(records, output_dir, preview, process, encoding)
+
+
+FILE_NAME_COLUMNS = ["source_file", "file_name", "filename", "file", "path"]
+
+
+def catalog_rows(dataset_dir: str) -> list[dict]:
+    """
+    Metadata rows for the session catalog from a saved dataset (ours or the agent's).
+    Columns the dataset already has are used as-is; the rest are inferred from the
+    file name column when there is one.
+    """
+    from datasets import load_from_disk
+
+    dataset = load_from_disk(dataset_dir)
+    name_column = next((c for c in FILE_NAME_COLUMNS if c in dataset.column_names), None)
+    wanted = [c for c in METADATA_COLUMNS if c in dataset.column_names]
+    columns = dataset.select_columns(wanted + ([name_column] if name_column else [])).to_dict()
+
+    rows = []
+    for i in range(len(dataset)):
+        row = {"source_file": None}
+        if name_column:
+            file_name = str(columns[name_column][i])
+            row["source_file"] = Path(file_name).name
+            row |= extract_filename_metadata(file_name)
+        for column in wanted:
+            if columns[column][i] is not None:
+                row[column] = columns[column][i]
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Build a huggingface dataset from CHI .txt files")
+    parser.add_argument("input_dir", nargs="?", help="Directory containing the CHI .txt files")
+    parser.add_argument("output_dir", nargs="?", default="dataset_hf")
+    parser.add_argument("--encoding", choices=ENCODINGS, default=DEFAULT_ENCODING,
+                        help="Storage of the waveform columns: full float64 lists, or an implicit uniform "
+                             "potential axis with float32 (compact) or compressed float64 (lossless) traces")
+    parser.add_argument("--catalog-rows", metavar="DATASET_DIR",
+                        help="Print catalog metadata rows of a saved dataset as JSON instead of building")
+    args = parser.parse_args()
+
+    if args.catalog_rows:
+        print(json.dumps(catalog_rows(args.catalog_rows)))
+    else:
+        build_dataset_from_dir(args.input_dir, args.output_dir, encoding=args.encoding)
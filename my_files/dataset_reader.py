@@ -0,0 +1,183 @@
+"""
+Memory-mapped, zero-copy reader for a saved dataset_hf.
+
+The Arrow files listed in dataset_hf/state.json are memory-mapped and never copied into
+Python lists: waveform columns come back as NumPy views into the mapped pages, so opening
+a multi-GB dataset is instant and memory stays flat until rows are actually touched.
+
+    reader = DatasetReader("dataset_hf")
+    reader.current(3)                   # 1-D float64 view of row 3
+    reader.stacked_chunks("current")    # (rows, points) views per record batch, fixed-length traces
+    reader.column("concentration_um")   # scalar column as a NumPy array
+
+Datasets saved with a compact encoding (see waveform_encoding) are decoded lazily, one row
+at a time: an implicit potential axis is rebuilt from potential_start/step/count and packed
+traces are decompressed on access, while float32 traces are still zero-copy views.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from waveform_encoding import AXIS_COLUMN, PACKED_SUFFIX, axis_columns, axis_values, unpack_trace
+
+
+def _open_arrow_file(path: Path) -> pa.Table:
+    """Memory-map one Arrow file written by `save_to_disk` (IPC stream, or file format)."""
+    source = pa.memory_map(str(path), "r")
+    try:
+        return pa.ipc.open_stream(source).read_all()
+    except pa.ArrowInvalid:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _values_view(values: pa.Array) -> np.ndarray:
+    """Zero-copy NumPy view of a primitive Arrow array (copied only if it has nulls)."""
+    try:
+        return values.to_numpy(zero_copy_only=True)
+    except pa.ArrowInvalid:
+        return values.to_numpy(zero_copy_only=False)
+
+
+class DatasetReader:
+    """Read-only access to a dataset_hf directory without materializing it."""
+
+    def __init__(self, dataset_dir: str):
+        self.dataset_dir = Path(dataset_dir)
+        state = json.loads((self.dataset_dir / "state.json").read_text())
+        tables = [_open_arrow_file(self.dataset_dir / data_file["filename"]) for data_file in state["_data_files"]]
+        self.table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+        # Every column is chunked the same way (one chunk per record batch), so row -> chunk is shared
+        first_column = self.table.column(0).chunks if self.table.num_columns else []
+        self._chunk_starts = np.cumsum([0] + [len(chunk) for chunk in first_column])
+        self._list_cache = {}
+        self._axis = None
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def column_names(self) -> list[str]:
+        return self.table.column_names
+
+    def has_trace(self, name: str) -> bool:
+        """Whether the dataset has a trace column, stored as a list or encoded."""
+        return name in self.column_names or self._is_encoded(name)
+
+    def _list_chunks(self, name: str) -> list[tuple[np.ndarray, np.ndarray]]:
+        """(offsets, values) views for every chunk of a list column."""
+        if name not in self._list_cache:
+            column = self.table[name]
+            if not (pa.types.is_list(column.type) or pa.types.is_large_list(column.type)):
+                raise TypeError(f"Column '{name}' is not a list column ({column.type})")
+            self._list_cache[name] = [
+                (chunk.offsets.to_numpy(), _values_view(chunk.values)) for chunk in column.chunks
+            ]
+        return self._list_cache[name]
+
+    def _locate(self, row: int) -> tuple[int, int]:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"Row {row} out of range for {len(self)} rows")
+        chunk = int(np.searchsorted(self._chunk_starts, row, side="right")) - 1
+        return chunk, row - int(self._chunk_starts[chunk])
+
+    def _is_encoded(self, name: str) -> bool:
+        """Whether a trace column is (partly) stored implicitly or packed rather than as a list."""
+        return name + PACKED_SUFFIX in self.column_names or (
+            name == AXIS_COLUMN and axis_columns()[1] in self.column_names)
+
+    def _implicit_axis(self, row: int):
+        """(start, step, count) of a row stored with an implicit potential axis, else None."""
+        if self._axis is None:
+            self._axis = [self.column(column).astype(np.float64) for column in axis_columns()]
+        start, step, count = (values[row] for values in self._axis)
+        return None if np.isnan(step) else (start, step, int(count))
+
+    def trace(self, row: int, name: str = "current") -> np.ndarray:
+        """One row of a list column as a zero-copy 1-D view (decoded if the column is encoded)."""
+        chunk, local = self._locate(row)
+        if name + PACKED_SUFFIX in self.column_names:
+            packed = self.table[name + PACKED_SUFFIX][int(self._chunk_starts[chunk]) + local].as_py()
+            return None if packed is None else unpack_trace(packed)
+        if self._is_encoded(name):
+            axis = self._implicit_axis(int(self._chunk_starts[chunk]) + local)
+            if axis:
+                return axis_values(*axis)
+        offsets, values = self._list_chunks(name)[chunk]
+        return values[offsets[local]:offsets[local + 1]]
+
+    def potential(self, row: int) -> np.ndarray:
+        return self.trace(row, "potential")
+
+    def current(self, row: int) -> np.ndarray:
+        return self.trace(row, "current")
+
+    def traces(self, name: str = "current"):
+        """Iterate over every row of a list column as views."""
+        if self._is_encoded(name):
+            yield from (self.trace(row, name) for row in range(len(self)))
+            return
+        for offsets, values in self._list_chunks(name):
+            for start, end in zip(offsets[:-1], offsets[1:]):
+                yield values[start:end]
+
+    def lengths(self, name: str = "current") -> np.ndarray:
+        if self._is_encoded(name):
+            return np.array([0 if trace is None else len(trace) for trace in self.traces(name)], dtype=np.int64)
+        return np.concatenate([np.diff(offsets) for offsets, _ in self._list_chunks(name)] or [np.empty(0, np.int64)])
+
+    def stacked_chunks(self, name: str = "current"):
+        """
+        Zero-copy (rows_in_batch, points) views, one per Arrow record batch, for a list column
+        whose traces all have the same length.
+        """
+        lengths = self.lengths(name)
+        if len(lengths) and np.any(lengths != lengths[0]):
+            raise ValueError(f"Column '{name}' has traces of different lengths; use trace() or traces()")
+        n_points = int(lengths[0]) if len(lengths) else 0
+        if self._is_encoded(name):
+            # Encoded columns are decoded per record batch, so these are copies rather than views
+            for start, end in zip(self._chunk_starts[:-1], self._chunk_starts[1:]):
+                if end > start:
+                    yield np.stack([self.trace(row, name) for row in range(start, end)])
+            return
+        for offsets, values in self._list_chunks(name):
+            yield values[offsets[0]:offsets[-1]].reshape(len(offsets) - 1, n_points)
+
+    def stacked(self, name: str = "current") -> np.ndarray:
+        """
+        (rows, points) array of a fixed-length list column. A view when the data is a single
+        record batch; otherwise the per-batch views are concatenated (use stacked_chunks()
+        to stay zero-copy on large datasets).
+        """
+        views = list(self.stacked_chunks(name))
+        if not views:
+            return np.empty((0, 0))
+        return views[0] if len(views) == 1 else np.concatenate(views)
+
+    def column(self, name: str) -> np.ndarray:
+        """A scalar column as a NumPy array (zero-copy for numeric columns without nulls)."""
+        column = self.table[name]
+        chunks = [_values_view(chunk) for chunk in column.chunks]
+        if not chunks:
+            return np.empty(0)
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    def row(self, row: int) -> dict:
+        """One row: scalar columns as Python values, list columns as views, encoded traces decoded."""
+        result = {}
+        for name in self.column_names:
+            column_type = self.table.schema.field(name).type
+            if name.endswith(PACKED_SUFFIX):
+                result[name.removesuffix(PACKED_SUFFIX)] = self.trace(row, name.removesuffix(PACKED_SUFFIX))
+            elif pa.types.is_list(column_type) or pa.types.is_large_list(column_type):
+                result[name] = self.trace(row, name)
+            else:
+                result[name] = self.table[name][row].as_py()
+        if self._is_encoded(AXIS_COLUMN):
+            result[AXIS_COLUMN] = self.trace(row, AXIS_COLUMN)
+        return result
@@ -0,0 +1,104 @@
+"""
+Batched peak detection and feature extraction for a whole session.
+
+All traces are stacked on a shared potential grid and the peak features are computed in
+one vectorized pass, giving one scalar per trace for each of:
+
+- peak_potential: potential of the largest current in the peaks' direction (or of the
+  largest |current| if the polarity is not given), away from the scan ends (V)
+- peak_current: signed current at the peak (peak height above the baseline when the
+  input is baseline-corrected)
+- peak_fwhm: full width of the peak at half its height (V)
+- peak_area: integral of the peak region, out to where the signal falls below
+  AREA_THRESHOLD of the peak height (current x V)
+
+A candidate whose half-height region runs into the excluded scan ends is the tail of a
+switching/charging transient rather than a peak; it is masked and the next one is tried.
+"""
+
+import numpy as np
+
+from baseline_correction import peak_polarity, stack_on_grid
+
+AREA_THRESHOLD = 0.05
+# Fraction of the scan at each end excluded from the peak search (switching transients)
+EDGE_FRACTION = 0.05
+# Candidates tried per trace before settling on one touching a scan end
+MAX_PEAK_CANDIDATES = 4
+FEATURE_COLUMNS = ["peak_potential", "peak_current", "peak_fwhm", "peak_area"]
+
+
+def peak_region(y: np.ndarray, peak_idx: np.ndarray, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    First and last index of the contiguous region around each row's peak where the signal
+    keeps the peak's sign and stays above `threshold` x the peak height.
+    """
+    n, m = y.shape
+    rows = np.arange(n)
+    height = y[rows, peak_idx][:, None]
+    inside = (y * np.sign(height) >= threshold * np.abs(height)) & (height != 0)
+    idx = np.broadcast_to(np.arange(m), (n, m))
+    # Nearest index outside the region on each side of every column
+    last_outside = np.maximum.accumulate(np.where(inside, -1, idx), axis=1)
+    next_outside = np.minimum.accumulate(np.where(inside, m, idx)[:, ::-1], axis=1)[:, ::-1]
+    start = last_outside[rows, peak_idx] + 1
+    end = next_outside[rows, peak_idx] - 1
+    # A zero-height peak has an empty region; collapse it onto the peak itself
+    return np.minimum(start, peak_idx), np.maximum(end, peak_idx)
+
+
+def extract_features(y: np.ndarray, grid: np.ndarray, polarity: np.ndarray = None) -> dict:
+    """
+    Peak features for every row of y (n_traces, n_points) sampled on `grid`. `polarity`
+    ((n_traces, 1) of +1/-1, see baseline_correction.peak_polarity) restricts each row to
+    peaks pointing that way.
+    """
+    n, m = y.shape
+    y = np.nan_to_num(y, nan=0.0)
+    rows = np.arange(n)
+    edge = min(int(m * EDGE_FRACTION), (m - 1) // 2)
+    candidates = np.abs(y) if polarity is None else polarity * y
+    candidates[:, :edge] = candidates[:, m - edge:] = -np.inf
+    idx = np.arange(m)
+    for _ in range(MAX_PEAK_CANDIDATES):
+        peak_idx = np.argmax(candidates, axis=1)
+        half_start, half_end = peak_region(y, peak_idx, 0.5)
+        at_edge = (half_start <= edge) | (half_end >= m - 1 - edge)
+        if not at_edge.any():
+            break
+        masked = at_edge[:, None] & (idx >= half_start[:, None]) & (idx <= half_end[:, None])
+        remaining = np.where(masked, -np.inf, candidates)
+        # A row with nothing left keeps its last candidate
+        exhausted = np.isneginf(remaining).all(axis=1)
+        candidates = np.where(exhausted[:, None], candidates, remaining)
+    height = y[rows, peak_idx]
+
+    fwhm = np.abs(grid[half_end] - grid[half_start])
+
+    start, end = peak_region(y, peak_idx, AREA_THRESHOLD)
+    segment = 0.5 * (y[:, 1:] + y[:, :-1]) * np.abs(np.diff(grid))
+    idx = np.arange(m - 1)
+    in_region = (idx >= start[:, None]) & (idx < end[:, None])
+    area = np.where(in_region, segment, 0.0).sum(axis=1)
+
+    return {
+        "peak_potential": grid[peak_idx],
+        "peak_current": height,
+        "peak_fwhm": fwhm,
+        "peak_area": area,
+    }
+
+
+def session_features(potentials: list, currents: list, raw_currents: list = None) -> dict:
+    """
+    Scalar peak feature columns for every trace of a session. With `raw_currents` (the
+    measured traces `currents` were derived from), peaks are searched in their direction.
+    """
+    if not currents:
+        return {column: [] for column in FEATURE_COLUMNS}
+    grid = np.asarray(max(potentials, key=len), dtype=np.float64)
+    if len(grid) < 2:
+        return {column: [None] * len(currents) for column in FEATURE_COLUMNS}
+    polarity = peak_polarity(raw_currents) if raw_currents is not None else None
+    features = extract_features(stack_on_grid(potentials, currents, grid), grid, polarity)
+    return {column: features[column].tolist() for column in FEATURE_COLUMNS}
@@ -0,0 +1,84 @@
+"""
+Post-parse processing stages that add derived columns to a session's dataset.
+
+Each stage takes the session's columns (potential, current, is_blank, ...) as lists and
+returns new columns. Stages run once per session, either on records before the dataset is
+built (dataset_builder) or on a saved dataset_hf produced by the agent:
+
+    python processing.py dataset_hf
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+from baseline_correction import correct_session
+from peak_features import session_features
+
+REQUIRED_COLUMNS = ["potential", "current"]
+
+
+def baseline_stage(columns: dict) -> dict:
+    return correct_session(columns["potential"], columns["current"], columns["is_blank"])
+
+
+def peak_features_stage(columns: dict) -> dict:
+    signal = columns.get("current_corrected") or columns["current"]
+    return session_features(columns["potential"], signal, raw_currents=columns["current"])
+
+
+STAGES = [baseline_stage, peak_features_stage]
+
+
+def process_columns(columns: dict) -> dict:
+    """Run every stage and return all new columns."""
+    if not columns["potential"]:
+        return {}
+    new_columns = {}
+    for stage in STAGES:
+        new_columns |= stage(columns | new_columns)
+    return new_columns
+
+
+def process_records(records: list[dict]) -> list[dict]:
+    """Add the processing columns to parsed dataset records (in place)."""
+    columns = {key: [record.get(key) for record in records] for key in REQUIRED_COLUMNS + ["is_blank"]}
+    for name, values in process_columns(columns).items():
+        for record, value in zip(records, values):
+            record[name] = value
+    return records
+
+
+def process_saved_dataset(dataset_dir: str):
+    """Add the processing columns to a saved dataset_hf, replacing it on disk."""
+    from datasets import load_from_disk
+
+    from dataset_builder import catalog_rows
+    from dataset_reader import DatasetReader
+    from waveform_encoding import dataset_encoding, encode_trace_columns
+
+    reader = DatasetReader(dataset_dir)
+    missing = [column for column in REQUIRED_COLUMNS if not reader.has_trace(column)]
+    if missing:
+        raise ValueError(f"Dataset at {dataset_dir} has no {', '.join(missing)} column(s)")
+
+    # Read through DatasetReader so compact encodings are decoded; new columns are stored the same way
+    columns = {name: list(reader.traces(name)) for name in REQUIRED_COLUMNS}
+    # Datasets without file names or an is_blank column have no known blanks
+    columns["is_blank"] = [bool(row.get("is_blank")) for row in catalog_rows(dataset_dir)]
+    dataset = load_from_disk(dataset_dir)
+    encoding = dataset_encoding(dataset.column_names)
+    for name, values in encode_trace_columns(process_columns(columns), encoding).items():
+        if name in dataset.column_names:
+            dataset = dataset.remove_columns(name)
+        dataset = dataset.add_column(name, values)
+
+    tmp_dir = Path(f"{dataset_dir}.processing")
+    dataset.save_to_disk(str(tmp_dir))
+    shutil.rmtree(dataset_dir)
+    tmp_dir.rename(dataset_dir)
+    return dataset
+
+
+if __name__ == "__main__":
+    process_saved_dataset(sys.argv[1] if len(sys.argv) > 1 else "dataset_hf")
@@ -0,0 +1,127 @@
+"""
+Reduces shell command output before it is returned to the agent (and posted to /log).
+
+Output within the line and character budget is returned unchanged. Longer output has runs
+of similar lines (directory listings, numeric data rows) collapsed, unless the command
+already bounded it with head, tail or sed -n, and is then truncated to a head and tail. When anything is dropped, the full output is
+written to the volume under .tool_outputs/<ref>.<stream> and the reduced text points to it.
+The ref is a hash of the output, so a rerun producing the same output gives the agent the
+same text (and an llm_cache replay the same requests).
+
+Used as a command wrapper inside the sandbox:
+    python tool_output_reducer.py --store-dir /workspace/.tool_outputs -- bash -lc "ls -R ."
+"""
+
+import hashlib
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+MAX_LINES = int(os.environ.get("TOOL_OUTPUT_MAX_LINES", 200))
+HEAD_LINES = int(os.environ.get("TOOL_OUTPUT_HEAD_LINES", 80))
+TAIL_LINES = int(os.environ.get("TOOL_OUTPUT_TAIL_LINES", 40))
+MAX_CHARS = int(os.environ.get("TOOL_OUTPUT_MAX_CHARS", 20_000))
+MIN_RUN = int(os.environ.get("TOOL_OUTPUT_MIN_RUN", 12))
+STORE_DIR = os.environ.get("TOOL_OUTPUT_STORE_DIR", ".tool_outputs")
+
+RUN_HEAD = 4
+RUN_TAIL = 2
+# Commands whose output the caller already bounded, e.g. `head -n 40 file.txt` or `sed -n '1,80p' file.txt`
+BOUNDED_COMMAND = re.compile(r"(^|[|;&(]\s*)(head|tail)\b|\bsed\s+-n\b")
+
+
+def line_shape(line: str) -> str:
+    """Lines with the same shape differ only in numbers and file extension."""
+    return re.sub(r"\.\w+$", ".*", re.sub(r"\d+(\.\d+)?", "#", line.strip()))
+
+
+def collapse_runs(lines: list[str], min_run: int = MIN_RUN) -> list[str]:
+    """Collapse runs of >= min_run similar lines to their first and last few lines."""
+    collapsed = []
+    i = 0
+    while i < len(lines):
+        j = i + 1
+        shape = line_shape(lines[i])
+        while j < len(lines) and shape and line_shape(lines[j]) == shape:
+            j += 1
+        run = lines[i:j]
+        if len(run) >= min_run:
+            omitted = len(run) - RUN_HEAD - RUN_TAIL
+            collapsed += run[:RUN_HEAD] + [f"... [{omitted} similar lines omitted] ..."] + run[-RUN_TAIL:]
+        else:
+            collapsed += run
+        i = j
+    return collapsed
+
+
+def truncate(lines: list[str], max_lines: int = MAX_LINES, head: int = HEAD_LINES, tail: int = TAIL_LINES) -> list[str]:
+    if len(lines) <= max_lines:
+        return lines
+    return lines[:head] + [f"... [{len(lines) - head - tail} lines omitted] ..."] + lines[-tail:]
+
+
+def is_bounded(argv: list[str]) -> bool:
+    return any(BOUNDED_COMMAND.search(arg) for arg in argv)
+
+
+def reduce_output(text: str, max_lines: int = MAX_LINES, max_chars: int = MAX_CHARS,
+                  min_run: int = MIN_RUN, collapse: bool = True) -> tuple[str, bool]:
+    """Return (reduced_text, was_reduced)."""
+    lines = text.splitlines()
+    if len(lines) <= max_lines and len(text) <= max_chars:
+        return text, False
+    reduced_lines = truncate(collapse_runs(lines, min_run) if collapse else lines, max_lines)
+    reduced = "\n".join(reduced_lines) + ("\n" if text.endswith("\n") and reduced_lines else "")
+    if len(reduced) > max_chars:
+        half = max_chars // 2
+        reduced = reduced[:half] + f"\n... [{len(reduced) - max_chars} characters omitted] ...\n" + reduced[-half:]
+    return reduced, reduced != text
+
+
+def output_ref(stdout: str, stderr: str) -> str:
+    """Ref of a command's stored outputs: a hash of both streams."""
+    digest = hashlib.sha256(stdout.encode("utf-8", errors="replace"))
+    digest.update(b"\0" + stderr.encode("utf-8", errors="replace"))
+    return digest.hexdigest()[:12]
+
+
+def store_full_output(text: str, ref: str, stream: str, store_dir: str = STORE_DIR) -> str:
+    path = Path(store_dir) / f"{ref}.{stream}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+def reduce_and_store(text: str, ref: str, stream: str, store_dir: str = STORE_DIR, collapse: bool = True) -> str:
+    reduced, was_reduced = reduce_output(text, collapse=collapse)
+    if not was_reduced:
+        return text
+    path = store_full_output(text, ref, stream, store_dir)
+    # Relative to the command's working directory (the workspace), so the text doesn't depend on where it is mounted
+    if Path(path).resolve().is_relative_to(Path.cwd().resolve()):
+        path = os.path.relpath(path)
+    return reduced.rstrip("\n") + f"\n[output reduced: {len(text)} -> {len(reduced)} chars; full output in {path} (ref {ref})]\n"
+
+
+def main(argv: list[str]) -> int:
+    store_dir = STORE_DIR
+    if argv[:1] == ["--store-dir"]:
+        store_dir, argv = argv[1], argv[2:]
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    try:
+        result = subprocess.run(argv, capture_output=True, text=True, errors="replace")
+    except FileNotFoundError as e:
+        sys.stderr.write(f"{e}\n")
+        return 127
+    ref = output_ref(result.stdout, result.stderr)
+    collapse = not is_bounded(argv)
+    sys.stdout.write(reduce_and_store(result.stdout, ref, "stdout", store_dir, collapse))
+    sys.stderr.write(reduce_and_store(result.stderr, ref, "stderr", store_dir, collapse))
+    return result.returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,140 @@
+"""
+Compact storage encodings for the waveform columns of dataset_hf.
+
+Potential sweeps are (almost always) uniform grids: 'Init E' stepping by 'Incr E'. Storing
+them as full float lists roughly doubles the dataset, so the compact encodings replace a
+uniform sweep by three scalar columns and keep the list only for rows that are not uniform:
+
+    potential_start, potential_step, potential_count    (potential is None for those rows)
+
+and store the current-like trace columns more tightly:
+
+    full       float64 lists, no implicit axis (the default, readable by anything)
+    compact    implicit potential axis, trace columns as float32 lists
+    lossless   implicit potential axis, trace columns as byte-shuffled, zlib-compressed
+               float64 in <column>_packed (binary)
+
+A uniform axis is reconstructed to within UNIFORM_ATOL, far below the precision CHI
+prints potentials with. DatasetReader decodes rows lazily; decode_record() gives back a
+plain row for anything else.
+"""
+
+import zlib
+
+import numpy as np
+
+ENCODINGS = ("full", "compact", "lossless")
+AXIS_COLUMN = "potential"
+# Current-like columns sampled on the potential axis (raw and processed)
+TRACE_COLUMNS = ["current", "current_blank_subtracted", "baseline", "current_corrected"]
+PACKED_SUFFIX = "_packed"
+UNIFORM_ATOL = 1e-9
+COMPRESSION_LEVEL = 6
+
+
+def axis_columns(name: str = AXIS_COLUMN) -> tuple[str, str, str]:
+    return f"{name}_start", f"{name}_step", f"{name}_count"
+
+
+def uniform_axis(values, atol: float = UNIFORM_ATOL):
+    """(start, step, count) if values are a uniform grid (at least two points), else None."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 1 or len(values) < 2 or not np.all(np.isfinite(values)):
+        return None
+    start = float(values[0])
+    step = (float(values[-1]) - start) / (len(values) - 1)
+    if step == 0 or np.max(np.abs(start + step * np.arange(len(values)) - values)) > atol:
+        return None
+    return start, step, len(values)
+
+
+def axis_values(start: float, step: float, count: int) -> np.ndarray:
+    return start + step * np.arange(count, dtype=np.float64)
+
+
+def pack_trace(values) -> bytes:
+    """Lossless float64 trace -> shuffled (all first bytes, all second bytes, ...) and zlib-compressed."""
+    raw = np.ascontiguousarray(values, dtype="<f8").view(np.uint8).reshape(-1, 8)
+    return zlib.compress(raw.T.tobytes(), COMPRESSION_LEVEL)
+
+
+def unpack_trace(packed: bytes) -> np.ndarray:
+    shuffled = np.frombuffer(zlib.decompress(packed), dtype=np.uint8)
+    return np.ascontiguousarray(shuffled.reshape(8, -1).T).view("<f8").ravel()
+
+
+def stored_name(name: str, encoding: str) -> str:
+    """Column a trace column is stored under (lossless traces live in <name>_packed)."""
+    return name + PACKED_SUFFIX if encoding == "lossless" and name in TRACE_COLUMNS else name
+
+
+def encode_trace(values, encoding: str):
+    """One trace in the given encoding (None stays None)."""
+    if values is None or encoding == "full":
+        return values
+    if encoding == "compact":
+        return np.asarray(values, dtype=np.float32)
+    return pack_trace(values)
+
+
+def encode_trace_columns(columns: dict, encoding: str) -> dict:
+    """Encode the trace columns of {name: values}; other columns are passed through."""
+    return {
+        stored_name(name, encoding): [encode_trace(value, encoding) for value in values] if name in TRACE_COLUMNS else values
+        for name, values in columns.items()
+    }
+
+
+def encode_records(records: list[dict], encoding: str = "full") -> list[dict]:
+    """
+    Encoded copies of dataset records (see module docstring). The potential column is
+    dropped altogether when every row is uniform.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding '{encoding}', expected one of {', '.join(ENCODINGS)}")
+    if encoding == "full":
+        return records
+
+    start_key, step_key, count_key = axis_columns()
+    encoded = []
+    for record in records:
+        record = dict(record)
+        axis = uniform_axis(record.get(AXIS_COLUMN))
+        record[start_key], record[step_key], record[count_key] = axis or (None, None, None)
+        if axis:
+            record[AXIS_COLUMN] = None
+        for name in TRACE_COLUMNS:
+            if name in record:
+                record[stored_name(name, encoding)] = encode_trace(record.pop(name), encoding)
+        encoded.append(record)
+
+    if encoded and all(record[AXIS_COLUMN] is None for record in encoded):
+        for record in encoded:
+            del record[AXIS_COLUMN]
+    return encoded
+
+
+def dataset_encoding(column_names: list[str]) -> str:
+    """Which encoding a saved dataset uses, from its column names."""
+    if any(name + PACKED_SUFFIX in column_names for name in TRACE_COLUMNS):
+        return "lossless"
+    if axis_columns()[1] in column_names:
+        return "compact"
+    return "full"
+
+
+def decode_record(record: dict) -> dict:
+    """A row of any encoding with plain float64 potential and trace arrays."""
+    record = dict(record)
+    start_key, step_key, count_key = axis_columns()
+    if record.get(AXIS_COLUMN) is None and record.get(step_key) is not None:
+        record[AXIS_COLUMN] = axis_values(record[start_key], record[step_key], record[count_key])
+    for key in (start_key, step_key, count_key):
+        record.pop(key, None)
+    for name in TRACE_COLUMNS:
+        if name + PACKED_SUFFIX in record:
+            packed = record.pop(name + PACKED_SUFFIX)
+            record[name] = None if packed is None else unpack_trace(packed)
+        elif record.get(name) is not None:
+            record[name] = np.asarray(record[name], dtype=np.float64)
+    return record
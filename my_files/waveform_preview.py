@@ -0,0 +1,127 @@
+"""
+Resolution-aware waveform downsampling for live previews and summaries.
+
+Traces (potential/current as returned by parse_chi_txt) are reduced with vectorized
+min/max decimation, which keeps every peak and trough visible at any resolution.
+A pyramid of levels is stored next to dataset_hf:
+
+    dataset_preview/index.json       row -> source_file, original length; available levels
+    dataset_preview/level_<n>.npz    x, y: (rows, n) float32, NaN-padded; lengths: (rows,)
+
+so a preview can be served by reading one small file instead of the full dataset.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+PREVIEW_LEVELS = (1024, 256, 64)
+PREVIEW_DIR = "dataset_preview"
+
+
+def minmax_decimate(x, y, n_out: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a trace to at most n_out points: the signal is split into n_out // 2 buckets
+    and each bucket contributes its minimum and maximum, in original order.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n <= n_out or n_buckets == 0:
+        return x, y
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+    positions = np.arange(n)
+
+    # First index of the min / max within each bucket (NaNs never match and fall back to the bucket start)
+    mins = np.fmin.reduceat(y, starts)
+    maxs = np.fmax.reduceat(y, starts)
+    i_min = np.minimum.reduceat(np.where(y == mins[bucket], positions, n), starts)
+    i_max = np.minimum.reduceat(np.where(y == maxs[bucket], positions, n), starts)
+    i_min = np.where(i_min == n, starts, i_min)
+    i_max = np.where(i_max == n, starts, i_max)
+
+    indices = np.stack([np.minimum(i_min, i_max), np.maximum(i_min, i_max)], axis=1).ravel()
+    return x[indices], y[indices]
+
+
+def build_level(traces: list[tuple], n_out: int) -> dict:
+    """Decimate every trace to n_out points, packed into NaN-padded 2-D float32 arrays."""
+    x_out = np.full((len(traces), n_out), np.nan, dtype=np.float32)
+    y_out = np.full((len(traces), n_out), np.nan, dtype=np.float32)
+    lengths = np.zeros(len(traces), dtype=np.int32)
+    for row, (x, y) in enumerate(traces):
+        x_dec, y_dec = minmax_decimate(x, y, n_out)
+        lengths[row] = len(y_dec)
+        x_out[row, :len(x_dec)] = x_dec
+        y_out[row, :len(y_dec)] = y_dec
+    return {"x": x_out, "y": y_out, "lengths": lengths}
+
+
+def write_preview_pyramid(records: list[dict], output_dir: str, levels=PREVIEW_LEVELS,
+                          x_key: str = "potential", y_key: str = "current") -> dict:
+    """Write the preview pyramid for dataset records (dicts with potential/current lists)."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    traces = [(record[x_key], record[y_key]) for record in records]
+    for n_out in levels:
+        np.savez(output_dir / f"level_{n_out}.npz", **build_level(traces, n_out))
+
+    index = {
+        "levels": sorted(levels),
+        "rows": [{"source_file": record.get("source_file"), "length": len(record[y_key])} for record in records],
+    }
+    (output_dir / "index.json").write_text(json.dumps(index))
+    return index
+
+
+def write_preview_from_dataset(dataset_dir: str, output_dir: str, levels=PREVIEW_LEVELS) -> dict:
+    """Build the pyramid for a saved dataset_hf (e.g. one produced by the agent)."""
+    from dataset_reader import DatasetReader
+
+    reader = DatasetReader(dataset_dir)
+    source_files = reader.column("source_file") if "source_file" in reader.column_names else [None] * len(reader)
+    # Traces are zero-copy views into the memory-mapped dataset, not Python lists
+    records = [
+        {"source_file": source_file, "potential": potential, "current": current}
+        for source_file, potential, current in zip(source_files, reader.traces("potential"), reader.traces("current"))
+    ]
+    return write_preview_pyramid(records, output_dir, levels)
+
+
+def choose_level(levels: list[int], points: int) -> int:
+    """Smallest stored level with at least `points` points (or the largest available)."""
+    for level in sorted(levels):
+        if level >= points:
+            return level
+    return max(levels)
+
+
+def load_level(npz_bytes: bytes) -> dict:
+    import io
+
+    with np.load(io.BytesIO(npz_bytes)) as data:
+        return {key: data[key] for key in data.files}
+
+
+def level_rows(level: dict, rows: list[int]) -> list[dict]:
+    """JSON-ready traces for the requested rows of a loaded level."""
+    traces = []
+    for row in rows:
+        length = int(level["lengths"][row])
+        traces.append({
+            "row": row,
+            "potential": level["x"][row, :length].tolist(),
+            "current": level["y"][row, :length].tolist(),
+        })
+    return traces
+
+
+if __name__ == "__main__":
+    import sys
+
+    write_preview_from_dataset(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else PREVIEW_DIR)
@@ -0,0 +1,60 @@
+"""
+Session result cache: identical uploads reuse a finished session instead of rerunning the agent.
+
+The key is a manifest hash over the uploaded files (names and contents, order-independent),
+the experiment context and the pipeline version (a hash of everything uploaded from
+my_files: AGENTS.md, the parser and the processing stages). A finished session records
+one small JSON entry per key next to the catalog shards, so every web container sees it.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+
+
+def pipeline_version(my_files_dir: str) -> str:
+    """Hash of the processing instructions and code uploaded into every session."""
+    digest = hashlib.sha256()
+    root = Path(my_files_dir)
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and "__pycache__" not in path.parts:
+            digest.update(str(path.relative_to(root)).encode())
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def manifest_hash(files: list[tuple[str, bytes]], context: str, version: str) -> str:
+    """Cache key for an upload: (filename, content) pairs, experiment context and pipeline version."""
+    digest = hashlib.sha256()
+    for name, content in sorted((name, hashlib.sha256(content).hexdigest()) for name, content in files):
+        digest.update(f"{name}\0{content}\n".encode())
+    digest.update(b"context\0" + context.encode())
+    digest.update(b"pipeline\0" + version.encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Manifest hash -> finished session, one JSON file per entry."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+
+    def get(self, key: str) -> dict:
+        path = self.cache_dir / f"{key}.json"
+        try:
+            return json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, session_id: str, volume_name: str) -> Path:
+        entry = {"session_id": session_id, "volume_name": volume_name, "created_at": time.time()}
+        path = self.cache_dir / f"{key}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(entry))
+        tmp_path.replace(path)
+        return path
+
+    def invalidate(self, key: str):
+        (self.cache_dir / f"{key}.json").unlink(missing_ok=True)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Run the upload -> agent -> download pipeline on this machine with the local execution
+backend: volumes are directories, the log queue is in-process and sandbox commands run
+as local subprocesses. The host needs the sandbox tools (python deps, ripgrep, apply_patch).
+
+    python run_local.py --port 8000 --root outputs/local_volumes
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT / "modal_webendpoint"))
+
+from execution_backend import LocalBackend
+from modal_webendpoint import create_web_app
+
+logger = logging.getLogger(__name__)
+
+
+def create_local_app(root: str, base_url: str):
+    backend = LocalBackend(root)
+    return create_web_app(
+        backend.queue(),
+        backend=backend,
+        base_url=base_url,
+        templates_dir=str(ROOT / "modal_webendpoint" / "templates"),
+        my_files_dir=str(ROOT / "my_files"),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--root", default="outputs/local_volumes", help="Directory holding the session volumes")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    base_url = f"http://{args.host}:{args.port}"
+    logger.info(f"Serving local pipeline at {base_url} (volumes in {args.root})")
+    uvicorn.run(create_local_app(args.root, base_url), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
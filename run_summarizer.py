@@ -6,6 +6,7 @@ from pathlib import Path
 
 import docker
 from agent_sandbox.coding_agent import run_coding_agent
+from llm_cache import install_llm_cache
 
 # Configure logging
 logging.basicConfig(
@@ -81,7 +82,6 @@ def stop_container(name: str):
 
 def main(logger_type: str = "stdout"):
     # Step 0: (Optional) Copy any needed files to OUTPUT_DIR here if needed
-
     # Step 1: start container
     container = start_container(CONTAINER_SCRIPT)
 
@@ -97,7 +97,9 @@ def main(logger_type: str = "stdout"):
         "This blurb will be passed as context into an automated plotting agent which does not have access to the data, so\n"
         "your response should be complete but concise. It should include information about the dataset in isolation, not in the context of other files that were scanned (such as AGENTS.md)."
     )
-    response = run_agent_step(summarizer_command, container, logger_type)
+    # Model calls are recorded/replayed when LLM_CACHE_MODE is set (see llm_cache.py)
+    with install_llm_cache():
+        response = run_agent_step(summarizer_command, container, logger_type)
 
     with open(OUTPUT_DIR / "dataset_description.txt", "w", encoding="utf-8") as f:
         f.write(response)
@@ -0,0 +1,241 @@
+"""
+Wrappers around the sandbox object handed to `run_coding_agent`.
+They change how agent tool calls execute without touching the agent loop itself.
+"""
+
+import io
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+REDUCER_SCRIPT = "tool_output_reducer.py"
+# Read-only commands running at once in a ConcurrentReadSandbox
+MAX_CONCURRENT_READS = 8
+
+
+class ReducingSandbox:
+    """
+    Runs every agent command through my_files/tool_output_reducer.py inside the sandbox,
+    so large outputs are collapsed/truncated before they cross the network, reach /log
+    or enter the model context. Full outputs stay in the volume under .tool_outputs/.
+    """
+
+    def __init__(self, sandbox, workspace: str = "/workspace"):
+        self._sandbox = sandbox
+        self.workspace = workspace
+
+    def exec(self, *cmd, **kwargs):
+        return self._sandbox.exec(
+            "python", f"{self.workspace}/{REDUCER_SCRIPT}",
+            "--store-dir", f"{self.workspace}/.tool_outputs",
+            "--", *cmd,
+            **kwargs
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._sandbox, name)
+
+
+class CheckpointingSandbox:
+    """
+    Marks every agent command as a turn boundary on an agent_checkpoint.AgentCheckpoint:
+    the command is added to the checkpoint transcript (saved every few turns), and once the
+    run's time budget is used up the next command raises CheckpointDeadline instead of
+    running, so the run can stop cleanly and resume in a new function call. Read-only
+    commands (see is_read_only) don't make the next checkpoint sync the workspace.
+    """
+
+    def __init__(self, sandbox, checkpoint):
+        self._sandbox = sandbox
+        self.checkpoint = checkpoint
+
+    def exec(self, *cmd, **kwargs):
+        entry = self.checkpoint.record_turn(cmd, writes=not is_read_only(cmd))
+        process = self._sandbox.exec(*cmd, **kwargs)
+        return RecordingProcess(process, lambda stream, text: self.checkpoint.record_output(entry, stream, text))
+
+    def __getattr__(self, name):
+        return getattr(self._sandbox, name)
+
+
+class ConcurrentReadSandbox:
+    """
+    Starts read-only commands (see is_read_only) on worker threads and returns at once, so
+    independent reads the agent issues together (e.g. the tool calls of one model turn) run
+    concurrently instead of paying a sandbox round trip each. A command that may write
+    first waits for the reads still running, so it never races them.
+    """
+
+    def __init__(self, sandbox, max_workers: int = MAX_CONCURRENT_READS):
+        self._sandbox = sandbox
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sandbox-read")
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def exec(self, *cmd, **kwargs):
+        if is_read_only(cmd):
+            future = self._pool.submit(self._run, cmd, kwargs)
+            with self._lock:
+                self._pending = [pending for pending in self._pending if not pending.done()] + [future]
+            return BackgroundProcess(future)
+        with self._lock:
+            pending, self._pending = self._pending, []
+        wait(pending)
+        return self._sandbox.exec(*cmd, **kwargs)
+
+    def _run(self, cmd, kwargs) -> tuple[int, str, str]:
+        process = self._sandbox.exec(*cmd, **kwargs)
+        stdout, stderr = process.stdout.read(), process.stderr.read()
+        return process.wait(), stdout, stderr
+
+    def __getattr__(self, name):
+        return getattr(self._sandbox, name)
+
+
+class BackgroundProcess:
+    """A command running on a ConcurrentReadSandbox worker, shaped like the process sandbox.exec returns."""
+
+    def __init__(self, future):
+        self._future = future
+
+    def wait(self) -> int:
+        return self._future.result()[0]
+
+    def poll(self):
+        return self.wait() if self._future.done() else None
+
+    @property
+    def returncode(self):
+        return self.poll()
+
+    @property
+    def stdout(self):
+        return io.StringIO(self._future.result()[1])
+
+    @property
+    def stderr(self):
+        return io.StringIO(self._future.result()[2])
+
+
+class RecordingProcess:
+    """A sandbox process whose stdout/stderr, once read, are passed to `on_output(stream, text)`."""
+
+    def __init__(self, process, on_output):
+        self._process = process
+        self._on_output = on_output
+
+    @property
+    def stdout(self):
+        return _RecordingStream(self._process.stdout, lambda text: self._on_output("stdout", text))
+
+    @property
+    def stderr(self):
+        return _RecordingStream(self._process.stderr, lambda text: self._on_output("stderr", text))
+
+    def __getattr__(self, name):
+        return getattr(self._process, name)
+
+
+class _RecordingStream:
+    def __init__(self, stream, on_output):
+        self._stream = stream
+        self._on_output = on_output
+
+    def read(self):
+        text = self._stream.read()
+        self._on_output(text if isinstance(text, str) else text.decode("utf-8", errors="replace"))
+        return text
+
+    def __iter__(self):
+        chunks = []
+        for chunk in self._stream:
+            chunks.append(chunk if isinstance(chunk, str) else chunk.decode("utf-8", errors="replace"))
+            yield chunk
+        self._on_output("".join(chunks))
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+# Commands that only read the workspace
+READ_ONLY_COMMANDS = {
+    "ls", "cat", "head", "tail", "sed", "rg", "grep", "nl", "wc", "find", "stat", "file",
+    "pwd", "echo", "du", "tree", "sort", "uniq", "cut", "diff", "test", "true",
+}
+SHELLS = {"bash", "sh"}
+# Flags that write files or run other commands (sed -f: a script that isn't in the call)
+WRITE_FLAGS = {"sed": ("-i", "--in-place", "-f", "--file"),
+               "find": ("-delete", "-exec", "-execdir", "-fls", "-fprint", "-fprint0", "-fprintf", "-ok", "-okdir"),
+               "sort": ("-o", "--output"), "rg": ("--pre",), "tree": ("-o",), "diff": ("--output",)}
+# Shell command substitution runs whatever is inside it
+SUBSTITUTIONS = ("`", "$(")
+# sed script commands that write a file (w, W) or execute one (e), after an optional address;
+# the s command takes the same as flags (s/a/b/w out.txt)
+SED_ADDRESS = r"(?:\d+|\$|/(?:[^/\\]|\\.)*/)"
+SED_WRITE_COMMAND = re.compile(rf"^\s*(?:{SED_ADDRESS}(?:\s*[,~]\s*{SED_ADDRESS})?)?\s*!?\s*[wWe]")
+SED_WRITE_FLAG = re.compile(r"^\s*s(.)(?:(?!\1)[^\\]|\\.)*\1(?:(?!\1)[^\\]|\\.)*\1[^;]*?[we]")
+
+
+def _sed_scripts(args: list[str]) -> list[str]:
+    """The scripts of a sed call: its -e/--expression values, else its first operand."""
+    scripts, operands = [], []
+    args = iter(args)
+    for arg in args:
+        if arg in ("-e", "--expression"):
+            scripts.append(next(args, ""))
+        elif arg.startswith("--expression="):
+            scripts.append(arg.partition("=")[2])
+        elif not arg.startswith("-"):
+            operands.append(arg)
+    return scripts or operands[:1]
+
+
+def _sed_writes(script: str) -> bool:
+    # Splitting on every separator also splits inside regexes; that can only flag more
+    return any(SED_WRITE_COMMAND.match(command) or SED_WRITE_FLAG.match(command)
+               for command in re.split(r"[;\n{}]", script))
+
+
+def _is_read_only_segment(words: list[str]) -> bool:
+    if not words or words[0] not in READ_ONLY_COMMANDS:
+        return False
+    write_flags = WRITE_FLAGS.get(words[0], ())
+    if any(word.startswith(flag) for word in words[1:] for flag in write_flags):
+        return False
+    return words[0] != "sed" or not any(_sed_writes(script) for script in _sed_scripts(words[1:]))
+
+
+def is_read_only(cmd: list[str]) -> bool:
+    """
+    Whether a tool call only reads the workspace. Shell scripts (`bash -lc "..."`) are
+    read-only if every pipeline/list segment starts with a read-only command, nothing is
+    redirected to a file and there is no command substitution. Anything unparseable counts
+    as a write.
+    """
+    import shlex
+
+    if not cmd:
+        return False
+    if cmd[0] not in SHELLS:
+        return _is_read_only_segment(list(cmd))
+    script = cmd[-1]
+    if any(substitution in script for substitution in SUBSTITUTIONS):
+        return False
+    try:
+        lexer = shlex.shlex(script, posix=True, punctuation_chars=True)
+        tokens = list(lexer)
+    except ValueError:
+        return False
+    segments, current = [], []
+    for token in tokens:
+        if token in ("|", "||", "&&", ";", "&"):
+            segments.append(current)
+            current = []
+        elif set(token) <= set("<>&|;()"):
+            if ">" in token or "<<" in token or "(" in token:
+                return False
+            current.append(token)
+        else:
+            current.append(token)
+    segments.append(current)
+    return all(_is_read_only_segment(segment) for segment in segments if segment)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for checkpointing agent runs at turn boundaries and resuming them.
+"""
+
+import pytest
+
+from agent_checkpoint import AgentCheckpoint, CheckpointDeadline
+from execution_backend import LocalBackend
+from sandbox_wrappers import CheckpointingSandbox
+
+VOLUME = "temp-dataset-processor-agent-volume-s1"
+
+
+def test_deadline_checkpoints_and_resume_continues(tmp_path):
+    backend = LocalBackend(str(tmp_path / "volumes"))
+    volume = backend.volume(VOLUME, create_if_missing=True)
+    sb = backend.create_sandbox(volume, workdir="/workspace")
+
+    first = AgentCheckpoint(volume, "s1", sandbox=sb).load()
+    assert not first.resumed
+    first.complete("context")
+    agent_sandbox = CheckpointingSandbox(sb, first)
+    agent_sandbox.exec("bash", "-c", "mkdir -p /workspace/dataset_hf && echo partial > /workspace/dataset_hf/part").wait()
+    listing = agent_sandbox.exec("ls", "/workspace")
+    listing.wait()
+    assert listing.stdout.read() == "dataset_hf\n"
+    first.deadline = 0
+    with pytest.raises(CheckpointDeadline):
+        agent_sandbox.exec("python", "build.py")
+    # Once interrupted, every later turn stops too, so the agent can't carry on
+    with pytest.raises(CheckpointDeadline):
+        first.check_deadline()
+
+    second = AgentCheckpoint(volume, "s1").load()
+    assert second.resumed and second.state["attempt"] == 2
+    assert second.is_done("context") and not second.is_done("agent")
+    assert second.state["turns"] == 2
+    notes = second.resume_notes()
+    assert "attempt 2" in notes and "$ ls /workspace\n  dataset_hf" in notes and "build.py" not in notes
+    assert second.transcript[1]["stdout"] == "dataset_hf\n"
+    assert (tmp_path / "volumes" / VOLUME / "dataset_hf" / "part").read_text() == "partial\n"
+
+    # A finished run clears its checkpoint, so the next run of the session starts over
+    second.clear()
+    third = AgentCheckpoint(volume, "s1").load()
+    assert not third.resumed and third.state["completed_steps"] == [] and third.resume_notes() == ""
+
+
+def test_transcript_keeps_output_refs(tmp_path):
+    backend = LocalBackend(str(tmp_path / "volumes"))
+    volume = backend.volume(VOLUME, create_if_missing=True)
+    checkpoint = AgentCheckpoint(volume, "s1").load()
+    entry = checkpoint.record_turn(["bash", "-lc", "seq 1 5000"], writes=False)
+    output = "1\n2\n... [4994 lines omitted] ...\n5000\n[output reduced: 23893 -> 60 chars; " \
+             "full output in .tool_outputs/0123456789ab.stdout (ref 0123456789ab)]\n"
+    checkpoint.record_output(entry, "stdout", output)
+    checkpoint.save()
+
+    notes = AgentCheckpoint(volume, "s1").load().resume_notes()
+    assert "$ bash -lc seq 1 5000\n  1\n  2" in notes
+    assert "(full output: .tool_outputs/0123456789ab.*)" in notes
+
+
+def test_checkpoints_sync_only_after_writes(tmp_path, monkeypatch):
+    import agent_checkpoint
+
+    monkeypatch.setattr(agent_checkpoint, "CHECKPOINT_INTERVAL_SECONDS", 0)
+    backend = LocalBackend(str(tmp_path / "volumes"))
+    volume = backend.volume(VOLUME, create_if_missing=True)
+    sb = backend.create_sandbox(volume, workdir="/workspace")
+    syncs = []
+
+    class CountingSandbox:
+        def exec(self, *cmd, **kwargs):
+            if cmd[0] == "sync":
+                syncs.append(cmd)
+            return sb.exec(*cmd, **kwargs)
+
+    checkpoint = AgentCheckpoint(volume, "s1", sandbox=CountingSandbox()).load()
+    agent_sandbox = CheckpointingSandbox(sb, checkpoint)
+    for cmd in (["ls", "/workspace"], ["bash", "-lc", "cat AGENTS.md | head -n 5"]):
+        agent_sandbox.exec(*cmd).wait()
+    assert not syncs
+    agent_sandbox.exec("bash", "-c", "echo partial > /workspace/part").wait()
+    agent_sandbox.exec("ls", "/workspace").wait()
+    agent_sandbox.exec("ls", "/workspace").wait()
+    assert len(syncs) == 1
+    assert AgentCheckpoint(volume, "s1").load().state["turns"] == 5
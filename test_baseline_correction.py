@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for vectorized blank subtraction and baseline correction.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path("my_files")))
+from baseline_correction import _second_difference_penalty, als_baseline, correct_session, solve_pentadiagonal
+from chi_txt_parser import parse_chi_txt
+from dataset_builder import build_records, find_chi_files
+from processing import process_saved_dataset
+
+SESSION_DIR = Path("test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM")
+
+
+def test_pentadiagonal_solver_matches_dense_solve():
+    rng = np.random.default_rng(0)
+    m, lam = 50, 100.0
+    main, first, second = _second_difference_penalty(m)
+    w = rng.uniform(0.01, 1.0, size=(3, m))
+    r = rng.normal(size=(3, m))
+    z = solve_pentadiagonal(w + lam * main, lam * first, lam * second, r)
+
+    diff = np.diff(np.eye(m), n=2, axis=0)
+    for row in range(3):
+        dense = np.diag(w[row]) + lam * diff.T @ diff
+        np.testing.assert_allclose(z[row], np.linalg.solve(dense, r[row]), atol=1e-9)
+
+
+def test_als_recovers_linear_baseline_under_peak():
+    x = np.linspace(-0.5, 0.5, 400)
+    baseline = 2.0 + 3.0 * x
+    y = np.vstack([baseline + 5.0 * np.exp(-((x - 0.1) / 0.03) ** 2)])
+    fitted = als_baseline(y)
+    assert np.max(np.abs(fitted[0] - baseline)) < 0.2
+
+
+def test_session_correction_keeps_peak_and_blanks():
+    records = build_records(find_chi_files(str(SESSION_DIR)))
+    columns = correct_session(
+        [r["potential"] for r in records], [r["current"] for r in records], [r["is_blank"] for r in records]
+    )
+    assert all(len(columns["current_corrected"][i]) == len(r["current"]) for i, r in enumerate(records))
+
+    blank = next(i for i, r in enumerate(records) if r["is_blank"])
+    assert columns["current_blank_subtracted"][blank] == records[blank]["current"]
+
+    # The AI1 reduction peak points down; its position must match the instrument's own Ep
+    for path, record, corrected in zip(find_chi_files(str(SESSION_DIR)), records, columns["current_corrected"]):
+        header = parse_chi_txt(str(path))
+        if header.get("ip") is None or abs(header["ip"]) < 1e-7:
+            continue
+        corrected = np.asarray(corrected)
+        peak = int(np.argmin(corrected))
+        assert abs(record["potential"][peak] - header["Ep"]) <= 0.006, path.name
+        assert corrected[peak] < 0 and np.max(corrected) < 0.5 * abs(corrected[peak]), path.name
+
+
+def test_saved_dataset_without_file_names_is_processed(tmp_path):
+    """An agent-built dataset with only the traces has no blanks to subtract but is still corrected."""
+    from datasets import Dataset
+
+    records = build_records(find_chi_files(str(SESSION_DIR)))[:3]
+    dataset_dir = str(tmp_path / "dataset_hf")
+    Dataset.from_dict({"potential": [r["potential"] for r in records],
+                       "current": [r["current"] for r in records]}).save_to_disk(dataset_dir)
+
+    dataset = process_saved_dataset(dataset_dir)
+    assert len(dataset) == 3
+    assert dataset["current_blank_subtracted"] == [r["current"] for r in records]
+    assert all(len(corrected) == len(r["current"]) for corrected, r in zip(dataset["current_corrected"], records))
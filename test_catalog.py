@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the cross-session dataset catalog.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path("my_files")))
+from catalog import DatasetCatalog, write_session_shard
+from dataset_builder import extract_filename_metadata
+
+SAMPLE_DIR = Path("test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM")
+
+
+def sample_rows() -> list[dict]:
+    return [dict(extract_filename_metadata(p.name), source_file=p.name) for p in sorted(SAMPLE_DIR.glob("*.txt"))]
+
+
+def test_filename_metadata():
+    row = extract_filename_metadata("250616_Pprot382int_2007B_1uM_AI1_S10_EricMM_GCE_DPV.txt")
+    assert row == {
+        "date": "2025-06-16", "construct": "Pprot382int_2007B", "concentration": "1uM", "concentration_um": 1.0,
+        "molecule": "AI1", "sample": "S10", "experimenter": "EricMM", "electrode": "GCE", "technique": "DPV",
+        "is_blank": False,
+    }
+    blank = extract_filename_metadata("250616_BLANK_EricMM_GCE_DPV.txt")
+    assert blank["is_blank"] and blank["molecule"] is None and blank["technique"] == "DPV"
+
+
+def test_query_across_sessions(tmp_path):
+    shard_dir = tmp_path / "sessions"
+    write_session_shard(shard_dir, "s1", "temp-dataset-processor-agent-volume-s1", sample_rows())
+    write_session_shard(shard_dir, "s2", "temp-dataset-processor-agent-volume-s2", sample_rows()[:3])
+
+    catalog = DatasetCatalog(tmp_path / "catalog.sqlite")
+    assert catalog.ingest_shards(shard_dir) == 2
+    assert catalog.ingest_shards(shard_dir) == 0  # unchanged shards are skipped
+
+    result = catalog.query({"molecule": "AI1", "concentration": "1uM", "experimenter": "EricMM", "technique": "DPV"})
+    assert [s["session_id"] for s in result["sessions"]] == ["s1"]
+    assert result["sessions"][0]["n_matching_rows"] == 5
+    assert all(row["concentration_um"] == 1.0 for row in result["rows"])
+
+    blanks = catalog.query({"is_blank": 1})
+    assert {s["session_id"] for s in blanks["sessions"]} == {"s1", "s2"}
+    assert all(row["is_blank"] is True for row in blanks["rows"])
+
+    assert len(catalog.query(concentration_um_max=0.5, filters={"is_blank": 0})["rows"]) == 5 + 2
+
+    with pytest.raises(ValueError):
+        catalog.query({"current": "1"})
+
+    # A negative LIMIT would return every row
+    assert len(catalog.query(limit=-1)["rows"]) == 1
+    assert len(catalog.query(limit=2)["rows"]) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
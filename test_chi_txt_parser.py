@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests for the technique-aware CHI header parsing.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path("my_files")))
+from chi_txt_parser import discover_header_schema, parse_chi_lines, parse_chi_txt
+
+SESSION_DIR = Path("test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM")
+
+
+def test_dpv_parameters_and_results():
+    parsed = parse_chi_txt(str(SESSION_DIR / "250616_Pprot382int_2007B_1uM_AI1_S9_EricMM_GCE_DPV.txt"))
+    assert parsed["Final E (V)"] == 0
+    assert parsed["Incr E (V)"] == 0.002
+    assert parsed["Amplitude (V)"] == 0.05
+    assert parsed["Pulse Width (sec)"] == 0.075
+    assert parsed["Ep"] == -0.274 and parsed["ip"] == -1.248e-7
+    assert len(parsed["Potential/V"]) == len(parsed["Current/A"]) == 250
+
+
+def test_dpv_header_schemas():
+    """Files with and without CHI's Results block all have the full DPV parameter set."""
+    for path in sorted(SESSION_DIR.glob("*.txt")):
+        schema = discover_header_schema(path.read_text().splitlines())
+        assert schema.abbreviation == "DPV" and not schema.missing_parameters
+
+
+def test_extra_parameter_lines_are_not_dropped():
+    """A file with the usual layout plus another 'Key = value' line is parsed in full."""
+    lines = (SESSION_DIR / "250616_Pprot382int_2007B_1uM_AI1_S9_EricMM_GCE_DPV.txt").read_text().splitlines()
+    extra = [("Note: Electrode Area (cm2) = 0.07" if line.startswith("Note:") else line) for line in lines]
+    parsed = parse_chi_lines(extra)
+    assert parsed["Note: Electrode Area (cm2)"] == 0.07 and parsed["Incr E (V)"] == 0.002
+
+
+def test_unknown_technique_is_inferred():
+    lines = ["Jan 1, 2025", "Some New Technique", "", "Foo (V) = 1.5", "Mode = P", "", "Potential/V, Current/A",
+             "0.1, 1e-6"]
+    schema = discover_header_schema(lines)
+    assert schema.technique == "Some New Technique" and schema.abbreviation is None
+    assert [key for _, key in schema.parameter_lines] == ["Foo (V)", "Mode"]
+    assert schema.data_start_idx == 6
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for upload-time validation of CHI exports.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT / "my_files"))
+from chi_validator import validate_chi_bytes, validate_uploads  # noqa: E402
+
+SESSION_DIR = ROOT / "test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM"
+SAMPLE = SESSION_DIR / "250616_BLANK_EricMM_GCE_DPV.txt"
+
+
+def test_sample_session_is_valid():
+    reports = validate_uploads([(path.name, path.read_bytes()) for path in sorted(SESSION_DIR.iterdir())])
+    assert len(reports) == 11
+    assert all(report.ok and not report.warnings for report in reports)
+    assert {report.technique for report in reports} == {"Differential Pulse Voltammetry"}
+    assert all(report.rows == 250 for report in reports)
+
+
+def test_malformed_files_are_reported():
+    lines = SAMPLE.read_text().splitlines()
+    data_start = lines.index("Potential/V, Current/A") + 2
+
+    truncated = validate_chi_bytes("truncated.txt", "\n".join(lines[:data_start + 100]).encode())
+    assert truncated.rows == 100 and truncated.errors == [
+        "100 data rows, but the sweep parameters give 250 (truncated export?)"]
+
+    broken = lines[:data_start + 3] + ["-0.492, -2.468e-6, 7", "-0.490, n/a"] + lines[data_start + 5:]
+    report = validate_chi_bytes("broken.txt", "\n".join(broken).encode())
+    assert report.errors[:2] == [f"1 rows without 2 fields (lines {data_start + 4})",
+                             f"1 rows with non-numeric values (lines {data_start + 5})"]
+
+    not_chi = validate_chi_bytes("notes.txt", b"Electrode polished before each run\n1, 2\n")
+    assert not not_chi.ok and not_chi.errors[0].startswith("Not a CHI export")
+    no_table = validate_chi_bytes("header_only.txt", "\n".join(lines[:data_start - 3]).encode())
+    assert no_table.errors[0].startswith("No data table header")
+    assert not validate_chi_bytes("binary.txt", b"\x00\x01\x02").ok
+    assert validate_uploads([("notes.md", b"anything")]) == []
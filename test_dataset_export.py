@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the merged, partitioned multi-session Parquet export.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+
+from dataset_export import export_tables, load_session_table, reconcile_schemas
+# dataset_export puts my_files on sys.path
+from dataset_builder import build_records, find_chi_files, save_dataset
+
+
+def session_table(molecule, concentration_um, extra=None) -> pa.Table:
+    columns = {
+        "technique": ["DPV", "DPV"],
+        "molecule": [molecule, molecule],
+        "date": ["2025-06-16", "2025-06-17"],
+        "concentration_um": concentration_um,
+        "current": [[1.0, 2.0], [3.0]],
+    }
+    return pa.table(dict(columns, **(extra or {})))
+
+
+def test_reconcile_schemas():
+    schema = reconcile_schemas([
+        pa.schema([("a", pa.int64()), ("b", pa.list_(pa.float32())), ("c", pa.string())]),
+        pa.schema([("a", pa.float64()), ("b", pa.list_(pa.float64())), ("c", pa.int64()), ("d", pa.bool_())]),
+    ])
+    assert schema == pa.schema([("a", pa.float64()), ("b", pa.list_(pa.float64())), ("c", pa.string()),
+                                ("d", pa.bool_())])
+
+
+def test_export_with_predicate_pushdown(tmp_path):
+    tables = {
+        "s1": session_table("AI1", [0, 1]),
+        "s2": session_table("AI2", [1.5, 2.5], extra={"electrode": ["GCE", "GCE"]}),
+    }
+    export_tables(tables, str(tmp_path))
+
+    assert (tmp_path / "technique=DPV" / "molecule=AI1" / "date=2025-06-16").is_dir()
+
+    dataset = ds.dataset(str(tmp_path), format="parquet", partitioning="hive")
+    table = dataset.to_table(filter=(ds.field("molecule") == "AI2") & (ds.field("concentration_um") > 2))
+    assert table.num_rows == 1
+    assert table["electrode"].to_pylist() == ["GCE"]
+    assert table.schema.field("concentration_um").type == pa.float64()
+
+    # Columns missing from a session come back as nulls
+    ai1 = dataset.to_table(filter=ds.field("molecule") == "AI1")
+    assert ai1["electrode"].to_pylist() == [None, None]
+
+
+def test_export_decodes_mixed_encodings(tmp_path):
+    session_dir = Path(__file__).resolve().parent / "test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM"
+    records = build_records(find_chi_files(str(session_dir)))
+    tables = {}
+    for encoding in ("full", "compact", "lossless"):
+        dataset_dir = tmp_path / encoding / "dataset_hf"
+        save_dataset([dict(r) for r in records], str(dataset_dir), preview=False, process=False, encoding=encoding)
+        tables[encoding] = load_session_table(dataset_dir, encoding)
+    schema = export_tables(tables, str(tmp_path / "export"))
+
+    assert not [name for name in schema.names if name.startswith("potential_") or name.endswith("_packed")]
+    table = ds.dataset(str(tmp_path / "export"), format="parquet", partitioning="hive").to_table()
+    for encoding in ("full", "compact", "lossless"):
+        rows = table.filter(ds.field("session_id") == encoding).sort_by("source_file").to_pylist()
+        assert len(rows) == len(records)
+        for row, record in zip(rows, sorted(records, key=lambda r: r["source_file"])):
+            np.testing.assert_allclose(row["potential"], record["potential"], atol=1e-9)
+            np.testing.assert_allclose(row["current"], record["current"], rtol=1e-6 if encoding == "compact" else 0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
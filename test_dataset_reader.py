@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped dataset_hf reader.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path("my_files")))
+from dataset_builder import build_dataset_from_dir
+from dataset_reader import DatasetReader
+
+SESSION_DIR = Path("test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM")
+
+
+@pytest.fixture(scope="module")
+def dataset_dir(tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp("session") / "dataset_hf"
+    build_dataset_from_dir(str(SESSION_DIR), str(output_dir), preview=False)
+    return output_dir
+
+
+def test_traces_match_dataset(dataset_dir):
+    from datasets import load_from_disk
+
+    dataset = load_from_disk(str(dataset_dir))
+    reader = DatasetReader(dataset_dir)
+    assert len(reader) == len(dataset)
+    for row in [0, 5, -1]:
+        np.testing.assert_array_equal(reader.current(row), dataset[row % len(dataset)]["current"])
+        np.testing.assert_array_equal(reader.potential(row), dataset[row % len(dataset)]["potential"])
+    assert reader.row(3)["source_file"] == dataset[3]["source_file"]
+    np.testing.assert_array_equal(reader.column("is_blank"), dataset["is_blank"])
+
+
+def test_views_are_zero_copy(dataset_dir):
+    reader = DatasetReader(dataset_dir)
+    stacked = reader.stacked("current")
+    assert stacked.shape == (len(reader), 250)
+    assert not stacked.flags.owndata and not stacked.flags.writeable
+    assert np.shares_memory(stacked, reader.current(4))
+    np.testing.assert_array_equal(stacked[4], reader.current(4))
+    with pytest.raises(IndexError):
+        reader.current(len(reader))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for the distributed parse stage on the local (multiprocess) backend.
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+from distributed_parse import SHARD_DIR, distributed_parse, list_chi_files
+from execution_backend import LocalBackend
+
+sys.path.append(str(Path("my_files")))
+from dataset_builder import build_records, find_chi_files  # noqa: E402
+
+SESSION_DIR = Path("test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM")
+
+
+def test_sharded_parse_matches_single_machine(tmp_path):
+    backend = LocalBackend(str(tmp_path / "volumes"))
+    volume = backend.volume("temp-dataset-processor-agent-volume-s1", create_if_missing=True)
+    shutil.copytree(SESSION_DIR, volume.path / "run")
+    (volume.path / "AGENTS.md").write_text("instructions")
+    (volume.path / "dataset_hf").mkdir()
+    (volume.path / "dataset_hf" / "notes.txt").write_text("not an input")
+
+    paths = list_chi_files(volume)
+    assert len(paths) == 11 and all(path.startswith("run/") for path in paths)
+    # The single-process build skips the same directories
+    assert [str(path.relative_to(volume.path)) for path in find_chi_files(volume.path)] == paths
+
+    rows = distributed_parse(backend, volume.name, shard_size=4, preview=True, process=False)
+    assert rows == 11
+    assert len(list((volume.path / SHARD_DIR).glob("*.parquet"))) == 3
+    assert (volume.path / "dataset_preview" / "index.json").exists()
+
+    from datasets import load_from_disk
+
+    dataset = load_from_disk(str(volume.path / "dataset_hf"))
+    assert dataset.to_list() == build_records(find_chi_files(SESSION_DIR))
@@ -1,20 +1,175 @@
-import os
-import requests
+#!/usr/bin/env python3
+"""
+Concurrent load generator for the /log and /stream endpoints.
+
+Replays shell_log.jsonl from N simulated agent sessions posting to /log while M SSE
+subscribers read /stream, then reports ingest throughput, end-to-end log latency
+percentiles and dropped events.
+
+By default the FastAPI app from modal_webendpoint is started in-process with a
+local_backend.LocalQueue standing in for modal.Queue; pass --url to target a running app.
+
+    python test_files/simulate/send_to_endpoint.py --sessions 20 --subscribers 4
+    python test_files/simulate/send_to_endpoint.py --url http://localhost:8000 --sessions 5
+"""
+
+import argparse
+import asyncio
 import json
+import logging
+import os
+import socket
+import sys
+import threading
 import time
+from pathlib import Path
 
-endpoint = "http://localhost:5000/api/logs"
+import httpx
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "modal_webendpoint"))
 
 log_path = os.path.join(os.path.dirname(__file__), "shell_log.jsonl")
 
-with open(log_path, "r", encoding="utf-8") as f:
-    log_data = f.readlines()
 
-log_data = [json.loads(log) for log in log_data]
+def load_log_entries(path: str = log_path) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def start_local_app() -> tuple[str, object]:
+    """Serve the real web app on a free local port, backed by a LocalQueue."""
+    import uvicorn
+    from local_backend import LocalQueue
+    from modal_webendpoint import create_web_app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(create_web_app(LocalQueue()), host="127.0.0.1", port=port,
+                                           log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Stats:
+    def __init__(self):
+        self.sent = set()
+        self.received = set()
+        self.duplicates = 0
+        self.post_errors = 0
+        self.post_latencies = []
+        self.e2e_latencies = []
+
+
+async def run_session(client: httpx.AsyncClient, url: str, session: int, entries: list[dict],
+                      interval: float, stats: Stats):
+    for seq, entry in enumerate(entries):
+        payload = dict(entry, loadtest={"session": session, "seq": seq, "sent_at": time.time()})
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"{url}/log", json=payload)
+            response.raise_for_status()
+            stats.sent.add((session, seq))
+        except httpx.HTTPError:
+            stats.post_errors += 1
+        stats.post_latencies.append(time.perf_counter() - start)
+        if interval:
+            await asyncio.sleep(interval)
+
+
+async def run_subscriber(client: httpx.AsyncClient, url: str, stats: Stats):
+    async with client.stream("GET", f"{url}/stream") as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            entry = json.loads(line[len("data:"):].strip())
+            marker = entry.get("loadtest") if isinstance(entry, dict) else None
+            if not marker:
+                continue  # keepalives and foreign log entries
+            key = (marker["session"], marker["seq"])
+            if key in stats.received:
+                stats.duplicates += 1
+                continue
+            stats.received.add(key)
+            stats.e2e_latencies.append(time.time() - marker["sent_at"])
+
+
+async def run_load(url: str, sessions: int, subscribers: int, entries: list[dict], rate: float,
+                   drain_timeout: float) -> dict:
+    stats = Stats()
+    interval = 1 / rate if rate else 0
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(30, read=None), limits=limits) as client:
+        subscriber_tasks = [asyncio.create_task(run_subscriber(client, url, stats)) for _ in range(subscribers)]
+        await asyncio.sleep(0.5)  # let subscribers connect before the first post
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_session(client, url, i, entries, interval, stats) for i in range(sessions)))
+        ingest_elapsed = time.perf_counter() - start
+
+        deadline = time.perf_counter() + drain_timeout
+        while len(stats.received) < len(stats.sent) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        for task in subscriber_tasks:
+            task.cancel()
+        await asyncio.gather(*subscriber_tasks, return_exceptions=True)
+
+    return {
+        "sessions": sessions,
+        "subscribers": subscribers,
+        "posted": len(stats.sent),
+        "post_errors": stats.post_errors,
+        "ingest_elapsed_s": ingest_elapsed,
+        "ingest_throughput_per_s": len(stats.sent) / ingest_elapsed if ingest_elapsed else 0,
+        "post_latency_ms": {f"p{p}": percentile(stats.post_latencies, p) * 1000 for p in (50, 95, 99)},
+        "delivered": len(stats.received),
+        "dropped": len(stats.sent - stats.received),
+        "duplicates": stats.duplicates,
+        "e2e_latency_ms": {f"p{p}": percentile(stats.e2e_latencies, p) * 1000 for p in (50, 95, 99)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running app (default: start one locally)")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent agent sessions posting logs")
+    parser.add_argument("--subscribers", type=int, default=2, help="Concurrent /stream SSE clients")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay shell_log.jsonl this many times per session")
+    parser.add_argument("--rate", type=float, default=0, help="Posts/s per session (0 = as fast as possible)")
+    parser.add_argument("--drain-timeout", type=float, default=15, help="Seconds to wait for delivery after posting")
+    parser.add_argument("--output", type=Path, help="Write the report JSON here")
+    args = parser.parse_args()
+
+    # modal_agent configures INFO logging on import; per-request httpx lines would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    url = args.url.rstrip("/") if args.url else None
+    server = None
+    if url is None:
+        url, server = start_local_app()
+        print(f"Started local app at {url}")
+
+    entries = load_log_entries() * args.repeat
+    report = asyncio.run(run_load(url, args.sessions, args.subscribers, entries, args.rate, args.drain_timeout))
+    if server is not None:
+        server.should_exit = True
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
 
-for log in log_data:
-    # print the first few characters of the log
-    print(str(log)[:500] + ("..." if len(str(log)) > 500 else "") + "\n")
 
-    time.sleep(0.5)
-    requests.post(endpoint, json=log)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
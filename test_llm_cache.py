@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the record/replay cache in front of the OpenAI client.
+"""
+
+import json
+
+import httpx
+import openai
+import pytest
+
+from llm_cache import CachingTransport, LLMCache, LLMCacheMiss, install_llm_cache, request_key
+
+MESSAGES = [{"role": "user", "content": "ls test_files"}]
+
+
+def completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-test",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    }
+
+
+def client(transport) -> openai.OpenAI:
+    return openai.OpenAI(api_key="test", base_url="http://api.test/v1", max_retries=0,
+                         http_client=httpx.Client(transport=transport))
+
+
+def test_record_then_replay_offline(tmp_path):
+    cache = LLMCache(str(tmp_path))
+    calls = []
+
+    def api(request):
+        calls.append(json.loads(request.content))
+        return httpx.Response(200, json=completion(f"call {len(calls)}"))
+
+    recorder = client(CachingTransport(httpx.MockTransport(api), cache, "record"))
+    recorded = recorder.chat.completions.create(model="gpt-test", messages=MESSAGES)
+    assert recorded.choices[0].message.content == "call 1"
+
+    def offline(request):
+        raise AssertionError("replay must not reach the API")
+
+    replayer = client(CachingTransport(httpx.MockTransport(offline), cache, "replay"))
+    for _ in range(2):
+        replayed = replayer.chat.completions.create(model="gpt-test", messages=MESSAGES)
+        assert replayed.choices[0].message.content == "call 1"
+    with pytest.raises(LLMCacheMiss, match="No recorded response for POST /v1/chat/completions"):
+        replayer.chat.completions.create(model="gpt-test", messages=MESSAGES + MESSAGES)
+    assert len(calls) == 1
+
+
+def test_request_key_ignores_key_order_and_volatile_fields():
+    body = {"model": "gpt-test", "messages": MESSAGES, "temperature": 0}
+    reordered = dict(reversed(list(body.items())), user="someone")
+    assert request_key("POST", "/v1/chat/completions", json.dumps(body).encode()) == \
+        request_key("post", "/v1/chat/completions", json.dumps(reordered).encode())
+    assert request_key("POST", "/v1/chat/completions", json.dumps(body).encode()) != \
+        request_key("POST", "/v1/responses", json.dumps(body).encode())
+
+
+def test_install_routes_new_clients_through_cache(tmp_path, monkeypatch):
+    """Only clients created inside the block use the cache; a miss raises without retries."""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    with install_llm_cache("replay", str(tmp_path)) as mode:
+        assert mode == "replay"
+        replay_client = openai.OpenAI(base_url="http://api.test/v1")
+        assert isinstance(replay_client._client._transport, CachingTransport)
+        assert replay_client._client._transport.mode == "replay"
+        with pytest.raises(LLMCacheMiss):
+            replay_client.chat.completions.create(model="gpt-test", messages=MESSAGES)
+    with pytest.raises(openai.OpenAIError, match="api_key"):
+        openai.OpenAI()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the local stand-ins of Modal Volume, Queue and Sandbox.
+"""
+
+import asyncio
+import io
+from queue import Empty
+
+import pytest
+from modal.volume import FileEntryType
+
+from local_backend import LocalQueue, LocalSandbox, LocalVolume
+
+
+def test_queue_sync_and_async():
+    """Items put from sync code are visible to both sync and `.aio` getters."""
+    queue = LocalQueue()
+    queue.put({"type": "log"})
+    assert queue.get(timeout=1) == {"type": "log"}
+
+    with pytest.raises(Empty):
+        queue.get(timeout=0.01)
+
+    async def consume():
+        async def produce():
+            await asyncio.sleep(0.05)
+            queue.put_many([1, 2])
+
+        asyncio.create_task(produce())
+        first = await queue.get.aio(timeout=1)
+        return first, await queue.get_many.aio(10, timeout=1)
+
+    assert asyncio.run(consume()) == (1, [2])
+
+    with pytest.raises(Empty):
+        asyncio.run(queue.get.aio(timeout=0.01))
+
+
+def test_volume_roundtrip(tmp_path):
+    """Uploaded files can be listed and read back; paths can't escape the volume."""
+    with pytest.raises(FileNotFoundError):
+        LocalVolume.from_name("session", root=str(tmp_path))
+
+    volume = LocalVolume.from_name("session", create_if_missing=True, root=str(tmp_path))
+    with volume.batch_upload() as batch:
+        batch.put_file(io.BytesIO(b"data"), "dataset_hf/data.arrow")
+
+    entries = list(volume.iterdir("dataset_hf", recursive=True))
+    assert [(e.path, e.type) for e in entries] == [("dataset_hf/data.arrow", FileEntryType.FILE)]
+    assert b"".join(volume.read_file("dataset_hf/data.arrow")) == b"data"
+
+    with pytest.raises(ValueError):
+        volume.local_path("../other")
+
+
+def test_sandbox_exec_translates_mounts(tmp_path):
+    """Commands written against /workspace run against the volume directory."""
+    volume = LocalVolume.from_name("session", create_if_missing=True, root=str(tmp_path))
+    sb = LocalSandbox.create(volumes={"/workspace": volume}, workdir="/workspace")
+
+    proc = sb.exec("bash", "-c", "echo hi > /workspace/out.txt && pwd")
+    assert proc.wait() == 0
+    assert proc.stdout.read().strip() == str(volume.path)
+    assert (volume.path / "out.txt").read_text() == "hi\n"
+
+    proc = sb.exec("test", "-f", "/workspace/AGENTS.md")
+    proc.wait()
+    assert proc.returncode == 1
+    sb.terminate()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
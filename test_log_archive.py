@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-session log archive and the /logs endpoint.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+from execution_backend import LocalBackend
+from log_archive import LogArchiveWriter, read_logs
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT / "modal_webendpoint"))
+from modal_webendpoint import create_web_app  # noqa: E402
+
+VOLUME = "temp-dataset-processor-agent-volume-s1"
+
+
+def test_range_and_tail_reads(tmp_path):
+    backend = LocalBackend(str(tmp_path / "volumes"))
+    volume = backend.volume(VOLUME, create_if_missing=True)
+    writer = LogArchiveWriter(backend, flush_entries=10)
+
+    async def run():
+        for i in range(25):
+            await writer.append("s1", VOLUME, {"type": "log", "i": i})
+        live = await read_logs(volume, offset=18, pending=writer.pending("s1"))
+        await writer.append("s1", VOLUME, {"type": "final_response", "i": 25})
+        return live, await read_logs(volume, offset=8, limit=5), await read_logs(volume, tail=3)
+
+    live, middle, tail = asyncio.run(run())
+    assert [entry["i"] for entry in live["entries"]] == list(range(18, 25))
+    assert not live["complete"]
+    assert [entry["i"] for entry in middle["entries"]] == list(range(8, 13))
+    assert [entry["i"] for entry in tail["entries"]] == [23, 24, 25]
+    assert tail["total"] == 26 and tail["complete"]
+    assert len(list((tmp_path / "volumes" / VOLUME / "logs").glob("*.ndjson.zst"))) == 3
+
+
+def test_logs_endpoint_replays_session(tmp_path):
+    backend = LocalBackend(str(tmp_path / "volumes"))
+    backend.volume(VOLUME, create_if_missing=True)
+    app = create_web_app(backend.queue(), backend=backend, base_url="http://test",
+                         templates_dir=str(ROOT / "modal_webendpoint" / "templates"),
+                         my_files_dir=str(ROOT / "my_files"))
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for i in range(5):
+                await client.post("/log/s1", json={"type": "log", "i": i})
+            await client.post("/log/s1", json={"type": "final_response", "response": "done"})
+            return await client.get("/logs/s1"), await client.get("/logs/s1", params={"tail": 2})
+
+    full, tail = asyncio.run(run())
+    assert full.status_code == 200
+    assert full.json()["complete"] and full.json()["total"] == 6
+    assert [entry.get("i") for entry in full.json()["entries"][:5]] == list(range(5))
+    assert tail.json()["entries"][-1] == {"type": "final_response", "response": "done"}
+    assert tail.json()["offset"] == 4
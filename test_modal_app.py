@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests that the deploy entrypoint deploys every function of the app, that the web endpoint
+module leaves modal_agent and its heavy dependencies to the routes, and that each function's
+image ships what modal_agent imports at module level.
+"""
+
+import os
+import subprocess
+import sys
+import warnings
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+import deploy  # noqa: E402
+import modal_agent  # noqa: E402
+
+
+def test_deploy_entrypoint_registers_all_functions():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        registered = set(deploy.app.registered_functions)
+    assert registered == {"fastapi_app", "run_agent_remotely", "parse_shard_remotely", "merge_shards_remotely",
+                          "export_merged_dataset", "daily_volume_delete"}
+
+
+def test_web_endpoint_module_imports_lazy_modules_lazily():
+    code = ("import sys, modal_webendpoint; "
+            "print(' '.join(m for m in modal_webendpoint.LAZY_MODULES + ('zstandard',) if m in sys.modules))")
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(ROOT), str(ROOT / "modal_webendpoint")])}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == []
+
+
+@pytest.mark.parametrize("image", sorted(modal_agent.IMAGE_SOURCES))
+def test_modal_agent_imports_with_image_sources(tmp_path, image):
+    """A container imports modal_agent with only its image's local sources available."""
+    for name in ("modal_agent",) + modal_agent.IMAGE_SOURCES[image]:
+        source = ROOT / name if (ROOT / name).is_dir() else ROOT / f"{name}.py"
+        (tmp_path / source.name).symlink_to(source)
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONPATH"}
+    result = subprocess.run([sys.executable, "-c", "import modal_agent"], cwd=tmp_path, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for running independent read-only agent tool calls concurrently.
+"""
+
+import threading
+import time
+
+import pytest
+
+from local_backend import LocalSandbox, LocalVolume
+from sandbox_wrappers import ConcurrentReadSandbox, is_read_only
+
+
+def test_read_only_classification():
+    assert is_read_only(["bash", "-lc", "ls -R ."])
+    assert is_read_only(["bash", "-lc", "nl -w2 -ba AGENTS.md | sed -n '1,30p'"])
+    assert is_read_only(["rg", "-n", "Potential", "."])
+    assert not is_read_only(["bash", "-lc", "cat << 'EOF' > create_hf_dataset.py\nprint(1)\nEOF"])
+    assert not is_read_only(["bash", "-lc", "python3 create_hf_dataset.py"])
+    assert not is_read_only(["bash", "-lc", "sed -i 's/a/b/' AGENTS.md"])
+    assert not is_read_only(["bash", "-lc", "ls $(rm -rf dataset_hf)"])
+    assert is_read_only(["bash", "-lc", "sed -n '/Potential/,$p' a.txt | sed 's/,/ /g'"])
+    for script in ["ls `rm -rf dataset_hf`", "sed -n 'w out.txt' a.txt", "sed -n '1,5W out.txt' a.txt",
+                   "sed '1e rm -rf dataset_hf' a.txt", "sed -e p -e 's/a/b/w out.txt' a.txt", "find . -fls out",
+                   "find . -fprint0 out", "find . -fprintf out '%p'", "find . -ok rm {} ;", "find . -okdir rm {} ;",
+                   "rg --pre 'rm -rf /workspace' x", "rg --pre=./run.sh x", "tree -o out.txt .",
+                   "diff --output=out.txt a b", "diff a b --output out.txt"]:
+        assert not is_read_only(["bash", "-lc", script]), script
+
+
+class SlowSandbox:
+    """Sandbox whose commands take 0.2 s each, logging when they start and end."""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def exec(self, *cmd, **kwargs):
+        sandbox = self
+
+        class Process:
+            def __init__(self):
+                with sandbox._lock:
+                    sandbox.events.append(("start", cmd))
+                time.sleep(0.2)
+                with sandbox._lock:
+                    sandbox.events.append(("end", cmd))
+                self.stdout = self.stderr = type("Stream", (), {"read": lambda _: " ".join(cmd)})()
+
+            def wait(self):
+                return 0
+
+        return Process()
+
+
+def test_independent_reads_overlap():
+    """Round-trip latency of reads issued together is paid once, not per call."""
+    sb = ConcurrentReadSandbox(SlowSandbox())
+    reads = [["head", "-n", "5", f"file_{i}.txt"] for i in range(5)]
+    start = time.perf_counter()
+    processes = [sb.exec(*cmd) for cmd in reads]
+    assert [process.stdout.read() for process in processes] == [" ".join(cmd) for cmd in reads]
+    assert time.perf_counter() - start < 0.2 * 5 / 2
+
+
+def test_writes_wait_for_running_reads():
+    inner = SlowSandbox()
+    sb = ConcurrentReadSandbox(inner)
+    sb.exec("cat", "a.txt")
+    sb.exec("wc", "-l", "a.txt")
+    sb.exec("bash", "-lc", "python3 build.py").wait()
+    write_start = inner.events.index(("start", ("bash", "-lc", "python3 build.py")))
+    assert set(inner.events[:write_start]) == {
+        ("start", ("cat", "a.txt")), ("end", ("cat", "a.txt")),
+        ("start", ("wc", "-l", "a.txt")), ("end", ("wc", "-l", "a.txt"))}
+
+
+def test_parallel_results_in_call_order(tmp_path):
+    """Reads run on a real sandbox come back with their own output and exit code."""
+    volume = LocalVolume.from_name("session", create_if_missing=True, root=str(tmp_path))
+    sb = ConcurrentReadSandbox(LocalSandbox.create(volumes={"/workspace": volume}, workdir="/workspace"))
+    processes = [sb.exec("bash", "-c", f"echo {i} | cat") for i in range(6)]
+    assert [(process.wait(), process.stdout.read().strip()) for process in processes] == [
+        (0, str(i)) for i in range(6)]
+    assert sb.exec("test", "-f", "missing").wait() == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for batched peak feature extraction.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path("my_files")))
+from chi_txt_parser import parse_chi_txt
+from dataset_builder import build_records, find_chi_files
+from peak_features import extract_features, session_features
+from processing import process_records
+
+SESSION_DIR = Path("test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM")
+
+
+def test_gaussian_peak_features():
+    x = np.linspace(-0.6, 0.0, 601)
+    sigma = 0.02
+    heights = np.array([[1e-7], [-3e-7]])
+    y = heights * np.exp(-((x + 0.33) ** 2) / (2 * sigma ** 2))
+    features = extract_features(y, x)
+
+    np.testing.assert_allclose(features["peak_potential"], [-0.33, -0.33])
+    np.testing.assert_allclose(features["peak_current"], heights[:, 0])
+    np.testing.assert_allclose(features["peak_fwhm"], 2.3548 * sigma, rtol=0.05)
+    # Area out to 5% of the height holds ~98% of the Gaussian integral
+    np.testing.assert_allclose(features["peak_area"], heights[:, 0] * sigma * np.sqrt(2 * np.pi), rtol=0.03)
+
+
+def test_session_features_mixed_grids():
+    x_long = np.linspace(-0.5, 0.0, 200)
+    x_short = np.linspace(-0.5, 0.0, 100)
+    peak = lambda x: np.exp(-((x + 0.2) / 0.03) ** 2)  # noqa: E731
+    columns = session_features([x_long.tolist(), x_short.tolist()], [peak(x_long).tolist(), peak(x_short).tolist()])
+    assert set(columns) == {"peak_potential", "peak_current", "peak_fwhm", "peak_area"}
+    assert all(abs(p + 0.2) < 0.01 for p in columns["peak_potential"])
+    assert all(isinstance(v, float) for v in columns["peak_area"])
+
+
+def test_sample_peaks_match_instrument_results():
+    paths = find_chi_files(str(SESSION_DIR))
+    records = process_records(build_records(paths))
+    for path, record in zip(paths, records):
+        assert record["peak_current"] < 0, path.name
+        assert -0.3 < record["peak_potential"] < -0.1 and record["peak_fwhm"] < 0.2, path.name
+        header = parse_chi_txt(str(path))
+        # Some files report a minor feature near -0.13 V instead of the AI1 peak; compare the main ones
+        if header.get("ip") is not None and abs(header["ip"]) >= 1e-7:
+            assert abs(record["peak_potential"] - header["Ep"]) <= 0.006, path.name
+            np.testing.assert_allclose(record["peak_current"], header["ip"], rtol=0.3, err_msg=path.name)
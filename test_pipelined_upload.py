@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for speculative parsing during /upload.
+"""
+
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from execution_backend import LocalBackend
+from local_backend import _aio_method
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT / "modal_webendpoint"))
+sys.path.append(str(ROOT / "my_files"))
+import dataset_builder  # noqa: E402
+from modal_webendpoint import create_web_app  # noqa: E402
+
+SESSION_DIR = ROOT / "test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM"
+
+
+class SpawnRecordingBackend(LocalBackend):
+    def __init__(self, root):
+        super().__init__(root)
+        self.spawned = []
+
+    async def _spawn_agent_async(self, **kwargs):
+        self.spawn_agent(**kwargs)
+
+    @_aio_method(_spawn_agent_async)
+    def spawn_agent(self, **kwargs):
+        self.spawned.append(kwargs)
+
+
+def test_upload_writes_parsed_records_used_by_builder(tmp_path, monkeypatch):
+    backend = SpawnRecordingBackend(str(tmp_path / "volumes"))
+    app = create_web_app(backend.queue(), backend=backend, base_url="http://test",
+                         templates_dir=str(ROOT / "modal_webendpoint" / "templates"),
+                         my_files_dir=str(ROOT / "my_files"))
+    paths = sorted(SESSION_DIR.glob("*.txt"))
+    files = [("files", (f"session/{path.name}", path.read_bytes())) for path in paths]
+    files.append(("files", ("session/notes.md", b"not a CHI file")))
+    response = TestClient(app).post("/upload", files=files, data={"experiment_context": ""}).json()
+    assert len(backend.spawned) == 1
+
+    session_dir = backend.volume(response["volume_name"]).path
+    parsed = dataset_builder.load_parsed_records(session_dir / dataset_builder.PARSED_RECORDS)
+    assert sorted(parsed) == [path.name for path in paths]
+
+    expected = dataset_builder.build_records(paths)
+
+    def no_parsing(path):
+        raise AssertionError(f"{path} should not be parsed again")
+
+    monkeypatch.setattr(dataset_builder, "parse_chi_txt", no_parsing)
+    dataset = dataset_builder.build_dataset_from_dir(str(session_dir), str(tmp_path / "dataset_hf"),
+                                                     preview=False, process=False)
+    assert dataset.to_list() == expected
+
+
+def test_upload_commits_files_while_parsing(tmp_path, monkeypatch):
+    """The raw files are committed without waiting for the parses."""
+    import time
+
+    import modal_webendpoint
+
+    backend = SpawnRecordingBackend(str(tmp_path / "volumes"))
+    app = create_web_app(backend.queue(), backend=backend, base_url="http://test",
+                         templates_dir=str(ROOT / "modal_webendpoint" / "templates"),
+                         my_files_dir=str(ROOT / "my_files"))
+    committed_before_parse = []
+    parse = modal_webendpoint.speculative_parse
+
+    def slow_parse(filename, content):
+        session_id = backend.spawned[0]["session_id"]
+        uploaded = tmp_path / "volumes" / f"temp-dataset-processor-agent-volume-{session_id}" / filename
+        deadline = time.time() + 2
+        while not uploaded.exists() and time.time() < deadline:
+            time.sleep(0.01)
+        committed_before_parse.append(uploaded.exists())
+        return parse(filename, content)
+
+    monkeypatch.setattr(modal_webendpoint, "speculative_parse", slow_parse)
+    paths = sorted(SESSION_DIR.glob("*.txt"))
+    files = [("files", (f"session/{path.name}", path.read_bytes())) for path in paths]
+    response = TestClient(app).post("/upload", files=files, data={"experiment_context": ""}).json()
+
+    assert committed_before_parse == [True] * len(paths)
+    session_dir = backend.volume(response["volume_name"]).path
+    parsed = dataset_builder.load_parsed_records(session_dir / dataset_builder.PARSED_RECORDS)
+    assert sorted(parsed) == [path.name for path in paths]
+
+
+def test_upload_quarantines_malformed_files(tmp_path):
+    backend = SpawnRecordingBackend(str(tmp_path / "volumes"))
+    app = create_web_app(backend.queue(), backend=backend, base_url="http://test",
+                         templates_dir=str(ROOT / "modal_webendpoint" / "templates"),
+                         my_files_dir=str(ROOT / "my_files"))
+    paths = sorted(SESSION_DIR.glob("*.txt"))
+    truncated = b"\n".join(paths[0].read_bytes().splitlines()[:60])
+    files = [("files", (f"session/{path.name}", path.read_bytes())) for path in paths[1:]]
+    files.append(("files", (f"session/{paths[0].name}", truncated)))
+    client = TestClient(app)
+
+    response = client.post("/upload", files=files, data={"experiment_context": ""}).json()
+    assert [report["file"] for report in response["quarantined"]] == [f"session/{paths[0].name}"]
+    session_dir = backend.volume(response["volume_name"]).path
+    assert (session_dir / "quarantine" / "session" / paths[0].name).read_bytes() == truncated
+    assert not (session_dir / "session" / paths[0].name).exists()
+    assert "quarantine/report.json" in {str(p.relative_to(session_dir)) for p in session_dir.rglob("*.json")}
+    assert [path.name for path in dataset_builder.find_chi_files(str(session_dir))] == [p.name for p in paths[1:]]
+
+    rejected = client.post("/upload", files=[("files", ("session/bad.txt", truncated))],
+                           data={"experiment_context": ""})
+    assert rejected.status_code == 422
+    assert len(backend.spawned) == 1
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the session result cache and its use by /upload.
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from execution_backend import LocalBackend
+from local_backend import _aio_method
+from result_cache import ResultCache, manifest_hash
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT / "modal_webendpoint"))
+from modal_webendpoint import create_web_app  # noqa: E402
+
+SAMPLES = sorted((ROOT / "test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM").glob("*.txt"))[:2]
+
+
+class RecordingBackend(LocalBackend):
+    """Local backend whose 'agent' only writes a dataset_hf and records the result, like run_agent."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.spawned = []
+        self.catalog_commits = 0
+
+    def commit_catalog(self):
+        self.catalog_commits += 1
+
+    async def _spawn_agent_async(self, **kwargs):
+        self.spawn_agent(**kwargs)
+
+    @_aio_method(_spawn_agent_async)
+    def spawn_agent(self, **kwargs):
+        self.spawned.append(kwargs["session_id"])
+        volume = self.volume(f"temp-dataset-processor-agent-volume-{kwargs['session_id']}")
+        state = volume.local_path("dataset_hf/state.json")
+        state.parent.mkdir(parents=True)
+        state.write_text("{}")
+        ResultCache(self.result_cache_dir).put(kwargs["manifest_key"], kwargs["session_id"], volume.name)
+
+
+def test_manifest_hash_is_order_independent():
+    files = [("a.txt", b"1"), ("b.txt", b"2")]
+    assert manifest_hash(files, "ctx", "v1") == manifest_hash(files[::-1], "ctx", "v1")
+    assert manifest_hash(files, "ctx", "v1") != manifest_hash(files, "other", "v1")
+    assert manifest_hash(files, "ctx", "v1") != manifest_hash(files, "ctx", "v2")
+    assert manifest_hash(files, "ctx", "v1") != manifest_hash([("a.txt", b"1"), ("b.txt", b"3")], "ctx", "v1")
+
+
+def test_upload_reuses_finished_session(tmp_path):
+    backend = RecordingBackend(str(tmp_path / "volumes"))
+    app = create_web_app(backend.queue(), backend=backend, base_url="http://test",
+                         templates_dir=str(ROOT / "modal_webendpoint" / "templates"),
+                         my_files_dir=str(ROOT / "my_files"))
+    client = TestClient(app)
+
+    def upload(context="AI1 calibration", **data):
+        files = [("files", (f"run/{path.name}", path.read_bytes())) for path in SAMPLES]
+        return client.post("/upload", files=files, data={"experiment_context": context, **data}).json()
+
+    first = upload()
+    assert first["status"] == "processing_started"
+
+    second = upload()
+    assert second["status"] == "cached"
+    assert second["session_id"] == first["session_id"]
+    assert len(backend.spawned) == 1
+
+    assert upload(force_refresh="true")["status"] == "processing_started"
+    other = upload(context="different context")
+    assert other["status"] == "processing_started"
+    assert len(backend.spawned) == 3
+
+    # A cached session whose volume was deleted is rerun, and its stale entry removal is committed
+    shutil.rmtree(backend.volume(other["volume_name"]).path)
+    commits = backend.catalog_commits
+    assert upload(context="different context")["status"] == "processing_started"
+    assert len(backend.spawned) == 4
+    assert backend.catalog_commits == commits + 1
+
+
+def test_cache_put_get_invalidate(tmp_path):
+    cache = ResultCache(tmp_path / "results")
+    cache.put("k", "s1", "temp-dataset-processor-agent-volume-s1")
+    assert cache.get("k")["session_id"] == "s1"
+    cache.invalidate("k")
+    assert cache.get("k") is None
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the tool-output reducer used in the agent execution path.
+"""
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path("my_files")))
+from tool_output_reducer import collapse_runs, reduce_output
+from local_backend import LocalSandbox, LocalVolume
+from sandbox_wrappers import ReducingSandbox
+
+SHELL_LOG = Path("test_files/simulate/shell_log.jsonl")
+
+
+def test_collapse_repetitive_listing():
+    """A long listing of similarly named files collapses to a few representative lines."""
+    lines = ["AGENTS.md"] + [f"250616_Pprot382int_2007B_1uM_AI1_S{i}_EricMM_GCE_DPV.{ext}"
+                             for i in range(1, 21) for ext in ("bin", "txt")]
+    collapsed = collapse_runs(lines)
+    assert collapsed[0] == "AGENTS.md"
+    assert len(collapsed) == 1 + 4 + 1 + 2
+    assert "[34 similar lines omitted]" in collapsed[5]
+
+
+def test_small_output_untouched():
+    text = "Dataset({\n    features: ['potential', 'current'],\n    num_rows: 21\n})\n"
+    assert reduce_output(text) == (text, False)
+
+
+def test_head_tail_truncation():
+    text = "".join(f"line {i}: {'x' * (i % 7)}\n" for i in range(1000))
+    reduced, was_reduced = reduce_output(text, max_lines=50)
+    assert was_reduced
+    assert len(reduced.splitlines()) < 150
+    assert reduced.startswith("line 0:")
+    assert reduced.rstrip().endswith("line 999: " + "x" * (999 % 7))
+
+
+def test_shell_log_payloads_shrink():
+    """Replaying the recorded agent session, tool outputs shrink substantially."""
+    outputs = [json.loads(line)["output"] for line in SHELL_LOG.read_text().splitlines()]
+    original = sum(len(output) for output in outputs)
+    reduced = sum(len(reduce_output(output)[0]) for output in outputs)
+    assert reduced < original * 0.6
+
+
+def test_reducing_sandbox_stores_full_output(tmp_path):
+    """Commands run through the wrapper return reduced output and keep the full output in the volume."""
+    volume = LocalVolume.from_name("session", create_if_missing=True, root=str(tmp_path))
+    shutil.copy("my_files/tool_output_reducer.py", volume.path)
+    sb = ReducingSandbox(LocalSandbox.create(volumes={"/workspace": volume}, workdir="/workspace"))
+
+    proc = sb.exec("bash", "-c", "seq 1 5000; exit 3")
+    assert proc.wait() == 3
+    stdout = proc.stdout.read()
+    assert len(stdout.splitlines()) < 20
+    stored = list((volume.path / ".tool_outputs").glob("*.stdout"))
+    assert len(stored) == 1
+    assert len(stored[0].read_text().splitlines()) == 5000
+
+
+def test_bounded_numeric_output_passes_through(tmp_path):
+    """CHI data rows the agent asked for with head or sed -n are returned as they are, never collapsed."""
+    volume = LocalVolume.from_name("session", create_if_missing=True, root=str(tmp_path))
+    shutil.copy("my_files/tool_output_reducer.py", volume.path)
+    rows = "".join(f"{0.1 - i * 0.004:.3f}, {1.2e-6 + i * 1e-9:.3e}\n" for i in range(400))
+    (volume.path / "file.txt").write_text(rows)
+    sb = ReducingSandbox(LocalSandbox.create(volumes={"/workspace": volume}, workdir="/workspace"))
+
+    proc = sb.exec("bash", "-c", "head -n 40 file.txt")
+    assert proc.wait() == 0
+    assert proc.stdout.read() == "".join(rows.splitlines(keepends=True)[:40])
+
+    proc = sb.exec("bash", "-c", "sed -n '1,300p' file.txt")
+    assert proc.wait() == 0
+    assert "similar lines omitted" not in proc.stdout.read()
+
+
+def test_reduced_output_replays_from_llm_cache(tmp_path):
+    """A rerun gets the same reduced text, so the model requests built from it hit the cache."""
+    import httpx
+
+    from llm_cache import CachingTransport, LLMCache
+
+    def reduced_stdout(name: str) -> str:
+        volume = LocalVolume.from_name(name, create_if_missing=True, root=str(tmp_path))
+        shutil.copy("my_files/tool_output_reducer.py", volume.path)
+        sb = ReducingSandbox(LocalSandbox.create(volumes={"/workspace": volume}, workdir="/workspace"))
+        proc = sb.exec("bash", "-c", "seq 1 5000")
+        proc.wait()
+        return proc.stdout.read()
+
+    def request(output: str) -> httpx.Request:
+        body = json.dumps({"model": "gpt-test", "messages": [{"role": "tool", "content": output}]})
+        return httpx.Request("POST", "http://api.test/v1/chat/completions", content=body)
+
+    cache = LLMCache(str(tmp_path / "llm_cache"))
+    api = httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+    recorded = reduced_stdout("record")
+    assert "ref " in recorded
+    CachingTransport(api, cache, "record").handle_request(request(recorded))
+
+    replayed = reduced_stdout("replay")
+    assert replayed == recorded
+    response = CachingTransport(api, cache, "replay").handle_request(request(replayed))
+    assert response.status_code == 200 and response.json() == {"ok": True}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact waveform encodings of dataset_hf.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path("my_files")))
+from dataset_builder import build_dataset_from_dir
+from dataset_reader import DatasetReader
+from waveform_encoding import UNIFORM_ATOL, decode_record, encode_records, uniform_axis
+
+SESSION_DIR = Path("test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM")
+
+
+def dataset_size(dataset_dir: Path) -> int:
+    return sum(path.stat().st_size for path in dataset_dir.glob("*.arrow"))
+
+
+@pytest.fixture(scope="module")
+def datasets(tmp_path_factory):
+    root = tmp_path_factory.mktemp("encodings")
+    for encoding in ["full", "compact", "lossless"]:
+        build_dataset_from_dir(str(SESSION_DIR), str(root / encoding), preview=False, encoding=encoding)
+    return root
+
+
+@pytest.mark.parametrize("encoding", ["compact", "lossless"])
+def test_encoded_datasets_decode_to_full(datasets, encoding):
+    full = DatasetReader(datasets / "full")
+    encoded = DatasetReader(datasets / encoding)
+    assert "potential" not in encoded.column_names
+    assert dataset_size(datasets / encoding) < 0.7 * dataset_size(datasets / "full")
+    for row in [0, 7, -1]:
+        np.testing.assert_allclose(encoded.potential(row), full.potential(row), rtol=0, atol=UNIFORM_ATOL)
+        for name in ["current", "current_corrected"]:
+            if encoding == "lossless":
+                np.testing.assert_array_equal(encoded.trace(row, name), full.trace(row, name))
+            else:
+                np.testing.assert_allclose(encoded.trace(row, name), full.trace(row, name), rtol=1e-6)
+    np.testing.assert_array_equal(encoded.column("peak_area"), full.column("peak_area"))
+    assert encoded.stacked("potential").shape == full.stacked("potential").shape
+
+
+def test_non_uniform_sweeps_fall_back():
+    uniform = {"potential": [-0.5, -0.498, -0.496], "current": [1e-6, 2e-6, 3e-6]}
+    jittered = {"potential": [0.0, 0.1, 0.25], "current": [1e-6, 2e-6, 3e-6]}
+    assert uniform_axis(uniform["potential"])[2] == 3
+    assert uniform_axis(jittered["potential"]) is None
+
+    encoded = encode_records([uniform, jittered], "lossless")
+    assert encoded[0]["potential"] is None and encoded[1]["potential"] == jittered["potential"]
+    for original, record in zip([uniform, jittered], encoded):
+        decoded = decode_record(record)
+        np.testing.assert_allclose(decoded["potential"], original["potential"], rtol=0, atol=UNIFORM_ATOL)
+        np.testing.assert_array_equal(decoded["current"], original["current"])
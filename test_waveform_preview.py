@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for min/max waveform decimation and the preview pyramid.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path("my_files")))
+from chi_txt_parser import parse_chi_txt
+from waveform_preview import choose_level, load_level, level_rows, minmax_decimate, write_preview_pyramid
+
+SAMPLE = Path("test_files/250616 DPVs Pprot382int-2007B concentrated in Eric MM/250616_BLANK_EricMM_GCE_DPV.txt")
+
+
+def test_minmax_keeps_extremes_and_order():
+    x = np.linspace(-0.5, 0.5, 1_000_000)
+    y = np.sin(x * 40)
+    y[123_456] = 5.0
+    y[700_000] = -7.0
+    x_dec, y_dec = minmax_decimate(x, y, 512)
+    assert len(y_dec) == 512
+    assert y_dec.max() == 5.0 and y_dec.min() == -7.0
+    assert np.all(np.diff(x_dec) >= 0)
+
+
+def test_short_trace_passthrough():
+    x_dec, y_dec = minmax_decimate([0.0, 0.1], [1.0, 2.0], 64)
+    assert x_dec.tolist() == [0.0, 0.1] and y_dec.tolist() == [1.0, 2.0]
+
+
+def test_pyramid_roundtrip(tmp_path):
+    parsed = parse_chi_txt(str(SAMPLE))
+    records = [{"source_file": SAMPLE.name, "potential": parsed["Potential/V"], "current": parsed["Current/A"]}]
+    index = write_preview_pyramid(records, tmp_path, levels=(1024, 64))
+    assert index["levels"] == [64, 1024]
+    assert choose_level(index["levels"], 100) == 1024
+
+    level = load_level((tmp_path / "level_64.npz").read_bytes())
+    (trace,) = level_rows(level, [0])
+    assert len(trace["current"]) == 64
+    assert min(trace["current"]) == pytest.approx(min(parsed["Current/A"]))
+
+    # Traces shorter than the level are stored unchanged
+    full = level_rows(load_level((tmp_path / "level_1024.npz").read_bytes()), [0])[0]
+    assert len(full["potential"]) == len(parsed["Potential/V"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the async /log, /download, /export and /catalog/query handlers and the cached index page on the local
+backend.
+"""
+
+import asyncio
+import io
+import sys
+import zipfile
+from pathlib import Path
+
+import httpx
+
+from execution_backend import LocalBackend
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT / "modal_webendpoint"))
+from modal_webendpoint import create_web_app  # noqa: E402
+
+
+def make_app(tmp_path):
+    backend = LocalBackend(str(tmp_path / "volumes"))
+    app = create_web_app(backend.queue(), backend=backend, base_url="http://test",
+                         templates_dir=str(ROOT / "modal_webendpoint" / "templates"),
+                         my_files_dir=str(ROOT / "my_files"))
+    return backend, app
+
+
+def test_concurrent_downloads(tmp_path):
+    backend, app = make_app(tmp_path)
+    volume = backend.volume("temp-dataset-processor-agent-volume-s1", create_if_missing=True)
+    with volume.batch_upload() as batch:
+        batch.put_file(io.BytesIO(b"{}"), "dataset_hf/state.json")
+        batch.put_file(io.BytesIO(b"x" * 100_000), "dataset_hf/data-00000-of-00001.arrow")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.get(f"/download/{volume.name}") for _ in range(20)))
+            missing = await client.get("/download/temp-dataset-processor-agent-volume-missing")
+        return responses, missing
+
+    responses, missing = asyncio.run(run())
+    assert all(r.status_code == 200 for r in responses)
+    with zipfile.ZipFile(io.BytesIO(responses[0].content)) as archive:
+        assert sorted(archive.namelist()) == ["data-00000-of-00001.arrow", "state.json"]
+        assert archive.read("data-00000-of-00001.arrow") == b"x" * 100_000
+    assert missing.status_code == 404
+
+
+def test_log_reaches_queue(tmp_path):
+    backend, app = make_app(tmp_path)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await asyncio.gather(*(client.post("/log", json={"type": "log", "i": i}) for i in range(50)))
+        return await backend.queue().get_many.aio(100, timeout=1)
+
+    entries = asyncio.run(run())
+    assert sorted(entry["i"] for entry in entries) == list(range(50))
+
+
+def test_filtered_projected_export(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sys.path.append(str(ROOT / "my_files"))
+    from dataset_builder import build_dataset_from_dir
+
+    backend, app = make_app(tmp_path)
+    volume = backend.volume("temp-dataset-processor-agent-volume-s1", create_if_missing=True)
+    session_dir = ROOT / "test_files" / "250616 DPVs Pprot382int-2007B concentrated in Eric MM"
+    build_dataset_from_dir(str(session_dir), str(volume.path / "dataset_hf"), preview=False, encoding="compact")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            parquet = await client.get(f"/export/{volume.name}", params={
+                "concentration": "1uM", "columns": "source_file,concentration,peak_area,potential"})
+            csv = await client.get(f"/export/{volume.name}", params={
+                "concentration_um_min": 0.5, "columns": "source_file,concentration_um", "format": "csv"})
+            bad = await client.get(f"/export/{volume.name}", params={"columns": "nope"})
+            unknown = [await client.get(f"/export/{volume.name}", params=params)
+                       for params in ({"scan": "abc"}, {"replicate": "x", "concentration": "1uM"})]
+            full = await client.get(f"/export/{volume.name}")
+        return parquet, csv, bad, unknown, full
+
+    parquet, csv, bad, unknown, full = asyncio.run(run())
+    assert parquet.status_code == 200
+    table = pq.read_table(io.BytesIO(parquet.content))
+    assert table.column_names == ["source_file", "concentration", "peak_area", "potential"]
+    assert table.num_rows > 0 and set(table["concentration"].to_pylist()) == {"1uM"}
+    assert len(table["potential"][0]) == 250
+    rows = csv.text.strip().splitlines()
+    assert rows[0] == '"source_file","concentration_um"'
+    assert rows[1:] and all(float(row.split(",")[1]) >= 0.5 for row in rows[1:])
+    assert bad.status_code == 400
+    assert [response.status_code for response in unknown] == [400, 400]
+    assert "scan" in unknown[0].json()["detail"]
+    # The default projection decodes the compact encoding too
+    table = pq.read_table(io.BytesIO(full.content))
+    assert "potential" in table.column_names and "potential_start" not in table.column_names
+    assert len(table["potential"][0]) == 250 and table.schema.field("current").type == pa.list_(pa.float64())
+
+
+def test_catalog_query_limit_is_bounded(tmp_path):
+    backend, app = make_app(tmp_path)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get(f"/catalog/query?limit={limit}") for limit in (-1, 0, 1001, 10)))
+
+    responses = asyncio.run(run())
+    assert [r.status_code for r in responses] == [422, 422, 422, 200]
+    assert responses[-1].json()["rows"] == []
+
+
+def test_index_is_cached_with_etag_and_gzip(tmp_path):
+    _, app = make_app(tmp_path)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            plain = await client.get("/", headers={"Accept-Encoding": "identity"})
+            compressed = await client.get("/", headers={"Accept-Encoding": "gzip"})
+            revalidated = await client.get("/", headers={"Accept-Encoding": "gzip",
+                                                          "If-None-Match": compressed.headers["etag"]})
+        return plain, compressed, revalidated
+
+    plain, compressed, revalidated = asyncio.run(run())
+    assert plain.status_code == compressed.status_code == 200
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.text == plain.text == (ROOT / "modal_webendpoint" / "templates" / "index.html").read_text()
+    assert compressed.headers["etag"] != plain.headers["etag"]
+    assert revalidated.status_code == 304 and not revalidated.content